@@ -0,0 +1,112 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Benchmark of building generation inside Blender, run headless:
+
+    blender -b --python benchmarks/bench_blender.py -- --output blender.json [--compare baseline.json]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resource
+
+import bpy
+
+import building_generator_2_80 as addon
+import building_kernel
+import common
+
+
+def mesh_counts(meshes):
+    return sum(len(mesh.vertices) for mesh in meshes), sum(len(mesh.polygons) for mesh in meshes)
+
+
+def remove_meshes(meshes):
+    for mesh in meshes:
+        bpy.data.meshes.remove(mesh)
+
+
+def run(args):
+    cases = []
+    collection = bpy.data.collections.new("Benchmark")
+    for levels, length in common.sweep(args):
+        params = building_kernel.BuildingParams(size_x=length, size_y=length, level_count=levels)
+
+        def latency():
+            addon.GEOMETRY_CACHE.clear()
+            mesh = bpy.data.meshes.new("Benchmark")
+            addon.MakeBuilding.generate_building(
+                mesh, 0, 0, params.size_x, params.size_y, params.level_height, params.level_count,
+                params.bottom_gap, params.gap, params.top_gap, params.interval_width,
+                params.wnd_height, params.wnd_width)
+            counts = mesh_counts([mesh])
+            remove_meshes([mesh])
+            return counts
+
+        result = common.measure(latency, args.repeat)
+        result["name"] = "latency levels={} length={}".format(levels, length)
+        cases.append(result)
+
+    batch = [building_kernel.BuildingParams(location_x=i * 50.0, size_x=20 + i % 40, level_count=1 + i % 10)
+             for i in range(args.count)]
+    for mode in ("objects", "merged"):
+        def throughput():
+            addon.GEOMETRY_CACHE.clear()
+            if mode == "merged":
+                objects = addon.make_merged_buildings(batch, collection)
+            else:
+                objects = addon.make_buildings(batch, collection, share_meshes=False)
+            meshes = [obj.data for obj in objects]
+            counts = mesh_counts(meshes)
+            for obj in objects:
+                bpy.data.objects.remove(obj)
+            remove_meshes(meshes)
+            return counts
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result = common.measure(throughput, max(1, args.repeat // 2))
+        result["name"] = "throughput {} count={}".format(mode, args.count)
+        # Blender mesh memory isn't visible to tracemalloc, report process peak growth (KiB on Linux)
+        result["peak_rss_growth_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        cases.append(result)
+    bpy.data.collections.remove(collection)
+    return {
+        "environment": common.environment(
+            blender=bpy.app.version_string,
+            addon_version=".".join(str(v) for v in addon.bl_info["version"])),
+        "cases": cases,
+    }
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    arguments = common.parse_args(argv, "building generation benchmark in Blender")
+    addon.register()
+    code = common.report(run(arguments), arguments)
+    addon.unregister()
+    sys.exit(code)
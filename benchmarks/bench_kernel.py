@@ -0,0 +1,84 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Benchmark of Blender independent building_kernel, run with plain Python:
+
+    python benchmarks/bench_kernel.py --output kernel.json [--compare baseline.json]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import building_kernel
+import common
+
+
+def count(buffers):
+    return len(buffers.vertices), len(buffers.loop_totals)
+
+
+def run(args):
+    cases = []
+    for levels, length in common.sweep(args):
+        params = building_kernel.BuildingParams(size_x=length, size_y=length, level_count=levels)
+        name = "levels={} length={}".format(levels, length)
+
+        def segments():
+            building_kernel.building_layout(params)
+            return 0, 0
+
+        result = common.measure(segments, args.repeat)
+        result["name"] = "segments " + name
+        cases.append(result)
+
+        result = common.measure(lambda: count(building_kernel.generate_from_params(params)), args.repeat)
+        result["name"] = "building " + name
+        cases.append(result)
+
+    # Throughput of distinct archetypes, so nothing is shared between buildings
+    batch = [building_kernel.BuildingParams(location_x=i * 50.0, size_x=20 + i % 40, level_count=1 + i % 10)
+             for i in range(args.count)]
+
+    def throughput():
+        vertices = faces = 0
+        for params in batch:
+            v, f = count(building_kernel.generate_from_params(params))
+            vertices += v
+            faces += f
+        return vertices, faces
+
+    result = common.measure(throughput, max(1, args.repeat // 2))
+    result["name"] = "throughput count={}".format(args.count)
+    cases.append(result)
+    return {"environment": common.environment(numpy=np.__version__), "cases": cases}
+
+
+if __name__ == "__main__":
+    arguments = common.parse_args(sys.argv[1:], "building_kernel benchmark")
+    sys.exit(common.report(run(arguments), arguments))
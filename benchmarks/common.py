@@ -0,0 +1,137 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Shared benchmark helpers - parameter sweeps, timing, results files and regression checks
+"""
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+LEVELS_SWEEP = (1, 2, 5, 10, 20, 50, 100)
+LENGTHS_SWEEP = (10, 20, 50, 100, 200, 500)
+QUICK_LEVELS_SWEEP = (1, 10, 100)
+QUICK_LENGTHS_SWEEP = (10, 100, 500)
+
+
+def parse_args(argv, description):
+    """
+    Parses benchmark command line arguments
+    :param argv: arguments list, without program name
+    :param description: benchmark description
+    :return: parsed arguments
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline results JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="max allowed slowdown ratio against baseline, default 1.2")
+    parser.add_argument("--repeat", type=int, default=5, help="repeats per case, best time is reported")
+    parser.add_argument("--count", type=int, default=1000, help="buildings count for throughput cases")
+    parser.add_argument("--quick", action="store_true", help="use smaller parameter sweep")
+    return parser.parse_args(argv)
+
+
+def sweep(args):
+    """
+    :param args: parsed arguments
+    :return: list of (levels, wall length) cases
+    """
+    levels_sweep = QUICK_LEVELS_SWEEP if args.quick else LEVELS_SWEEP
+    lengths_sweep = QUICK_LENGTHS_SWEEP if args.quick else LENGTHS_SWEEP
+    return [(levels, length) for levels in levels_sweep for length in lengths_sweep]
+
+
+def measure(fn, repeat):
+    """
+    Times function calls and traces peak Python/NumPy memory allocated by a call
+    :param fn: function without arguments, returns (vertices count, faces count)
+    :param repeat: calls count, the best time is reported
+    :return: result dict
+    """
+    times = []
+    counts = (0, 0)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = min(times)
+    return {
+        "best_s": best,
+        "mean_s": sum(times) / len(times),
+        "vertices": counts[0],
+        "faces": counts[1],
+        "vertices_per_s": counts[0] / best if best > 0 else 0.0,
+        "faces_per_s": counts[1] / best if best > 0 else 0.0,
+        "peak_bytes": peak,
+    }
+
+
+def environment(**extra):
+    """
+    :return: dict describing benchmark environment
+    """
+    env = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    env.update(extra)
+    return env
+
+
+def report(results, args):
+    """
+    Prints results table, writes results file and checks them against baseline
+    :param results: dict with "environment" and "cases" list
+    :param args: parsed arguments
+    :return: process exit code, 1 if regressions were found
+    """
+    print("{:<40} {:>10} {:>14} {:>14} {:>12}".format("case", "best ms", "vertices/s", "faces/s", "peak KiB"))
+    for case in results["cases"]:
+        print("{:<40} {:>10.3f} {:>14.0f} {:>14.0f} {:>12.1f}".format(
+            case["name"], case["best_s"] * 1000, case["vertices_per_s"], case["faces_per_s"],
+            case["peak_bytes"] / 1024.0))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = dict((case["name"], case) for case in json.load(f)["cases"])
+        regressions = []
+        for case in results["cases"]:
+            base = baseline.get(case["name"])
+            if base is not None and base["best_s"] > 0 and case["best_s"] / base["best_s"] > args.threshold:
+                regressions.append((case["name"], case["best_s"] / base["best_s"]))
+        for name, ratio in regressions:
+            print("REGRESSION {}: {:.2f}x slower than baseline".format(name, ratio))
+        if regressions:
+            return 1
+    return 0
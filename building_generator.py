@@ -34,14 +34,12 @@ bl_info = {
     "category": "Add Mesh"
 }
 
-import math
 import bpy
-import mathutils
-import bmesh
-from collections import OrderedDict
 from mathutils import Vector
-from bpy.types import Operator, PropertyGroup, Object, Panel
-from bpy.props import StringProperty, FloatProperty, BoolProperty, IntProperty
+from bpy.types import PropertyGroup
+from bpy.props import FloatProperty, IntProperty
+
+import building_kernel
 
 
 class BuildingMakerPanel(bpy.types.Panel):
@@ -145,126 +143,6 @@ class MakeBuilding(bpy.types.Operator):
                           i * size + size - 2])
     # end generate_stripe
 
-    @staticmethod
-    def generate_wall_segs(length, wnd_width, interval_width, min_gap):
-        """
-        Generates wall segments (windows, intervals) lengths array
-        :param length: wall length, m
-        :param wnd_width: window width, m
-        :param interval_width: interval width, m
-        :param min_gap: minimal left/right gap, m
-        :return: segment lengths array
-        """
-        cnt = int((length - (wnd_width + min_gap * 2)) /
-                  (wnd_width + interval_width))
-
-        real_gap = (1.0 * length - (wnd_width + interval_width)
-                    * cnt - wnd_width) / 2
-
-        cols = [real_gap]
-        for i in range(cnt):
-            cols.append(wnd_width)
-            cols.append(interval_width)
-        cols.append(wnd_width)
-        cols.append(real_gap)
-        return cols
-
-    @staticmethod
-    def generate_height_segs(
-            levels,
-            level_height,
-            bottom_gap,
-            wnd_height,
-            top_gap):
-        """
-        Generate height segments array
-        :param levels: Building levels count
-        :param level_height: level height, m
-        :param bottom_gap: bottom gap, m
-        :param wnd_height: wnd height,m
-        :param top_gap: top gap, m
-        :return: heights list
-        """
-        height_segs = []
-        total_ht = 0
-        for i in range(levels):
-            if i == 0:
-                height_segs.append(bottom_gap)
-            else:
-                height_segs.append(level_height - wnd_height)
-            total_ht += height_segs[-1]
-            height_segs.append(wnd_height)
-            total_ht += height_segs[-1]
-            if i == levels - 1:
-                height_segs.append(top_gap)
-                total_ht += height_segs[-1]
-        return height_segs, total_ht
-
-    @staticmethod
-    def generate_corner_vertices(bm, x, y, height_segs):
-        """
-        Generates vertices on building corner
-        :param bm: BMesh object to create vertices with
-        :param x: corner x coordinate
-        :param y: corner y coordinate
-        :param height_segs: height segments array generated by generate_height_segs method
-        :return: generated vertices list
-        """
-        z = 0
-        verts = [bm.verts.new((x, y, z))]
-        for seg_ht in height_segs:
-            z += seg_ht
-            verts.append(bm.verts.new((x, y, z)))
-        return verts
-
-    @staticmethod
-    def generate_wall(bm, wall_segs, start_corners, end_corners):
-        """
-        Generate wall geometry with extruding widows
-        :param bm: BMesh object to create geometry with
-        :param wall_segs:  wall segments lengths array (see generate_wall_segs)
-        :param start_corners: wall start corner vertices list, see generate_corner_vertices
-        :param end_corners: wall end corner vertices list, see generate_corner_vertices
-        :return: created top vertices list for generating roof based on them
-        """
-        w_segs = len(wall_segs)
-        norm = (end_corners[0].co - start_corners[0].co).normalized()
-
-        prev_start = start_corners[0]
-        prev_end = end_corners[0]
-        prev_vectors = []
-        extruded_faces = []
-        wall_segs_cnt = len(wall_segs)
-        i = 0
-        for vec_start, vec_end in zip(start_corners[1:], end_corners[1:]):
-            l = 0
-            new_vectors = []
-            prev_v1 = vec_start
-            prev_v2 = prev_start
-            for j, w in enumerate(wall_segs):
-                l += w
-                co = vec_start.co
-                v1 = vec_end
-                v2 = prev_end
-                if j < wall_segs_cnt - 1:
-                    v1 = bm.verts.new(
-                        (co[0] + l * norm[0], co[1] + l * norm[1], co[2]))
-                    new_vectors.append(v1)
-                    v2 = prev_vectors[j] if len(prev_vectors) > 0 else bm.verts.new(
-                        (co[0] + l * norm[0], co[1] + l * norm[1], norm[2]))
-                new_face = bm.faces.new((v1, v2, prev_v2, prev_v1))
-                if i % 2 == 1 and j % 2 == 1:
-                    extruded_faces.append(new_face)
-                prev_v1 = v1
-                prev_v2 = v2
-            prev_vectors = new_vectors
-            prev_start = vec_start
-            prev_end = vec_end
-            i += 1
-        bm.normal_update()
-        bmesh.ops.inset_individual(bm, faces=extruded_faces, depth=-0.2)
-        return prev_vectors
-
     def action_common(self, context):
         gap = bpy.context.scene.building_props.gap_prop
         top_gap = bpy.context.scene.building_props.top_gap_prop
@@ -322,12 +200,6 @@ class MakeBuilding(bpy.types.Operator):
         :param wnd_height: window height, m
         :param wnd_width: window width, m
         """
-        cols_x = MakeBuilding.generate_wall_segs(
-            length_x, wnd_width, interval_width, gap)
-        cols_y = MakeBuilding.generate_wall_segs(
-            length_y, wnd_width, interval_width, gap)
-        height_segs, total_ht = MakeBuilding.generate_height_segs(
-            levels, level_height, bottom_gap, wnd_height, top_gap)
         mesh = bpy.data.meshes.new("mesh")  # add a new mesh
         # add a new object using the mesh
         obj = bpy.data.objects.new("Building", mesh)
@@ -335,31 +207,20 @@ class MakeBuilding(bpy.types.Operator):
         scene.objects.link(obj)  # put the object into the scene (link)
         scene.objects.active = obj  # set as the active object in the scene
         obj.select = True  # select object
-        mesh = bpy.context.object.data
-        bm = bmesh.new()
-        delta_x = cursor_x - length_x / 2
-        delta_y = cursor_y - length_y / 2
-        corners00 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x, delta_y, height_segs)
-        corners10 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x + length_x, delta_y, height_segs)
-        corners01 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x, delta_y + length_y, height_segs)
-        corners11 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x + length_x, delta_y + length_y, height_segs)
-        vecs1 = MakeBuilding.generate_wall(bm, cols_y, corners00, corners01)
-        vecs2 = MakeBuilding.generate_wall(bm, cols_x, corners01, corners11)
-        vecs3 = MakeBuilding.generate_wall(bm, cols_y, corners11, corners10)
-        vecs4 = MakeBuilding.generate_wall(bm, cols_x, corners10, corners00)
-        vecs = list(OrderedDict.fromkeys([corners00[-1]] + vecs1 + [corners01[-1]] + vecs2 + [corners11[-1]]  + vecs3 + [corners10[-1]] + vecs4))
-
-        if len(vecs) > 2:
-            bm.faces.new(vecs)
-
-        bm.normal_update()
-        bm.to_mesh(mesh)
-        bm.free()
-        mesh.update()
+        buffers = building_kernel.generate_building(
+            cursor_x,
+            cursor_y,
+            length_x,
+            length_y,
+            level_height,
+            levels,
+            bottom_gap,
+            gap,
+            top_gap,
+            interval_width,
+            wnd_height,
+            wnd_width)
+        buffers.to_mesh(mesh)
 
     # end action_common
 
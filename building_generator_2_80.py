@@ -35,21 +35,1063 @@ bl_info = {
 }
 
 import math
+import sys
+import time
 import bpy
+import numpy as np
 import mathutils
 import bmesh
-from collections import OrderedDict
 from mathutils import Vector
-from bpy.types import Operator, PropertyGroup, Object, Panel
-from bpy.props import StringProperty, FloatProperty, BoolProperty, IntProperty
+from bpy.app.handlers import persistent
+from bpy.types import Operator, PropertyGroup, Object, Panel, Scene
+from bpy.props import StringProperty, FloatProperty, BoolProperty, IntProperty, EnumProperty, FloatVectorProperty, \
+    IntVectorProperty
 from bpy.utils import register_class, unregister_class
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
+import building_kernel
 
-def on_property_update(_, context):
-    if context.object is not None:
-        props = context.object.building_props
-        location = context.object.location
-        MakeBuilding.generate_from_props(location.x, location.y, props)
+# Geometry of recently generated building archetypes, shared by all generation paths
+GEOMETRY_CACHE = building_kernel.GeometryCache(maxsize=256)
+
+# Generation stages stats, collected while profiling is enabled
+PROFILER = building_kernel.Profiler()
+
+
+def clear_mesh(mesh):
+    """
+    Removes all mesh geometry, so it could be filled again with MeshBuffers.to_mesh
+    :param mesh: mesh datablock to clear
+    """
+    if hasattr(mesh, "clear_geometry"):
+        mesh.clear_geometry()
+    else:
+        bm = bmesh.new()
+        bm.to_mesh(mesh)
+        bm.free()
+
+
+def get_building_materials():
+    """
+    Returns building materials in building_kernel material index order, see MATERIAL_NAMES.
+    Materials are created on first use, so they could be edited for all buildings at once
+    :return: materials list
+    """
+    materials = []
+    for index, material_name in enumerate(building_kernel.MATERIAL_NAMES):
+        name = "Building " + material_name
+        material = bpy.data.materials.get(name)
+        if material is None:
+            material = bpy.data.materials.new(name)
+            material.diffuse_color = building_kernel.MATERIAL_COLORS[index]
+        materials.append(material)
+    return materials
+
+
+def upload_buffers(buffers, mesh):
+    """
+    Writes MeshBuffers to an empty mesh, see MeshBuffers.to_mesh. Mesh without materials
+    gets building materials, so generated material indices pick them
+    :param buffers: MeshBuffers
+    :param mesh: target mesh datablock
+    """
+    buffers.to_mesh(mesh)
+    if buffers.material_indices is not None and not len(mesh.materials):
+        for material in get_building_materials():
+            mesh.materials.append(material)
+
+
+def store_props(props, params):
+    """
+    Stores parameters table row into building properties without triggering property updates
+    :param props: object building properties
+    :param params: building_kernel.BuildingParams
+    """
+    for field, value in zip(params._fields[2:], params[2:]):
+        props[field + "_prop"] = value
+
+
+def make_buildings(params_list, collection, share_meshes=True, name="Building", meshes=None):
+    """
+    Creates building objects from parameters table rows, generated around object origins.
+    Objects are only linked to the collection - active object and selection are left untouched
+    and scene is not updated per building
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param share_meshes: buildings with the same parameters share single mesh datablock
+    :param name: created objects name
+    :param meshes: shared meshes by building_kernel.archetype_key, kept between calls if given
+    :return: created objects list
+    """
+    objects = []
+    if meshes is None:
+        meshes = {}
+    for params in params_list:
+        key = building_kernel.archetype_key(params)
+        mesh = meshes.get(key)
+        if mesh is None:
+            mesh = bpy.data.meshes.new(name)
+            upload_buffers(GEOMETRY_CACHE.get(params), mesh)
+            if share_meshes:
+                meshes[key] = mesh
+        obj = bpy.data.objects.new(name, mesh)
+        obj.location = (params.location_x, params.location_y, 0.0)
+        store_props(obj.building_props, params)
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+
+def make_merged_buildings(params_list, collection, chunk_size=1000, name="Buildings", first_id=0):
+    """
+    Creates buildings from parameters table rows merged into shared meshes, one object per chunk.
+    Every face keeps index of its table row in building_kernel.BUILDING_ID face attribute
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param chunk_size: max buildings count per mesh
+    :param name: created objects name
+    :param first_id: building id of the first row, when the table is generated in parts
+    :return: created objects list
+    """
+    objects = []
+    for start in range(0, len(params_list), chunk_size):
+        chunk = params_list[start:start + chunk_size]
+        buffers = building_kernel.merge_buffers(
+            [GEOMETRY_CACHE.generate(params) for params in chunk],
+            range(first_id + start, first_id + start + len(chunk)))
+        mesh = bpy.data.meshes.new(name)
+        upload_buffers(buffers, mesh)
+        obj = bpy.data.objects.new(name, mesh)
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+
+def make_parallel_buildings(params_list, collection, processes=None, chunk_size=1000, name="Buildings"):
+    """
+    Same as make_merged_buildings, but geometry is generated by worker processes on all cores.
+    Blender main thread only uploads ready chunk buffers to meshes
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param processes: worker processes count, CPU count if None
+    :param chunk_size: max buildings count per mesh
+    :param name: created objects name
+    :return: created objects list
+    """
+    return list(iter_parallel_buildings(params_list, collection, processes, chunk_size, name))
+
+
+def iter_parallel_buildings(params_list, collection, processes=None, chunk_size=1000, name="Buildings"):
+    """
+    Generator version of make_parallel_buildings, object is created as soon as its chunk is ready.
+    Closing the generator stops worker processes
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param processes: worker processes count, CPU count if None
+    :param chunk_size: max buildings count per mesh
+    :param name: created objects name
+    :return: created objects generator
+    """
+    # Blender before 2.91 reports its own binary as sys.executable
+    executable = getattr(bpy.app, "binary_path_python", None) or sys.executable
+    for buffers in building_kernel.generate_parallel(params_list, processes, chunk_size, executable):
+        mesh = bpy.data.meshes.new(name)
+        upload_buffers(buffers, mesh)
+        obj = bpy.data.objects.new(name, mesh)
+        collection.objects.link(obj)
+        yield obj
+
+
+def get_tile_collection(parent, tile, tile_size):
+    """
+    Returns child collection of a grid cell, creating it on first use.
+    Collection keeps its tile index and grid cell size in "building_tile" and "building_tile_size"
+    custom properties, so grids of different cell size get different collections
+    :param parent: parent collection
+    :param tile: (column, row) tile index, see building_kernel.tile_index
+    :param tile_size: grid cell size, m
+    :return: tile collection
+    """
+    for child in parent.children:
+        if list(child.get("building_tile", ())) == list(tile) and child.get("building_tile_size") == tile_size:
+            return child
+    tile_collection = bpy.data.collections.new("Buildings Tile {:g} m {} {}".format(tile_size, *tile))
+    tile_collection["building_tile"] = list(tile)
+    tile_collection["building_tile_size"] = tile_size
+    parent.children.link(tile_collection)
+    return tile_collection
+
+
+def write_merged_tile(obj):
+    """
+    Generates merged tile mesh from buildings parameters kept in its object
+    "building_params" and "building_ids" custom properties
+    :param obj: merged tile object
+    """
+    params_list = building_kernel.params_from_array(
+        np.reshape(list(obj["building_params"]), (-1, len(building_kernel.BuildingParams._fields))))
+    buffers = building_kernel.merge_buffers(
+        [GEOMETRY_CACHE.generate(params) for params in params_list], list(obj["building_ids"]))
+    clear_mesh(obj.data)
+    upload_buffers(buffers, obj.data)
+
+
+def make_tiled_buildings(params_list, collection, tile_size, merged=False, share_meshes=True, name="Building"):
+    """
+    Creates buildings in a child collection per grid cell, so tiles could be excluded,
+    hidden or regenerated separately
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: parent collection of tile collections
+    :param tile_size: grid cell size, m
+    :param merged: merge every tile into single mesh, building_id face attribute keeps table row
+    :param share_meshes: buildings with the same parameters share single mesh, see make_buildings
+    :param name: created objects name
+    :return: tile collections list
+    """
+    return [make_tile_buildings(params_list, collection, tile, indices, tile_size, merged, share_meshes, name)
+            for tile, indices in building_kernel.group_by_tile(params_list, tile_size)]
+
+
+def make_tile_buildings(params_list, collection, tile, indices, tile_size, merged=False, share_meshes=True,
+                        name="Building", meshes=None):
+    """
+    Creates buildings of a single tile, see make_tiled_buildings
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: parent collection of tile collections
+    :param tile: (column, row) tile index
+    :param indices: table rows of the tile buildings
+    :param tile_size: grid cell size, m
+    :param merged: merge tile into single mesh
+    :param share_meshes: buildings with the same parameters share single mesh
+    :param name: created objects name
+    :param meshes: shared meshes by archetype, see make_buildings
+    :return: tile collection
+    """
+    tile_collection = get_tile_collection(collection, tile, tile_size)
+    tile_params = [params_list[index] for index in indices.tolist()]
+    if merged:
+        obj = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+        obj["building_params"] = np.array(tile_params, dtype=np.float64).ravel().tolist()
+        obj["building_ids"] = indices.tolist()
+        write_merged_tile(obj)
+        tile_collection.objects.link(obj)
+    else:
+        make_buildings(tile_params, tile_collection, share_meshes, name, meshes)
+    return tile_collection
+
+
+# Batch generation: buildings per step and max time between interface updates, seconds
+BATCH_STEP = 100
+BATCH_TIME_SLICE = 0.05
+
+
+def generate_batch(params_list, collection, output_mode="OBJECTS", chunk_size=1000, share_meshes=True,
+                   tile_size=0.0, use_processes=False):
+    """
+    Creates buildings from parameters table in small steps, so generation could be time-sliced
+    and cancelled between them. Result is the same as generating the whole table at once
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param output_mode: "OBJECTS", "MERGED", "INSTANCED" or "LOD", see MakeBuildingBatch
+    :param chunk_size: max buildings count per merged mesh
+    :param share_meshes: buildings with the same parameters share single mesh
+    :param tile_size: grid cell size of tile collections, no tiling for 0
+    :param use_processes: generate merged output in worker processes, a step per chunk
+    :return: generator of created buildings count after every step
+    """
+    meshes = {}
+    if tile_size > 0 and output_mode in ("OBJECTS", "MERGED"):
+        done = 0
+        for tile, indices in building_kernel.group_by_tile(params_list, tile_size):
+            # Merged tile is a single mesh, so it's a single step
+            step = len(indices) if output_mode == "MERGED" else BATCH_STEP
+            for start in range(0, len(indices), step):
+                make_tile_buildings(params_list, collection, tile, indices[start:start + step], tile_size,
+                                    output_mode == "MERGED", share_meshes, meshes=meshes)
+                done += len(indices[start:start + step])
+                yield done
+        return
+    if output_mode == "MERGED" and use_processes:
+        for index, _ in enumerate(iter_parallel_buildings(params_list, collection, chunk_size=chunk_size)):
+            yield min((index + 1) * chunk_size, len(params_list))
+        return
+    step = chunk_size if output_mode == "MERGED" else BATCH_STEP
+    for start in range(0, len(params_list), step):
+        chunk = params_list[start:start + step]
+        if output_mode == "MERGED":
+            make_merged_buildings(chunk, collection, chunk_size, first_id=start)
+        elif output_mode == "INSTANCED":
+            make_instanced_buildings(chunk, collection)
+        elif output_mode == "LOD":
+            make_lod_buildings(chunk, collection)
+        else:
+            make_buildings(chunk, collection, share_meshes, meshes=meshes)
+        yield start + len(chunk)
+    if output_mode == "LOD":
+        update_lods(bpy.context.scene)
+
+
+def regenerate_tile(tile_collection):
+    """
+    Regenerates buildings of a single tile, the rest of the scene isn't touched
+    :param tile_collection: tile collection, see make_tiled_buildings
+    """
+    for obj in tile_collection.objects:
+        if "building_params" in obj:
+            write_merged_tile(obj)
+        elif obj.type == "MESH" and not is_building_output(obj):
+            try:
+                MakeBuilding.generate_from_props(obj.data, obj.building_props)
+            except ValueError:
+                pass  # invalid building keeps its geometry, problem is shown in its panel
+
+
+def select_merged_building(obj, building_id):
+    """
+    Selects faces, edges and vertices of a single building in merged mesh, deselects the rest
+    :param obj: merged buildings object
+    :param building_id: building id to select
+    """
+    mesh = obj.data
+    buffers = building_kernel.MeshBuffers.from_mesh(mesh, (building_kernel.BUILDING_ID,))
+    face_mask = buffers.face_attributes[building_kernel.BUILDING_ID] == building_id
+    vert_mask = np.zeros(len(mesh.vertices), dtype=bool)
+    vert_mask[buffers.loops[np.repeat(face_mask, buffers.loop_totals)]] = True
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    mesh.vertices.foreach_set("select", vert_mask)
+    mesh.edges.foreach_set("select", vert_mask[edge_verts].reshape(-1, 2).all(axis=1))
+    mesh.polygons.foreach_set("select", face_mask)
+    mesh.update()
+
+
+def regenerate_merged_building(obj, building_id, params):
+    """
+    Regenerates single building of merged mesh, other buildings geometry is kept as is
+    :param obj: merged buildings object
+    :param building_id: building id to regenerate
+    :param params: new building_kernel.BuildingParams
+    """
+    mesh = obj.data
+    buffers = building_kernel.MeshBuffers.from_mesh(mesh, (building_kernel.BUILDING_ID,))
+    buffers = building_kernel.replace_building(
+        buffers, building_id, GEOMETRY_CACHE.generate(params))
+    clear_mesh(mesh)
+    upload_buffers(buffers, mesh)
+
+
+MODULE_NAMES = {
+    building_kernel.WALL_MODULE: "Building Module 0 Wall",
+    building_kernel.WINDOW_MODULE: "Building Module 1 Window",
+}
+
+
+# Window depth of the default window module
+MODULE_WND_DEPTH = 0.2
+
+
+def add_module(modules, name, buffers):
+    """
+    Adds module to modules collection as a child collection with single object
+    :param modules: modules collection
+    :param name: module name
+    :param buffers: module MeshBuffers
+    :return: module child collection, its index in modules children is module index
+    """
+    mesh = bpy.data.meshes.new(name)
+    upload_buffers(buffers, mesh)
+    child = bpy.data.collections.new(name)
+    child.objects.link(bpy.data.objects.new(name, mesh))
+    modules.children.link(child)
+    return child
+
+
+def get_module_collection():
+    """
+    Returns collection of shared facade modules, each module in its own child collection.
+    Collection is created on first use and isn't linked to the scene
+    :return: modules collection
+    """
+    modules = bpy.data.collections.get("Building Modules")
+    if modules is None:
+        modules = bpy.data.collections.new("Building Modules")
+        modules.use_fake_user = True
+        add_module(modules, MODULE_NAMES[building_kernel.WALL_MODULE], building_kernel.generate_wall_module())
+        add_module(modules, MODULE_NAMES[building_kernel.WINDOW_MODULE],
+                   building_kernel.generate_window_module(MODULE_WND_DEPTH))["building_wnd_depth"] = MODULE_WND_DEPTH
+    return modules
+
+
+def get_window_module(modules, wnd_depth):
+    """
+    Returns window module of given depth, module is added to modules collection on first use
+    :param modules: modules collection, see get_module_collection
+    :param wnd_depth: window pane depth into the wall, m
+    :return: module index
+    """
+    wnd_depth = round(float(wnd_depth), 4)
+    for index, child in enumerate(modules.children):
+        if child.get("building_wnd_depth") == wnd_depth:
+            return index
+    index = len(modules.children)
+    name = "Building Module {} Window {:.2f}".format(index, wnd_depth)
+    add_module(modules, name, building_kernel.generate_window_module(wnd_depth))["building_wnd_depth"] = wnd_depth
+    return index
+
+
+def get_instances_node_group(modules):
+    """
+    Returns geometry nodes group instancing modules on points with "bay" attribute,
+    using their "module", "rotation" and "scale" attributes. Group is created on first use
+    :param modules: modules collection, see get_module_collection
+    :return: node group
+    """
+    group = bpy.data.node_groups.get("Building Instances")
+    if group is not None:
+        return group
+    group = bpy.data.node_groups.new("Building Instances", "GeometryNodeTree")
+    new_group_socket(group, "INPUT", "NodeSocketGeometry", "Geometry")
+    new_group_socket(group, "OUTPUT", "NodeSocketGeometry", "Geometry")
+    nodes = group.nodes
+    links = group.links
+
+    def named_attribute(name, data_type):
+        node = nodes.new("GeometryNodeInputNamedAttribute")
+        node.data_type = data_type
+        node.inputs["Name"].default_value = name
+        # Older versions have an output per data type, all named "Attribute"
+        return next(socket for socket in node.outputs if socket.enabled and socket.name == "Attribute")
+
+    group_input = nodes.new("NodeGroupInput")
+    group_output = nodes.new("NodeGroupOutput")
+    info = nodes.new("GeometryNodeCollectionInfo")
+    info.inputs["Collection"].default_value = modules
+    info.inputs["Separate Children"].default_value = True
+    info.inputs["Reset Children"].default_value = True
+    instance = nodes.new("GeometryNodeInstanceOnPoints")
+    instance.inputs["Pick Instance"].default_value = True
+    join = nodes.new("GeometryNodeJoinGeometry")
+
+    links.new(group_input.outputs[0], instance.inputs["Points"])
+    links.new(info.outputs[0], instance.inputs["Instance"])
+    links.new(named_attribute("bay", "BOOLEAN"), instance.inputs["Selection"])
+    links.new(named_attribute("module", "INT"), instance.inputs["Instance Index"])
+    links.new(named_attribute("rotation", "FLOAT_VECTOR"), instance.inputs["Rotation"])
+    links.new(named_attribute("scale", "FLOAT_VECTOR"), instance.inputs["Scale"])
+    links.new(instance.outputs[0], join.inputs[0])
+    links.new(group_input.outputs[0], join.inputs[0])
+    links.new(join.outputs[0], group_output.inputs[0])
+    return group
+
+
+# Geometry nodes backend: group inputs and building properties driving them
+NODES_BACKEND = bpy.app.version >= (3, 1, 0)
+NODES_MODIFIER = "Building Generator"
+NODE_INPUTS = (
+    ("Size X", "NodeSocketFloat", "size_x_prop"),
+    ("Size Y", "NodeSocketFloat", "size_y_prop"),
+    ("Level Count", "NodeSocketInt", "level_count_prop"),
+    ("Level Height", "NodeSocketFloat", "level_height_prop"),
+    ("Window Width", "NodeSocketFloat", "wnd_width_prop"),
+    ("Window Height", "NodeSocketFloat", "wnd_height_prop"),
+    ("Interval Width", "NodeSocketFloat", "interval_width_prop"),
+    ("Gap", "NodeSocketFloat", "gap_prop"),
+    ("Top Gap", "NodeSocketFloat", "top_gap_prop"),
+    ("Bottom Gap", "NodeSocketFloat", "bottom_gap_prop"),
+    ("Window Depth", "NodeSocketFloat", "wnd_depth_prop"),
+)
+# Wall group inputs, Length is size of the wall's side
+WALL_NODE_INPUTS = (("Length", "NodeSocketFloat", None),) + NODE_INPUTS[2:]
+
+
+def new_group_socket(group, in_out, socket_type, name):
+    """
+    Adds node group input or output socket, Blender 4.0+ and older API
+    :param group: node group
+    :param in_out: "INPUT" or "OUTPUT"
+    :param socket_type: socket type name, e.g. "NodeSocketFloat"
+    :param name: socket name
+    :return: created interface socket
+    """
+    if hasattr(group, "interface"):
+        return group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    return (group.inputs if in_out == "INPUT" else group.outputs).new(socket_type, name)
+
+
+def group_input_identifiers(group):
+    """
+    :param group: node group
+    :return: identifiers of group input sockets, in order
+    """
+    if hasattr(group, "interface"):
+        return [item.identifier for item in group.interface.items_tree
+                if item.item_type == "SOCKET" and item.in_out == "INPUT"]
+    return [socket.identifier for socket in group.inputs]
+
+
+def _node_math(nodes, links):
+    """
+    :return: function adding math node, its operands are sockets or numbers
+    """
+    def math_node(operation, *operands):
+        node = nodes.new("ShaderNodeMath")
+        node.operation = operation
+        for socket, operand in zip(node.inputs, operands):
+            if isinstance(operand, (int, float)):
+                socket.default_value = operand
+            else:
+                links.new(operand, socket)
+        return node.outputs[0]
+    return math_node
+
+
+def _add_node_inputs(group, inputs):
+    new_group_socket(group, "INPUT", "NodeSocketGeometry", "Geometry")
+    for socket_name, socket_type, _ in inputs:
+        new_group_socket(group, "INPUT", socket_type, socket_name)
+    new_group_socket(group, "OUTPUT", "NodeSocketGeometry", "Geometry")
+
+
+def get_wall_node_group():
+    """
+    Returns geometry nodes group generating a wall of Length along X axis from origin,
+    facing -Y, with the same layout as building_kernel.layout_walls. Wall is a grid of
+    window columns and level rows, window cells are extruded into the wall
+    :return: node group
+    """
+    group = bpy.data.node_groups.get("Building Wall")
+    if group is not None:
+        return group
+    group = bpy.data.node_groups.new("Building Wall", "GeometryNodeTree")
+    _add_node_inputs(group, WALL_NODE_INPUTS)
+    nodes = group.nodes
+    links = group.links
+    math_node = _node_math(nodes, links)
+    inputs = nodes.new("NodeGroupInput").outputs
+    length = inputs["Length"]
+    wnd_width = inputs["Window Width"]
+    interval = inputs["Interval Width"]
+    levels = inputs["Level Count"]
+    wnd_height = inputs["Window Height"]
+    bottom_gap = inputs["Bottom Gap"]
+
+    # Window count in closed form, see building_kernel.window_counts
+    free = math_node("SUBTRACT", length, math_node("MULTIPLY", inputs["Gap"], 2.0))
+    spare = math_node("ADD", math_node("SUBTRACT", free, wnd_width), 1e-9)
+    fits = math_node("GREATER_THAN", spare, 0.0)
+    count = math_node("MULTIPLY", fits, math_node("ADD", math_node("FLOOR", math_node(
+        "DIVIDE", spare, math_node("ADD", wnd_width, interval))), 1.0))
+    real_gap = math_node("MULTIPLY", math_node("SUBTRACT", length, math_node("ADD", math_node(
+        "MULTIPLY", count, wnd_width), math_node("MULTIPLY", math_node("SUBTRACT", count, 1.0), interval))), 0.5)
+    pier = math_node("SUBTRACT", inputs["Level Height"], wnd_height)
+    height = math_node("ADD", math_node("ADD", bottom_gap, inputs["Top Gap"]), math_node("ADD", math_node(
+        "MULTIPLY", levels, wnd_height), math_node("MULTIPLY", math_node("SUBTRACT", levels, 1.0), pier)))
+
+    # Unit spaced grid, a column per window edge and a row per level edge
+    columns = math_node("ADD", math_node("MULTIPLY", count, 2.0), 2.0)
+    rows = math_node("ADD", math_node("MULTIPLY", levels, 2.0), 2.0)
+    grid = nodes.new("GeometryNodeMeshGrid")
+    links.new(math_node("SUBTRACT", columns, 1.0), grid.inputs["Size X"])
+    links.new(math_node("SUBTRACT", rows, 1.0), grid.inputs["Size Y"])
+    links.new(columns, grid.inputs["Vertices X"])
+    links.new(rows, grid.inputs["Vertices Y"])
+    position = nodes.new("ShaderNodeSeparateXYZ")
+    links.new(nodes.new("GeometryNodeInputPosition").outputs[0], position.inputs[0])
+    column = math_node("ADD", position.outputs["X"], math_node("MULTIPLY", math_node("SUBTRACT", columns, 1.0), 0.5))
+    row = math_node("ADD", position.outputs["Y"], math_node("MULTIPLY", math_node("SUBTRACT", rows, 1.0), 0.5))
+
+    # Evaluated on faces, position is face center, so floor gives cell index; odd cells are windows
+    extrude = nodes.new("GeometryNodeExtrudeMesh")
+    extrude.mode = "FACES"
+    extrude.inputs["Individual"].default_value = True
+    links.new(grid.outputs[0], extrude.inputs["Mesh"])
+    links.new(math_node("MULTIPLY", math_node("MODULO", math_node("FLOOR", column), 2.0),
+                        math_node("MODULO", math_node("FLOOR", row), 2.0)), extrude.inputs["Selection"])
+    links.new(math_node("MULTIPLY", inputs["Window Depth"], -1.0), extrude.inputs["Offset Scale"])
+
+    def edge_position(index, last, start, size, spacing, end):
+        # start + floor(i / 2) * size + floor((i - 1) / 2) * spacing, 0 for the first and end for the last edge
+        position = math_node("ADD", start, math_node("ADD", math_node(
+            "MULTIPLY", math_node("FLOOR", math_node("MULTIPLY", index, 0.5)), size), math_node(
+            "MULTIPLY", math_node("FLOOR", math_node("MULTIPLY", math_node("SUBTRACT", index, 1.0), 0.5)), spacing)))
+        position = math_node("MULTIPLY", position, math_node("GREATER_THAN", index, 0.5))
+        is_last = math_node("GREATER_THAN", index, math_node("SUBTRACT", last, 1.5))
+        return math_node("ADD", position, math_node("MULTIPLY", math_node("SUBTRACT", end, position), is_last))
+
+    # Grid X, Y map to wall X, Z; extruded panes go from -Z to +Y, into the wall
+    wall_position = nodes.new("ShaderNodeCombineXYZ")
+    links.new(edge_position(math_node("ROUND", column), columns, real_gap, wnd_width, interval, length),
+              wall_position.inputs["X"])
+    links.new(math_node("MULTIPLY", position.outputs["Z"], -1.0), wall_position.inputs["Y"])
+    links.new(edge_position(math_node("ROUND", row), rows, bottom_gap, wnd_height, pier, height),
+              wall_position.inputs["Z"])
+    set_position = nodes.new("GeometryNodeSetPosition")
+    links.new(extrude.outputs["Mesh"], set_position.inputs["Geometry"])
+    links.new(wall_position.outputs[0], set_position.inputs["Position"])
+    links.new(set_position.outputs[0], nodes.new("NodeGroupOutput").inputs[0])
+    return group
+
+
+def get_building_node_group():
+    """
+    Returns geometry nodes group generating rectangular building with flat roof from its
+    inputs, see NODE_INPUTS. Group is created on first use, building edits only change
+    modifier inputs and geometry is evaluated natively
+    :return: node group
+    """
+    group = bpy.data.node_groups.get("Building Generator")
+    if group is not None:
+        return group
+    wall = get_wall_node_group()
+    group = bpy.data.node_groups.new("Building Generator", "GeometryNodeTree")
+    _add_node_inputs(group, NODE_INPUTS)
+    nodes = group.nodes
+    links = group.links
+    math_node = _node_math(nodes, links)
+    inputs = nodes.new("NodeGroupInput").outputs
+    half_x = math_node("MULTIPLY", inputs["Size X"], 0.5)
+    half_y = math_node("MULTIPLY", inputs["Size Y"], 0.5)
+    join = nodes.new("GeometryNodeJoinGeometry")
+
+    def transformed(geometry, x, y, z, angle):
+        transform = nodes.new("GeometryNodeTransform")
+        translation = nodes.new("ShaderNodeCombineXYZ")
+        for socket, value in zip(translation.inputs, (x, y, z)):
+            if isinstance(value, float):
+                socket.default_value = value
+            else:
+                links.new(value, socket)
+        links.new(geometry, transform.inputs["Geometry"])
+        links.new(translation.outputs[0], transform.inputs["Translation"])
+        transform.inputs["Rotation"].default_value = (0.0, 0.0, angle)
+        links.new(transform.outputs[0], join.inputs[0])
+
+    # Walls go clockwise around the building, each faces outwards
+    minus_x = math_node("MULTIPLY", half_x, -1.0)
+    minus_y = math_node("MULTIPLY", half_y, -1.0)
+    for size, x, y, angle in (("Size X", minus_x, minus_y, 0.0), ("Size Y", half_x, minus_y, math.pi / 2),
+                              ("Size X", half_x, half_y, math.pi), ("Size Y", minus_x, half_y, math.pi * 1.5)):
+        wall_node = nodes.new("GeometryNodeGroup")
+        wall_node.node_tree = wall
+        links.new(inputs[size], wall_node.inputs["Length"])
+        for socket_name, _, _ in WALL_NODE_INPUTS[1:]:
+            links.new(inputs[socket_name], wall_node.inputs[socket_name])
+        transformed(wall_node.outputs[0], x, y, 0.0, angle)
+
+    # Flat roof at walls height
+    levels = inputs["Level Count"]
+    height = math_node("ADD", math_node("ADD", inputs["Bottom Gap"], inputs["Top Gap"]), math_node(
+        "ADD", math_node("MULTIPLY", math_node("SUBTRACT", levels, 1.0), inputs["Level Height"]), inputs["Window Height"]))
+    roof = nodes.new("GeometryNodeMeshGrid")
+    links.new(inputs["Size X"], roof.inputs["Size X"])
+    links.new(inputs["Size Y"], roof.inputs["Size Y"])
+    roof.inputs["Vertices X"].default_value = 2
+    roof.inputs["Vertices Y"].default_value = 2
+    transformed(roof.outputs[0], 0.0, 0.0, height, 0.0)
+
+    # Walls share corner columns with each other and top edges with roof
+    merge = nodes.new("GeometryNodeMergeByDistance")
+    merge.inputs["Distance"].default_value = 1e-4
+    links.new(join.outputs[0], merge.inputs["Geometry"])
+    links.new(merge.outputs[0], nodes.new("NodeGroupOutput").inputs[0])
+    return group
+
+
+def apply_nodes_backend(obj):
+    """
+    Makes object a geometry nodes building driven by its building properties.
+    Mesh is emptied, modifier is added on first use and its inputs are updated
+    :param obj: building object
+    """
+    mesh = obj.data
+    if mesh.users > 1:
+        # Mesh is shared with other buildings of the same archetype
+        obj.data = mesh = bpy.data.meshes.new(mesh.name)
+    elif len(mesh.vertices):
+        clear_mesh(mesh)
+        mesh.pop("building_topology", None)
+    modifier = obj.modifiers.get(NODES_MODIFIER)
+    if modifier is None:
+        modifier = obj.modifiers.new(NODES_MODIFIER, "NODES")
+        modifier.node_group = get_building_node_group()
+    props = obj.building_props
+    # First input is the ignored geometry
+    for identifier, (_, socket_type, prop_name) in zip(
+            group_input_identifiers(modifier.node_group)[1:], NODE_INPUTS):
+        value = getattr(props, prop_name)
+        modifier[identifier] = int(value) if socket_type == "NodeSocketInt" else float(value)
+    obj.update_tag()
+
+
+def make_instanced_buildings(params_list, collection, name="Building"):
+    """
+    Creates buildings with facades made of shared window/wall module instances.
+    Object mesh holds only roof and a point per facade cell; cells are instanced with
+    geometry nodes on Blender 3.2+ and with collection instance empties before
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param name: created objects name
+    :return: created building objects list
+    """
+    modules = get_module_collection()
+    use_nodes = bpy.app.version >= (3, 2, 0)
+    objects = []
+    for params in params_list:
+        layout, roof = building_kernel.generate_instanced_building(
+            params, with_location=False, window_module=get_window_module(modules, params.wnd_depth))
+        mesh = bpy.data.meshes.new(name)
+        if use_nodes:
+            points = len(roof.vertices)
+            upload_buffers(building_kernel.MeshBuffers(
+                np.concatenate((roof.vertices, layout.locations)), roof.loops, roof.loop_totals,
+                material_indices=roof.material_indices, uvs=roof.uvs), mesh)
+            rotations = np.zeros((len(layout), 3))
+            rotations[:, 2] = layout.rotations
+            for attr_name, data_type, key, values in (
+                    ("bay", "BOOLEAN", "value", np.arange(len(mesh.vertices)) >= points),
+                    ("module", "INT", "value", np.concatenate((np.zeros(points, dtype=np.int32), layout.modules))),
+                    ("rotation", "FLOAT_VECTOR", "vector", np.concatenate((np.zeros((points, 3)), rotations))),
+                    ("scale", "FLOAT_VECTOR", "vector", np.concatenate((np.ones((points, 3)), layout.scales)))):
+                if data_type == "FLOAT_VECTOR":
+                    values = values.astype(np.float32)
+                mesh.attributes.new(attr_name, data_type, "POINT").data.foreach_set(key, values.ravel())
+        else:
+            upload_buffers(roof, mesh)
+        obj = bpy.data.objects.new(name, mesh)
+        obj.location = (params.location_x, params.location_y, 0.0)
+        collection.objects.link(obj)
+        if use_nodes:
+            modifier = obj.modifiers.new("Building Instances", "NODES")
+            modifier.node_group = get_instances_node_group(modules)
+        else:
+            for matrix, module in zip(layout.matrices(), layout.modules):
+                bay = bpy.data.objects.new(name + " Bay", None)
+                bay.instance_type = "COLLECTION"
+                bay.instance_collection = modules.children[int(module)]
+                bay.parent = obj
+                bay.matrix_basis = mathutils.Matrix(matrix.tolist())
+                collection.objects.link(bay)
+        objects.append(obj)
+    return objects
+
+
+def write_building(mesh, buffers, topology):
+    """
+    Writes building geometry to mesh. If topology didn't change since previous write,
+    only vertex coordinates are updated in place, faces and edges are kept
+    :param mesh: target mesh datablock
+    :param buffers: building MeshBuffers
+    :param topology: building_kernel.topology_key of generated building
+    """
+    topology = list(topology)
+    previous = mesh.get("building_topology")
+    if previous is not None and list(previous) == topology and len(mesh.vertices) == len(buffers.vertices) \
+            and len(mesh.polygons) == len(buffers.loop_totals) and len(mesh.uv_layers) == int(buffers.uvs is not None):
+        with building_kernel.stage("coordinates update") as timer:
+            mesh.vertices.foreach_set("co", buffers.vertices.astype(np.float32).ravel())
+            if buffers.uvs is not None:
+                # UVs are projected from coordinates, faces and material indices are kept
+                mesh.uv_layers[0].data.foreach_set("uv", buffers.uvs.ravel())
+            mesh.update()
+            timer.items = len(buffers.vertices)
+    else:
+        clear_mesh(mesh)
+        upload_buffers(buffers, mesh)
+        mesh["building_topology"] = topology
+
+
+# Delay after the last property edit before building is regenerated, seconds
+REGENERATE_DELAY = 0.1
+
+# Names of objects with property edits waiting for regeneration
+_pending_objects = set()
+
+
+def regenerate_pending():
+    """
+    Timer callback regenerating all buildings edited since previous call
+    """
+    for name in _pending_objects:
+        obj = bpy.data.objects.get(name)
+        if obj is not None and obj.type == "MESH" and not is_building_output(obj):
+            try:
+                MakeBuilding.generate_from_props(obj.data, obj.building_props)
+            except ValueError:
+                pass  # invalid building keeps its geometry, problem is shown in its panel
+    _pending_objects.clear()
+    return None
+
+
+def make_lod_buildings(params_list, collection, name="Building"):
+    """
+    Creates every building in all levels of detail, an object per level with "building_lod"
+    custom property. Only LOD0 is visible until update_lods switches levels by camera distance
+    :param params_list: building_kernel.BuildingParams list
+    :param collection: collection to link created objects to
+    :param name: created objects name
+    :return: created objects list
+    """
+    objects = []
+    for params in params_list:
+        for lod in (building_kernel.LOD_FULL, building_kernel.LOD_FLAT_WINDOWS, building_kernel.LOD_BOX):
+            lod_params = params._replace(lod=lod)
+            mesh = bpy.data.meshes.new("{} LOD{}".format(name, lod))
+            upload_buffers(GEOMETRY_CACHE.get(lod_params), mesh)
+            obj = bpy.data.objects.new("{} LOD{}".format(name, lod), mesh)
+            obj.location = (params.location_x, params.location_y, 0.0)
+            obj["building_lod"] = lod
+            obj.hide_viewport = obj.hide_render = lod != building_kernel.LOD_FULL
+            store_props(obj.building_props, lod_params)
+            collection.objects.link(obj)
+            objects.append(obj)
+    return objects
+
+
+def update_lods(scene):
+    """
+    Shows single level of detail of every building generated by make_lod_buildings,
+    chosen by distance to scene camera and scene building_lod_distances
+    :param scene: scene to update
+    """
+    if scene.camera is None:
+        return
+    objects = [obj for obj in scene.objects if "building_lod" in obj]
+    if not objects:
+        return
+    locations = np.array([obj.matrix_world.translation for obj in objects])
+    distances = np.linalg.norm(locations - np.array(scene.camera.matrix_world.translation), axis=1)
+    visible_lods = np.searchsorted(np.array(scene.building_lod_distances), distances)
+    for obj, visible_lod in zip(objects, visible_lods.tolist()):
+        hidden = obj["building_lod"] != visible_lod
+        if obj.hide_viewport != hidden:
+            obj.hide_viewport = obj.hide_render = hidden
+
+
+@persistent
+def on_frame_change(scene, *_):
+    update_lods(scene)
+
+
+# Scene camera and its location at the last levels of detail update
+_lod_camera = None
+
+
+@persistent
+def on_depsgraph_update(scene, *_):
+    """
+    Updates levels of detail when scene camera is moved or switched, or LOD distances are edited.
+    Depsgraph updates caused by other edits don't touch LOD objects
+    """
+    global _lod_camera
+    camera = scene.camera
+    key = None if camera is None else (
+        camera.name, tuple(camera.matrix_world.translation), tuple(scene.building_lod_distances))
+    if key != _lod_camera:
+        _lod_camera = key
+        update_lods(scene)
+
+
+def mesh_footprint(obj):
+    """
+    Reads building footprint polygon from mesh object outline - its only face,
+    or a single closed loop of its edges
+    :param obj: mesh object
+    :return: footprint world space (x, y) points (N, 2) array
+    """
+    mesh = obj.data
+    if len(mesh.polygons) == 1:
+        indices = list(mesh.polygons[0].vertices)
+    else:
+        edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edges)
+        edges = edges.reshape(-1, 2).tolist()
+        neighbours = {}
+        for v1, v2 in edges:
+            neighbours.setdefault(v1, []).append(v2)
+            neighbours.setdefault(v2, []).append(v1)
+        if len(edges) < 3 or any(len(linked) != 2 for linked in neighbours.values()):
+            raise ValueError("mesh should be a single face or a single closed edge loop")
+        indices = list(edges[0])
+        while len(indices) < len(edges):
+            v1, v2 = neighbours[indices[-1]]
+            indices.append(v2 if v1 == indices[-2] else v1)
+            if indices[-1] == indices[0]:
+                raise ValueError("mesh has more than one edge loop")
+    matrix = obj.matrix_world
+    return np.array([(matrix @ mesh.vertices[index].co)[:2] for index in indices])
+
+
+def make_footprint_building(points, collection, params=None, name="Building"):
+    """
+    Creates building on given footprint polygon. Object origin is placed at footprint center,
+    footprint relative to it is kept in "building_footprint" custom property, so building
+    is regenerated on the same footprint after properties edits
+    :param points: footprint world space (x, y) points
+    :param collection: collection to link created object to
+    :param params: building_kernel.BuildingParams to store into building properties, location is ignored
+    :param name: created object name
+    :return: created object
+    """
+    points = np.asarray(points, dtype=np.float64)
+    center = points.mean(axis=0)
+    mesh = bpy.data.meshes.new(name)
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = (center[0], center[1], 0.0)
+    obj["building_footprint"] = (points - center).ravel().tolist()
+    if params is not None:
+        store_props(obj.building_props, params)
+    collection.objects.link(obj)
+    MakeBuilding.generate_from_props(mesh, obj.building_props)
+    return obj
+
+
+def import_footprints(reader, collection, merged=False, chunk_size=1000, window_manager=None, name="Building"):
+    """
+    Generates buildings from footprints reader chunk by chunk, so only one chunk
+    of records is held in memory
+    :param reader: building_kernel.FootprintReader
+    :param collection: collection to link created objects to
+    :param merged: merge every chunk into a single mesh, building_id face attribute keeps record index
+    :param chunk_size: records count per chunk
+    :param window_manager: window manager to report progress with, if any
+    :param name: created objects name
+    :return: generated buildings count
+    """
+    count = 0
+    if window_manager is not None:
+        window_manager.progress_begin(0, 100)
+    try:
+        for chunk in reader.chunks(chunk_size):
+            if merged:
+                buffers = building_kernel.merge_buffers(
+                    [GEOMETRY_CACHE.generate(params) if footprint is None
+                     else building_kernel.generate_from_params(params, footprint=footprint)
+                     for params, footprint in chunk],
+                    range(count, count + len(chunk)))
+                mesh = bpy.data.meshes.new(name)
+                upload_buffers(buffers, mesh)
+                collection.objects.link(bpy.data.objects.new(name, mesh))
+            else:
+                for params, footprint in chunk:
+                    if footprint is None:
+                        make_buildings([params], collection, name=name)
+                    else:
+                        make_footprint_building(
+                            footprint + (params.location_x, params.location_y), collection, params, name)
+            count += len(chunk)
+            if window_manager is not None:
+                window_manager.progress_update(int(reader.progress * 100))
+    finally:
+        if window_manager is not None:
+            window_manager.progress_end()
+    return count
+
+
+def props_params(obj):
+    """
+    Collects building parameters of an object
+    :param obj: building object
+    :return: building_kernel.BuildingParams
+    """
+    props = obj.building_props
+    return building_kernel.BuildingParams(
+        obj.location.x, obj.location.y,
+        *[getattr(props, field + "_prop") for field in building_kernel.BuildingParams._fields[2:]])
+
+
+def params_problems(params):
+    """
+    :param params: building_kernel.BuildingParams
+    :return: why parameters can't make valid building, see building_kernel.find_invalid; empty if they can
+    """
+    return "; ".join(message for _, message in building_kernel.find_invalid([params]))
+
+
+def save_archive(path, objects):
+    """
+    Saves buildings geometry and parameters to archive file, see building_kernel.write_archive
+    :param path: archive file path
+    :param objects: building objects, geometry is saved in object space
+    """
+    building_kernel.write_archive(
+        path,
+        [building_kernel.MeshBuffers.from_mesh(obj.data) for obj in objects],
+        [props_params(obj) for obj in objects])
+
+
+def load_archive(path, collection, merged=False, chunk_size=1000, name="Building"):
+    """
+    Creates buildings from archive file. Geometry is copied from memory mapped file
+    with bulk foreach_set calls, nothing is generated
+    :param path: archive file path
+    :param collection: collection to link created objects to
+    :param merged: merge buildings into shared meshes, see make_merged_buildings
+    :param chunk_size: max buildings count per merged mesh
+    :param name: created objects name
+    :return: created objects list
+    """
+    archive = building_kernel.Archive(path)
+    objects = []
+    if merged:
+        for start in range(0, len(archive), chunk_size):
+            mesh = bpy.data.meshes.new(name)
+            upload_buffers(archive.merged(start, min(start + chunk_size, len(archive))), mesh)
+            obj = bpy.data.objects.new(name, mesh)
+            collection.objects.link(obj)
+            objects.append(obj)
+        return objects
+    for index in range(len(archive)):
+        mesh = bpy.data.meshes.new(name)
+        upload_buffers(archive.building(index), mesh)
+        obj = bpy.data.objects.new(name, mesh)
+        params = archive.params(index)
+        if params is not None:
+            obj.location = (params.location_x, params.location_y, 0.0)
+            store_props(obj.building_props, params)
+        else:
+            # Geometry only, there are no parameters to regenerate it from
+            obj["building_archive"] = index
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+
+def is_building_output(obj):
+    """
+    Tells if object holds buildings that aren't generated from its building_props - merged, tiled,
+    instanced, levels of detail or archive geometry without parameters. Such objects
+    are not regenerated on property edits, merged ones are edited with regenerate_merged_building
+    :param obj: object
+    :return: True for generated output objects
+    """
+    if any(key in obj for key in ("building_params", "building_lod", "building_archive")):
+        return True
+    if "Building Instances" in obj.modifiers or any(child.instance_type == "COLLECTION" for child in obj.children):
+        return True
+    if obj.type != "MESH":
+        return False
+    attributes = obj.data.attributes if hasattr(obj.data, "attributes") else obj.data.polygon_layers_int
+    return building_kernel.BUILDING_ID in attributes
+
+
+def on_property_update(props, _):
+    obj = props.id_data  # edited object, not necessarily the active one
+    if obj.type == "MESH" and not is_building_output(obj):
+        if props.use_nodes_prop and NODES_MODIFIER in obj.modifiers:
+            # Only modifier inputs change, no need to coalesce edits
+            try:
+                MakeBuilding.generate_from_props(obj.data, props)
+            except ValueError:
+                pass  # problem is shown in building panel
+            return
+        if obj.data.users > 1:
+            # Mesh is shared with other buildings of the same archetype
+            obj.data = obj.data.copy()
+        # Coalesce edits, e.g. slider drag - building is regenerated once edits stop
+        _pending_objects.add(obj.name)
+        if bpy.app.timers.is_registered(regenerate_pending):
+            bpy.app.timers.unregister(regenerate_pending)
+        bpy.app.timers.register(regenerate_pending, first_interval=REGENERATE_DELAY)
 
 
 class MAKER_PT_Building(bpy.types.Panel):
@@ -70,6 +1112,15 @@ class MAKER_PT_Building(bpy.types.Panel):
 
             return
 
+        if is_building_output(obj):
+            # Merged, tiled, instanced and LOD buildings aren't regenerated from properties
+            layout.label(text="Generated buildings, not editable here")
+            col = layout.column(align=True)
+            col.operator("mesh.make_building", text="Add Building")
+            if any("building_tile" in collection for collection in obj.users_collection):
+                col.operator("mesh.building_regenerate_tile")
+            return
+
         props = obj.building_props
 
         col = self.layout.column(align=True)
@@ -88,13 +1139,73 @@ class MAKER_PT_Building(bpy.types.Panel):
         col.prop(props, 'gap_prop')
         col.prop(props, 'top_gap_prop')
         col.prop(props, 'bottom_gap_prop')
+        col.prop(props, 'wnd_depth_prop')
+        col.prop(props, 'wnd_frame_prop')
+        col.prop(props, 'lod_prop')
+        col.prop(props, 'roof_type_prop')
+        col.prop(props, 'roof_pitch_prop')
+        col.prop(props, 'bay_seed_prop')
+        col.prop(props, 'blank_bays_prop')
+        col.prop(props, 'balconies_prop')
+        col.prop(props, 'use_nodes_prop')
+
+        mesh = obj.data
+        layout.label(text="Vertices: {}  Faces: {}".format(len(mesh.vertices), len(mesh.polygons)))
+        if "building_error" in obj:
+            layout.label(text=obj["building_error"], icon="ERROR")
 
         col.operator("mesh.make_building", text="Add Building")
+        if any("building_tile" in collection for collection in obj.users_collection):
+            col.operator("mesh.building_regenerate_tile")
     # end draw
 
 
 # end MAKER_PT_Building
 
+
+class MAKER_PT_BuildingProfiling(bpy.types.Panel):
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Create"
+    bl_label = "Generation Profiling"
+    bl_parent_id = "MAKER_PT_Building"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        enabled = building_kernel.get_profiler() is not None
+
+        row = layout.row(align=True)
+        row.operator("mesh.building_profiling", text="Disable" if enabled else "Enable").action = \
+            "DISABLE" if enabled else "ENABLE"
+        row.operator("mesh.building_profiling", text="Reset").action = "RESET"
+
+        col = layout.column(align=True)
+        for name, calls, seconds, items in PROFILER.report():
+            col.label(text="{}: {:.2f} ms, {} calls, {} items".format(name, seconds * 1000, calls, items))
+    # end draw
+
+
+# end MAKER_PT_BuildingProfiling
+
+
+class MAKER_PT_BuildingLod(bpy.types.Panel):
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Create"
+    bl_label = "Levels of Detail"
+    bl_parent_id = "MAKER_PT_Building"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(context.scene, "building_lod_distances")
+        layout.operator("mesh.building_update_lod", text="Update")
+    # end draw
+
+
+# end MAKER_PT_BuildingLod
+
 # ------------------------------------------------------------------
 # Define property group class to create or modify
 # ------------------------------------------------------------------
@@ -124,26 +1235,80 @@ class MAKER_OT_Properties(PropertyGroup):
     wnd_width_prop: FloatProperty(
         name='Window width', min=0.1, default=1.46,
         description='Window width, meters',
+        update=on_property_update
     )
     wnd_height_prop: FloatProperty(
         name='Window height', min=0.1, default=1.46,
         description='Window height, meters',
+        update=on_property_update
     )
     interval_width_prop: FloatProperty(
         name='Interval width', min=0.1, default=1.5,
         description='Horizontal interval width, meters',
+        update=on_property_update
     )
     gap_prop: FloatProperty(
         name='Min horiz gap', min=0.1, default=3,
         description='Min left/right gap size , meters',
+        update=on_property_update
     )
     top_gap_prop: FloatProperty(
         name='Top gap', min=0.1, default=1,
         description='Top gap size , meters',
+        update=on_property_update
     )
     bottom_gap_prop: FloatProperty(
         name='Bottom gap', min=0.1, default=2.5,
         description='Bottom gap size , meters',
+        update=on_property_update
+    )
+    wnd_depth_prop: FloatProperty(
+        name='Window depth', min=0, default=0.2,
+        description='Window pane depth into the wall, meters',
+        subtype="DISTANCE", update=on_property_update
+    )
+    wnd_frame_prop: FloatProperty(
+        name='Window frame', min=0, max=0.5, default=0,
+        description='Window frame width, meters. No frame for 0, should be less than half window size',
+        subtype="DISTANCE", update=on_property_update
+    )
+    lod_prop: IntProperty(
+        name='Level of detail', min=0, max=2, default=0,
+        description='0 - recessed windows, 1 - flat window quads, 2 - plain box',
+        update=on_property_update
+    )
+    roof_type_prop: IntProperty(
+        name='Roof type', min=0, max=3, default=0,
+        description='0 - flat, 1 - gabled, 2 - hipped, 3 - pyramid. '
+                    'Gabled and hipped roofs need rectangular footprint',
+        update=on_property_update
+    )
+    roof_pitch_prop: FloatProperty(
+        name='Roof pitch', min=0, max=75, default=30,
+        description='Roof slope angle, degrees',
+        update=on_property_update
+    )
+    bay_seed_prop: IntProperty(
+        name='Bay seed', min=0, default=0,
+        description='Seed of blank and balcony window bays pattern',
+        update=on_property_update
+    )
+    blank_bays_prop: FloatProperty(
+        name='Blank bays', min=0, max=1, default=0,
+        description='Share of window bays left as plain wall',
+        subtype="FACTOR", update=on_property_update
+    )
+    balconies_prop: FloatProperty(
+        name='Balconies', min=0, max=1, default=0,
+        description='Share of window bays with a balcony',
+        subtype="FACTOR", update=on_property_update
+    )
+    use_nodes_prop: BoolProperty(
+        name='Geometry Nodes', default=False,
+        description='Generate building with geometry nodes modifier, edits are evaluated natively. '
+                    'Buildings with other footprint, roof, window frames, level of detail or bays '
+                    'use the Python generator',
+        update=on_property_update
     )
 
 
@@ -181,6 +1346,15 @@ class MakeBuilding(bpy.types.Operator):
         col.prop(props, 'gap_prop')
         col.prop(props, 'top_gap_prop')
         col.prop(props, 'bottom_gap_prop')
+        col.prop(props, 'wnd_depth_prop')
+        col.prop(props, 'wnd_frame_prop')
+        col.prop(props, 'lod_prop')
+        col.prop(props, 'roof_type_prop')
+        col.prop(props, 'roof_pitch_prop')
+        col.prop(props, 'bay_seed_prop')
+        col.prop(props, 'blank_bays_prop')
+        col.prop(props, 'balconies_prop')
+        col.prop(props, 'use_nodes_prop')
 
     # end draw
 
@@ -202,144 +1376,31 @@ class MakeBuilding(bpy.types.Operator):
 
     # end generate_stripe
 
-    @staticmethod
-    def generate_wall_segs(length, wnd_width, interval_width, min_gap):
-        """
-        Generates wall segments (windows, intervals) lengths array
-        :param length: wall length, m
-        :param wnd_width: window width, m
-        :param interval_width: interval width, m
-        :param min_gap: minimal left/right gap, m
-        :return: segment lengths array
-        """
-        cnt = int((length - (wnd_width + min_gap * 2)) /
-                  (wnd_width + interval_width))
-
-        real_gap = (1.0 * length - (wnd_width + interval_width)
-                    * cnt - wnd_width) / 2
-
-        cols = [real_gap]
-        for i in range(cnt):
-            cols.append(wnd_width)
-            cols.append(interval_width)
-        cols.append(wnd_width)
-        cols.append(real_gap)
-        return cols
-
-    @staticmethod
-    def generate_height_segs(
-            levels,
-            level_height,
-            bottom_gap,
-            wnd_height,
-            top_gap):
-        """
-        Generate height segments array
-        :param levels: Building levels count
-        :param level_height: level height, m
-        :param bottom_gap: bottom gap, m
-        :param wnd_height: wnd height,m
-        :param top_gap: top gap, m
-        :return: heights list
-        """
-        height_segs = []
-        total_ht = 0
-        for i in range(levels):
-            if i == 0:
-                height_segs.append(bottom_gap)
-            else:
-                height_segs.append(level_height - wnd_height)
-            total_ht += height_segs[-1]
-            height_segs.append(wnd_height)
-            total_ht += height_segs[-1]
-            if i == levels - 1:
-                height_segs.append(top_gap)
-                total_ht += height_segs[-1]
-        return height_segs, total_ht
-
-    @staticmethod
-    def generate_corner_vertices(bm, x, y, height_segs):
-        """
-        Generates vertices on building corner
-        :param bm: BMesh object to create vertices with
-        :param x: corner x coordinate
-        :param y: corner y coordinate
-        :param height_segs: height segments array generated by generate_height_segs method
-        :return: generated vertices list
-        """
-        z = 0
-        verts = [bm.verts.new((x, y, z))]
-        for seg_ht in height_segs:
-            z += seg_ht
-            verts.append(bm.verts.new((x, y, z)))
-        return verts
-
-    @staticmethod
-    def generate_wall(bm, wall_segs, start_corners, end_corners):
-        """
-        Generate wall geometry with extruding widows
-        :param bm: BMesh object to create geometry with
-        :param wall_segs:  wall segments lengths array (see generate_wall_segs)
-        :param start_corners: wall start corner vertices list, see generate_corner_vertices
-        :param end_corners: wall end corner vertices list, see generate_corner_vertices
-        :return: created top vertices list for generating roof based on them
-        """
-        w_segs = len(wall_segs)
-        norm = (end_corners[0].co - start_corners[0].co).normalized()
-
-        prev_start = start_corners[0]
-        prev_end = end_corners[0]
-        prev_vectors = []
-        extruded_faces = []
-        wall_segs_cnt = len(wall_segs)
-        i = 0
-        for vec_start, vec_end in zip(start_corners[1:], end_corners[1:]):
-            l = 0
-            new_vectors = []
-            prev_v1 = vec_start
-            prev_v2 = prev_start
-            for j, w in enumerate(wall_segs):
-                l += w
-                co = vec_start.co
-                v1 = vec_end
-                v2 = prev_end
-                if j < wall_segs_cnt - 1:
-                    v1 = bm.verts.new(
-                        (co[0] + l * norm[0], co[1] + l * norm[1], co[2]))
-                    new_vectors.append(v1)
-                    v2 = prev_vectors[j] if len(prev_vectors) > 0 else bm.verts.new(
-                        (co[0] + l * norm[0], co[1] + l * norm[1], norm[2]))
-                new_face = bm.faces.new((v1, v2, prev_v2, prev_v1))
-                if i % 2 == 1 and j % 2 == 1:
-                    extruded_faces.append(new_face)
-                prev_v1 = v1
-                prev_v2 = v2
-            prev_vectors = new_vectors
-            prev_start = vec_start
-            prev_end = vec_end
-            i += 1
-        bm.normal_update()
-        bmesh.ops.inset_individual(bm, faces=extruded_faces, depth=-0.2)
-        return prev_vectors
-
     def action_common(self, context):
         mesh = bpy.data.meshes.new("mesh")  # add a new mesh
         # add a new object using the mesh
         obj = bpy.data.objects.new("Building", mesh)
         location = bpy.context.scene.cursor.location
 
+        obj.location = (location.x, location.y, 0.0)
+
         bpy.context.scene.collection.objects.link(obj)  # put the object into the scene (link)
         bpy.context.view_layer.objects.active = obj  # set as the active object in the scene
+        obj.select_set(True)  # select object
 
-        MakeBuilding.generate_from_props(
-            location.x,
-            location.y,
-            bpy.context.object.building_props)
+        MakeBuilding.generate_from_props(mesh, obj.building_props)
 
     # end action_common
 
     @classmethod
-    def generate_from_props(cls, location_x, location_y, props: MAKER_OT_Properties):
+    def generate_from_props(cls, mesh, props: MAKER_OT_Properties):
+        """
+        Generates building into mesh around its object origin, object location places it.
+        Invalid parameters are kept in "building_error" object property, mesh isn't changed
+        :param mesh: target mesh datablock
+        :param props: building properties
+        :raise ValueError: if parameters can't make valid building
+        """
         gap = props.gap_prop
         top_gap = props.top_gap_prop
         bottom_gap = props.bottom_gap_prop
@@ -350,10 +1411,33 @@ class MakeBuilding(bpy.types.Operator):
         wnd_width = props.wnd_width_prop
         wnd_height = props.wnd_height_prop
         interval_width = props.interval_width_prop
+        wnd_depth = props.wnd_depth_prop
+        wnd_frame = props.wnd_frame_prop
+        lod = props.lod_prop
+        roof_type = props.roof_type_prop
+        roof_pitch = props.roof_pitch_prop
+        bay_seed = props.bay_seed_prop
+        blank_bays = props.blank_bays_prop
+        balconies = props.balconies_prop
+        obj = props.id_data
+        footprint = obj.get("building_footprint")
+        problem = params_problems(props_params(obj))
+        if problem:
+            obj["building_error"] = problem
+            raise ValueError("Invalid building parameters: " + problem)
+        obj.pop("building_error", None)
+
+        if props.use_nodes_prop and NODES_BACKEND and building_kernel.is_basic_building(props_params(obj), footprint):
+            apply_nodes_backend(obj)
+            return
+        modifier = obj.modifiers.get(NODES_MODIFIER)
+        if modifier is not None:
+            obj.modifiers.remove(modifier)
 
         MakeBuilding.generate_building(
-            location_x,
-            location_y,
+            mesh,
+            0,
+            0,
             length_x,
             length_y,
             level_height,
@@ -363,11 +1447,21 @@ class MakeBuilding(bpy.types.Operator):
             top_gap,
             interval_width,
             wnd_height,
-            wnd_width)
+            wnd_width,
+            wnd_depth,
+            wnd_frame,
+            lod,
+            roof_type,
+            roof_pitch,
+            footprint,
+            bay_seed,
+            blank_bays,
+            balconies)
 
     @classmethod
     def generate_building(
             cls,
+            mesh,
             location_x,
             location_y,
             length_x,
@@ -379,11 +1473,22 @@ class MakeBuilding(bpy.types.Operator):
             top_gap,
             interval_width,
             wnd_height,
-            wnd_width):
+            wnd_width,
+            wnd_depth=0.2,
+            wnd_frame=0.0,
+            lod=0,
+            roof_type=0,
+            roof_pitch=30.0,
+            footprint=None,
+            bay_seed=0,
+            blank_bays=0.0,
+            balconies=0.0):
         """
-        Key method responsible for building mesh generation
-        :param location_x: cursor x position
-        :param location_y: cursor y position
+        Key method responsible for building mesh generation.
+        Only the target mesh is changed and tagged for update, scene isn't re-evaluated
+        :param mesh: target mesh datablock
+        :param location_x: building center x position in mesh space
+        :param location_y: building center y position in mesh space
         :param length_x: Building X size, m
         :param length_y: Building Y size, m
         :param level_height: Building level height, m
@@ -394,70 +1499,454 @@ class MakeBuilding(bpy.types.Operator):
         :param interval_width: interval width, m
         :param wnd_height: window height, m
         :param wnd_width: window width, m
+        :param wnd_depth: window pane depth into the wall, m
+        :param wnd_frame: window frame width, m
+        :param lod: level of detail - building_kernel.LOD_FULL, LOD_FLAT_WINDOWS or LOD_BOX
+        :param roof_type: building_kernel.ROOF_FLAT, ROOF_GABLED, ROOF_HIPPED or ROOF_PYRAMID
+        :param roof_pitch: roof slope angle, degrees
+        :param footprint: footprint polygon flat x, y sequence relative to building location;
+        rectangle of length_x, length_y if None
+        :param bay_seed: seed of window bay kinds, see building_kernel.bay_kinds
+        :param blank_bays: probability of a window bay to be left as plain wall
+        :param balconies: probability of a window bay to get a balcony
         """
-        cols_x = MakeBuilding.generate_wall_segs(
-            length_x, wnd_width, interval_width, gap)
-        cols_y = MakeBuilding.generate_wall_segs(
-            length_y, wnd_width, interval_width, gap)
-        height_segs, total_ht = MakeBuilding.generate_height_segs(
-            levels, level_height, bottom_gap, wnd_height, top_gap)
-
-        scene = bpy.context.scene
-        obj = bpy.context.object
-        obj.select_set(True)  # select object
-        mesh = bpy.context.object.data
-        bm = bmesh.new()
-        delta_x = location_x - length_x / 2
-        delta_y = location_y - length_y / 2
-        corners00 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x, delta_y, height_segs)
-        corners10 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x + length_x, delta_y, height_segs)
-        corners01 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x, delta_y + length_y, height_segs)
-        corners11 = MakeBuilding.generate_corner_vertices(
-            bm, delta_x + length_x, delta_y + length_y, height_segs)
-        vecs1 = MakeBuilding.generate_wall(bm, cols_y, corners00, corners01)
-        vecs2 = MakeBuilding.generate_wall(bm, cols_x, corners01, corners11)
-        vecs3 = MakeBuilding.generate_wall(bm, cols_y, corners11, corners10)
-        vecs4 = MakeBuilding.generate_wall(bm, cols_x, corners10, corners00)
-        vecs = list(OrderedDict.fromkeys(
-            [corners00[-1]] + vecs1 + [corners01[-1]] + vecs2 + [corners11[-1]] + vecs3 + [corners10[-1]] + vecs4))
-
-        if len(vecs) > 2:
-            bm.faces.new(vecs)
-
-        bm.normal_update()
-        bm.to_mesh(bpy.context.object.data)
-        bm.free()
-        mesh.update()
-
-        bpy.context.scene.update()
+        params = building_kernel.BuildingParams(
+            location_x,
+            location_y,
+            length_x,
+            length_y,
+            levels,
+            level_height,
+            wnd_width,
+            wnd_height,
+            interval_width,
+            gap,
+            top_gap,
+            bottom_gap,
+            wnd_depth,
+            wnd_frame,
+            lod,
+            roof_type,
+            roof_pitch,
+            bay_seed,
+            blank_bays,
+            balconies)
+        if footprint is not None:
+            # Footprint buildings are unique, they aren't cached
+            footprint = np.array(list(footprint), dtype=np.float64).reshape(-1, 2)
+            write_building(mesh, building_kernel.generate_from_params(params, footprint=footprint),
+                           building_kernel.topology_key(params, footprint))
+        else:
+            write_building(mesh, GEOMETRY_CACHE.generate(params), building_kernel.topology_key(params))
 
     def execute(self, context):
-        self.action_common(context)
+        try:
+            self.action_common(context)
+        except ValueError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
         return {"FINISHED"}
 
     # end execute
 
     def invoke(self, context, event):
-        self.action_common(context)
-        return {"FINISHED"}
+        return self.execute(context)
     # end invoke
 
 
 # end MakeBuilding
 
 
+class MakeBuildingFromFootprint(bpy.types.Operator):
+    """Generate buildings on outlines of selected mesh objects"""
+    bl_idname = "mesh.make_building_footprint"
+    bl_label = "Building from Footprint"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == "MESH" for obj in context.selected_objects)
+
+    def execute(self, context):
+        sources = [obj for obj in context.selected_objects if obj.type == "MESH"]
+        params = props_params(context.object) if context.object in sources else None
+        problem = params_problems(params) if params is not None else None
+        if problem:
+            self.report({"ERROR"}, "Invalid building parameters: " + problem)
+            return {"CANCELLED"}
+        objects = []
+        for source in sources:
+            try:
+                points = mesh_footprint(source)
+            except ValueError as e:
+                self.report({"WARNING"}, "Skipped {}: {}".format(source.name, e))
+                continue
+            objects.append(make_footprint_building(points, context.scene.collection, params))
+        for obj in sources:
+            obj.select_set(False)
+        for obj in objects:
+            obj.select_set(True)
+        if objects:
+            context.view_layer.objects.active = objects[-1]
+        return {"FINISHED"}
+    # end execute
+
+
+# end MakeBuildingFromFootprint
+
+
+class MakeBuildingBatch(bpy.types.Operator):
+    """Generate buildings from CSV, JSON or NumPy parameters table"""
+    bl_idname = "mesh.make_building_batch"
+    bl_label = "Buildings from Table"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filepath: StringProperty(subtype="FILE_PATH")
+    filter_glob: StringProperty(default="*.csv;*.json;*.npy;*.npz", options={"HIDDEN"})
+    output_mode: EnumProperty(
+        name="Output",
+        items=(
+            ("OBJECTS", "Objects", "Separate object per building"),
+            ("MERGED", "Merged", "Buildings merged into shared meshes, building_id face attribute keeps table row"),
+            ("INSTANCED", "Instanced", "Facades made of shared window and wall module instances"),
+            ("LOD", "Levels of detail", "Object per level of detail, switched by camera distance"),
+        ),
+        default="OBJECTS",
+    )
+    chunk_size: IntProperty(
+        name="Buildings per mesh", min=1, default=1000,
+        description="Max buildings count in a single merged mesh",
+    )
+    use_processes: BoolProperty(
+        name="Worker processes", default=False,
+        description="Generate merged output in worker processes using all CPU cores",
+    )
+    share_meshes: BoolProperty(
+        name="Share meshes", default=True,
+        description="Buildings with the same parameters share single mesh",
+    )
+    tile_size: FloatProperty(
+        name="Tile size", min=0.0, default=0.0,
+        description="Put objects or merged meshes into a collection per grid cell of this size, 0 - no tiling",
+    )
+
+    use_variation: BoolProperty(
+        name="Variation", default=False,
+        description="Vary table parameters and window bays, deterministic for seed and table row",
+    )
+    variation_seed: IntProperty(
+        name="Seed", min=0, default=0,
+    )
+    level_count_range: IntVectorProperty(
+        name="Level count", size=2, min=0, default=(0, 0),
+        description="Min and max level count, table values are kept for 0",
+    )
+    wnd_width_range: FloatVectorProperty(
+        name="Window width", size=2, min=0, default=(0, 0),
+        description="Min and max window width, table values are kept for 0",
+    )
+    gap_range: FloatVectorProperty(
+        name="Min horiz gap", size=2, min=0, default=(0, 0),
+        description="Min and max left/right gap, table values are kept for 0",
+    )
+    interval_width_range: FloatVectorProperty(
+        name="Interval width", size=2, min=0, default=(0, 0),
+        description="Min and max interval width, table values are kept for 0",
+    )
+    blank_bays: FloatProperty(
+        name="Blank bays", min=0, max=1, default=0, subtype="FACTOR",
+        description="Share of window bays left as plain wall",
+    )
+    balconies: FloatProperty(
+        name="Balconies", min=0, max=1, default=0, subtype="FACTOR",
+        description="Share of window bays with a balcony",
+    )
+    use_modal: BoolProperty(
+        name="In background", default=True,
+        description="Generate in time slices keeping the interface responsive, Esc cancels",
+    )
+
+    _steps = None
+    _timer = None
+    _total = 0
+    _done = 0
+
+    def execute(self, context):
+        try:
+            params_list = building_kernel.read_table(self.filepath)
+            if self.use_variation:
+                params_list = building_kernel.vary_params(params_list, building_kernel.Variation(
+                    self.variation_seed,
+                    *[tuple(limits) if limits[1] > 0 else None for limits in (
+                        self.level_count_range, self.wnd_width_range, self.gap_range, self.interval_width_range)],
+                    blank_bays=self.blank_bays,
+                    balconies=self.balconies))
+                building_kernel.validate_table(params_list)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({"ERROR"}, "Can't read buildings table: {}".format(e))
+            return {"CANCELLED"}
+        steps = generate_batch(params_list, context.scene.collection, self.output_mode, self.chunk_size,
+                               self.share_meshes, self.tile_size, self.use_processes)
+        if not self.use_modal or context.window is None:
+            for _ in steps:
+                pass
+            self.report({"INFO"}, "Generated {} buildings".format(len(params_list)))
+            return {"FINISHED"}
+
+        self._steps = steps
+        self._total = len(params_list)
+        self._done = 0
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(BATCH_TIME_SLICE, window=context.window)
+        window_manager.progress_begin(0, max(self._total, 1))
+        window_manager.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    # end execute
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            self.finish(context)
+            self.report({"WARNING"}, "Cancelled, generated {} of {} buildings".format(self._done, self._total))
+            return {"FINISHED"}
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+        deadline = time.perf_counter() + BATCH_TIME_SLICE
+        try:
+            for done in self._steps:
+                self._done = done
+                if time.perf_counter() >= deadline:
+                    break
+            else:
+                self.finish(context)
+                self.report({"INFO"}, "Generated {} buildings".format(self._total))
+                return {"FINISHED"}
+        except Exception as e:
+            # Any failure has to stop the timer and progress. Buildings made so far are kept
+            # the same as on Esc, so the operator finishes and they get into undo history
+            self.finish(context)
+            self.report({"ERROR"}, "Generation failed after {} of {} buildings: {}".format(
+                self._done, self._total, e))
+            return {"FINISHED"}
+        context.window_manager.progress_update(self._done)
+        context.workspace.status_text_set(
+            "Generating buildings: {} of {}, Esc to cancel".format(self._done, self._total))
+        return {"PASS_THROUGH"}
+
+    # end modal
+
+    def finish(self, context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        self._steps.close()
+    # end finish
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+    # end invoke
+
+
+# end MakeBuildingBatch
+
+
+class MakeBuildingProfiling(bpy.types.Operator):
+    """Enable, disable or reset building generation stages timing"""
+    bl_idname = "mesh.building_profiling"
+    bl_label = "Building Generation Profiling"
+
+    action: EnumProperty(
+        items=(
+            ("ENABLE", "Enable", "Start collecting generation stages timing"),
+            ("DISABLE", "Disable", "Stop collecting generation stages timing"),
+            ("RESET", "Reset", "Clear collected timing"),
+        ),
+    )
+
+    def execute(self, context):
+        if self.action == "ENABLE":
+            building_kernel.enable_profiling(PROFILER)
+        elif self.action == "DISABLE":
+            building_kernel.disable_profiling()
+        else:
+            PROFILER.reset()
+        return {"FINISHED"}
+    # end execute
+
+
+# end MakeBuildingProfiling
+
+
+class MakeBuildingUpdateLod(bpy.types.Operator):
+    """Show buildings level of detail by distance to scene camera"""
+    bl_idname = "mesh.building_update_lod"
+    bl_label = "Update Building LODs"
+
+    def execute(self, context):
+        update_lods(context.scene)
+        return {"FINISHED"}
+    # end execute
+
+
+# end MakeBuildingUpdateLod
+
+
+class MakeBuildingRegenerateTile(bpy.types.Operator):
+    """Regenerate buildings of active collection tile and tiles of selected objects"""
+    bl_idname = "mesh.building_regenerate_tile"
+    bl_label = "Regenerate Tile"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context):
+        tiles = set(collection for obj in context.selected_objects for collection in obj.users_collection
+                    if "building_tile" in collection)
+        if context.collection is not None and "building_tile" in context.collection:
+            tiles.add(context.collection)
+        for tile_collection in tiles:
+            regenerate_tile(tile_collection)
+        self.report({"INFO"}, "Regenerated {} tiles".format(len(tiles)))
+        return {"FINISHED"}
+    # end execute
+
+
+# end MakeBuildingRegenerateTile
+
+
+class ExportBuildingArchive(bpy.types.Operator, ExportHelper):
+    """Save selected buildings geometry and parameters to binary archive"""
+    bl_idname = "export_mesh.building_archive"
+    bl_label = "Export Buildings Archive"
+
+    filename_ext = ".bgeo"
+    filter_glob: StringProperty(default="*.bgeo", options={"HIDDEN"})
+
+    def execute(self, context):
+        objects = [obj for obj in context.selected_objects if obj.type == "MESH"]
+        save_archive(self.filepath, objects)
+        self.report({"INFO"}, "Saved {} buildings".format(len(objects)))
+        return {"FINISHED"}
+    # end execute
+
+
+# end ExportBuildingArchive
+
+
+class ImportBuildingArchive(bpy.types.Operator, ImportHelper):
+    """Load precomputed buildings from binary archive"""
+    bl_idname = "import_mesh.building_archive"
+    bl_label = "Import Buildings Archive"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filename_ext = ".bgeo"
+    filter_glob: StringProperty(default="*.bgeo", options={"HIDDEN"})
+    merged: BoolProperty(
+        name="Merged", default=False,
+        description="Merge buildings into shared meshes, building_id face attribute keeps archive index",
+    )
+    chunk_size: IntProperty(
+        name="Buildings per mesh", min=1, default=1000,
+        description="Max buildings count in a single merged mesh",
+    )
+
+    def execute(self, context):
+        try:
+            objects = load_archive(self.filepath, context.scene.collection, self.merged, self.chunk_size)
+        except (OSError, ValueError) as e:
+            self.report({"ERROR"}, "Can't read buildings archive: {}".format(e))
+            return {"CANCELLED"}
+        self.report({"INFO"}, "Loaded {} objects".format(len(objects)))
+        return {"FINISHED"}
+    # end execute
+
+
+# end ImportBuildingArchive
+
+
+class ImportBuildingFootprints(bpy.types.Operator, ImportHelper):
+    """Generate buildings from GeoJSON or CSV footprints, file is read record by record"""
+    bl_idname = "import_mesh.building_footprints"
+    bl_label = "Import Building Footprints"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filter_glob: StringProperty(default="*.geojson;*.json;*.geojsonl;*.geojsons;*.jsonl;*.csv", options={"HIDDEN"})
+    geographic: BoolProperty(
+        name="Longitude/Latitude", default=True,
+        description="Coordinates are degrees, projected to meters around the first imported footprint",
+    )
+    levels_attribute: StringProperty(
+        name="Levels attribute", default="building:levels",
+        description="Feature property with building levels count",
+    )
+    height_attribute: StringProperty(
+        name="Height attribute", default="height",
+        description="Feature property with building height, used when levels count is missing",
+    )
+    merged: BoolProperty(
+        name="Merged", default=False,
+        description="Merge every chunk of buildings into a single mesh",
+    )
+    chunk_size: IntProperty(
+        name="Chunk size", min=1, default=1000,
+        description="Buildings generated at once",
+    )
+
+    def execute(self, context):
+        attributes = dict(building_kernel.FOOTPRINT_ATTRIBUTES)
+        attributes["level_count"] = (self.levels_attribute,) + attributes["level_count"]
+        attributes["height"] = (self.height_attribute,) + attributes["height"]
+        # Later imports are projected around the same origin, so they line up
+        origin = context.scene.get("building_geo_origin")
+        reader = building_kernel.FootprintReader(
+            self.filepath, attributes, self.geographic, tuple(origin) if origin is not None else None)
+        try:
+            count = import_footprints(
+                reader, context.scene.collection, self.merged, self.chunk_size, context.window_manager)
+        except (OSError, ValueError) as e:
+            self.report({"ERROR"}, "Can't read footprints: {}".format(e))
+            return {"CANCELLED"}
+        if self.geographic and reader.origin is not None:
+            context.scene["building_geo_origin"] = reader.origin
+        self.report({"INFO"}, "Generated {} buildings, skipped {} records".format(count, reader.skipped))
+        return {"FINISHED"}
+    # end execute
+
+
+# end ImportBuildingFootprints
+
+
 def add_to_menu(self, context):
     self.layout.operator("mesh.make_building", icon="PLUGIN")
+    self.layout.operator("mesh.make_building_batch", icon="PLUGIN")
+    self.layout.operator("mesh.make_building_footprint", icon="PLUGIN")
 
 
 # end add_to_menu
 
+
+def add_to_import_menu(self, context):
+    self.layout.operator("import_mesh.building_archive", text="Buildings Archive (.bgeo)")
+    self.layout.operator("import_mesh.building_footprints", text="Building Footprints (.geojson/.csv)")
+
+
+def add_to_export_menu(self, context):
+    self.layout.operator("export_mesh.building_archive", text="Buildings Archive (.bgeo)")
+
+
 classes = (
     MakeBuilding,
+    MakeBuildingFromFootprint,
+    MakeBuildingBatch,
+    MakeBuildingProfiling,
+    MakeBuildingUpdateLod,
+    MakeBuildingRegenerateTile,
+    ExportBuildingArchive,
+    ImportBuildingArchive,
+    ImportBuildingFootprints,
     MAKER_PT_Building,
+    MAKER_PT_BuildingProfiling,
+    MAKER_PT_BuildingLod,
     MAKER_OT_Properties,
 )
 
@@ -470,16 +1959,32 @@ def register():
         name="building_props",
         description="Generated building properties"
     )
+    Scene.building_lod_distances = FloatVectorProperty(
+        name="LOD distances", size=2, min=0, default=(150, 500),
+        description="Camera distances switching buildings to LOD1 and LOD2, meters",
+        subtype="NONE", unit="LENGTH"
+    )
     bpy.types.VIEW3D_MT_mesh_add.append(add_to_menu)
+    bpy.types.TOPBAR_MT_file_import.append(add_to_import_menu)
+    bpy.types.TOPBAR_MT_file_export.append(add_to_export_menu)
+    bpy.app.handlers.frame_change_pre.append(on_frame_change)
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
 
 
 # end register
 
 
 def unregister():
+    if bpy.app.timers.is_registered(regenerate_pending):
+        bpy.app.timers.unregister(regenerate_pending)
     for clazz in reversed(classes):
         unregister_class(clazz)
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    bpy.app.handlers.frame_change_pre.remove(on_frame_change)
+    bpy.types.TOPBAR_MT_file_export.remove(add_to_export_menu)
+    bpy.types.TOPBAR_MT_file_import.remove(add_to_import_menu)
     bpy.types.VIEW3D_MT_mesh_add.remove(add_to_menu)
+    del Scene.building_lod_distances
     del Object.building_props
 
 
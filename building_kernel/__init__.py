@@ -0,0 +1,90 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Blender independent building generation kernel.
+
+Only depends on NumPy, so geometry can be generated in plain CPython processes
+and uploaded to Blender meshes later with MeshBuffers.to_mesh
+"""
+
+from .layout import window_counts, layout_walls, generate_wall_segs, generate_height_segs
+from .geometry import (
+    LOD_FULL,
+    LOD_FLAT_WINDOWS,
+    LOD_BOX,
+    MATERIAL_WALL,
+    MATERIAL_FRAME,
+    MATERIAL_GLASS,
+    MATERIAL_ROOF,
+    MATERIAL_NAMES,
+    MATERIAL_COLORS,
+    MeshBuffers,
+    face_uvs,
+    rectangle_corners,
+    footprint_corners,
+    generate_ring,
+    generate_walls,
+    generate_building,
+    building_layout,
+    generate_from_params,
+    topology_key,
+    is_basic_building,
+)
+from .archive import Archive, write_archive
+from .cache import archetype_key, GeometryCache
+from .export import GltfWriter, ObjWriter, open_writer, export_buildings
+from .footprints import FOOTPRINT_ATTRIBUTES, FootprintReader, params_from_properties
+from .instancing import (
+    WALL_MODULE,
+    WINDOW_MODULE,
+    InstanceLayout,
+    generate_wall_module,
+    generate_window_module,
+    generate_instances,
+    generate_instanced_building,
+)
+from .merge import BUILDING_ID, merge_buffers, remove_buildings, replace_building
+from .parallel import generate_parallel
+from .profiling import Profiler, enable_profiling, disable_profiling, get_profiler, stage
+from .roof import ROOF_FLAT, ROOF_GABLED, ROOF_HIPPED, ROOF_PYRAMID, generate_roof, roof_kind
+from .table import (
+    BuildingParams,
+    params_from_record,
+    params_from_array,
+    find_invalid,
+    validate_table,
+    read_table,
+    iter_table,
+)
+from .tiles import tile_index, tile_bounds, group_by_tile
+from .variation import (
+    BAY_WINDOW,
+    BAY_BLANK,
+    BAY_BALCONY,
+    Variation,
+    hash_keys,
+    random_uniform,
+    vary_params,
+    bay_kinds,
+)
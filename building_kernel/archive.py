@@ -0,0 +1,234 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Compact binary archive of precomputed buildings. File is memory mapped on load,
+arrays are used in place without parsing:
+
+    header (64 bytes): magic b"BGEO", version, buildings, attributes count (uint32),
+        vertices, loops, faces totals (uint64), flags (uint32)
+    building table: (buildings + 1) x (vertex start, loop start, face start), uint64
+    attribute names: attributes count x 32 bytes, UTF-8, zero padded
+    vertices: float32 (vertices, 3)
+    loops: uint32, vertex indices relative to building first vertex
+    loop totals: uint32 (faces,)
+    attribute values: float64 (buildings, attributes count)
+    material indices: uint32 (faces,), empty without FLAG_MATERIALS
+    UVs: float32 (loops, 2), empty without FLAG_UVS
+
+Every array section starts at 16 bytes aligned offset
+"""
+
+import numpy as np
+
+from .geometry import MeshBuffers
+from .merge import BUILDING_ID
+from .table import BuildingParams, params_from_record
+
+MAGIC = b"BGEO"
+VERSION = 2
+ALIGNMENT = 16
+NAME_SIZE = 32
+FLAG_MATERIALS = 1
+FLAG_UVS = 2
+
+HEADER = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("buildings", "<u4"),
+    ("attributes", "<u4"),
+    ("vertices", "<u8"),
+    ("loops", "<u8"),
+    ("faces", "<u8"),
+    ("flags", "<u4"),
+    ("reserved", "V20"),
+])
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _sections(buildings, attributes, vertices, loops, faces, flags):
+    """
+    Computes array sections (dtype, shape, offset) in file order
+    """
+    sections = []
+    offset = HEADER.itemsize
+    for dtype, shape in (
+            ("<u8", (buildings + 1, 3)),
+            ("S{}".format(NAME_SIZE), (attributes,)),
+            ("<f4", (vertices, 3)),
+            ("<u4", (loops,)),
+            ("<u4", (faces,)),
+            ("<f8", (buildings, attributes)),
+            ("<u4", (faces if flags & FLAG_MATERIALS else 0,)),
+            ("<f4", (loops if flags & FLAG_UVS else 0, 2))):
+        offset = _aligned(offset)
+        sections.append((dtype, shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return sections, offset
+
+
+def write_archive(path, buffers_list, attributes=None):
+    """
+    Writes buildings geometry to archive file. Material indices and UVs are stored
+    if every building has them
+    :param path: archive file path
+    :param buffers_list: MeshBuffers list, one per building
+    :param attributes: optional per building attributes - dict name -> values array,
+        or BuildingParams list to store all parameters
+    """
+    if attributes is None:
+        attributes = {}
+    elif not isinstance(attributes, dict):
+        values = np.array([tuple(params) for params in attributes], dtype=np.float64).reshape(-1, len(BuildingParams._fields))
+        attributes = dict((name, values[:, i]) for i, name in enumerate(BuildingParams._fields))
+    names = sorted(attributes)
+
+    counts = np.array([(len(b.vertices), len(b.loops), len(b.loop_totals)) for b in buffers_list],
+                      dtype=np.uint64).reshape(-1, 3)
+    starts = np.zeros((len(buffers_list) + 1, 3), dtype=np.uint64)
+    np.cumsum(counts, axis=0, out=starts[1:])
+    totals = starts[-1]
+    flags = 0
+    if all(b.material_indices is not None for b in buffers_list):
+        flags |= FLAG_MATERIALS
+    if all(b.uvs is not None for b in buffers_list):
+        flags |= FLAG_UVS
+    sections, size = _sections(len(buffers_list), len(names), int(totals[0]), int(totals[1]), int(totals[2]), flags)
+
+    header = np.zeros(1, dtype=HEADER)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["buildings"] = len(buffers_list)
+    header["attributes"] = len(names)
+    header["vertices"], header["loops"], header["faces"] = totals
+    header["flags"] = flags
+
+    data = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+    try:
+        data[:HEADER.itemsize] = header.view(np.uint8)
+        arrays = [_view(data, section) for section in sections]
+        arrays[0][...] = starts
+        if names:
+            arrays[1][...] = [name.encode("utf-8") for name in names]
+            arrays[5][...] = np.stack([np.asarray(attributes[name], dtype=np.float64) for name in names], axis=1)
+        for buffers, (vertex_start, loop_start, face_start) in zip(buffers_list, starts.tolist()):
+            arrays[2][vertex_start:vertex_start + len(buffers.vertices)] = buffers.vertices
+            arrays[3][loop_start:loop_start + len(buffers.loops)] = buffers.loops
+            arrays[4][face_start:face_start + len(buffers.loop_totals)] = buffers.loop_totals
+            if flags & FLAG_MATERIALS:
+                arrays[6][face_start:face_start + len(buffers.loop_totals)] = buffers.material_indices
+            if flags & FLAG_UVS:
+                arrays[7][loop_start:loop_start + len(buffers.loops)] = buffers.uvs
+        data.flush()
+    finally:
+        del data
+
+
+def _view(data, section):
+    dtype, shape, offset = section
+    count = int(np.prod(shape))
+    return data[offset:offset + count * np.dtype(dtype).itemsize].view(dtype).reshape(shape)
+
+
+class Archive(object):
+    """
+    Memory mapped buildings archive, see write_archive
+    """
+
+    def __init__(self, path):
+        """
+        :param path: archive file path
+        """
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = self._data[:HEADER.itemsize].view(HEADER)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError("Not a buildings archive or unsupported version: {}".format(path))
+        sections, _ = _sections(int(header["buildings"]), int(header["attributes"]), int(header["vertices"]),
+                                int(header["loops"]), int(header["faces"]), int(header["flags"]))
+        starts, names, self.vertices, loops, loop_totals, values, material_indices, self.uvs = [
+            _view(self._data, s) for s in sections]
+        self.starts = starts.astype(np.int64)
+        # Indices never exceed int32 range, reinterpret for Blender foreach_set without copy
+        self.loops = loops.view(np.int32)
+        self.loop_totals = loop_totals.view(np.int32)
+        self.material_indices = material_indices.view(np.int32) if header["flags"] & FLAG_MATERIALS else None
+        if not header["flags"] & FLAG_UVS:
+            self.uvs = None
+        self.attributes = dict((name.decode("utf-8"), values[:, i]) for i, name in enumerate(names))
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def building(self, index):
+        """
+        :param index: building index
+        :return: building MeshBuffers, arrays are views of the mapped file
+        """
+        (vertex_start, loop_start, face_start), (vertex_end, loop_end, face_end) = self.starts[index:index + 2]
+        return MeshBuffers(
+            self.vertices[vertex_start:vertex_end],
+            self.loops[loop_start:loop_end],
+            self.loop_totals[face_start:face_end],
+            material_indices=None if self.material_indices is None else self.material_indices[face_start:face_end],
+            uvs=None if self.uvs is None else self.uvs[loop_start:loop_end])
+
+    def merged(self, start=0, stop=None):
+        """
+        Returns range of buildings as single buffers with BUILDING_ID face attribute set to building index.
+        Buildings are stored around their origins, they are moved to stored location_x, location_y
+        :param start: first building index
+        :param stop: index after the last building, archive end if None
+        :return: MeshBuffers
+        """
+        stop = len(self) if stop is None else stop
+        first, last = self.starts[start], self.starts[stop]
+        counts = np.diff(self.starts[start:stop + 1], axis=0)
+        loops = self.loops[first[1]:last[1]] + np.repeat(self.starts[start:stop, 0] - first[0], counts[:, 1])
+        building_ids = np.repeat(np.arange(start, stop, dtype=np.int32), counts[:, 2])
+        vertices = self.vertices[first[0]:last[0]]
+        if "location_x" in self.attributes and "location_y" in self.attributes:
+            offsets = np.zeros((stop - start, 3))
+            offsets[:, 0] = self.attributes["location_x"][start:stop]
+            offsets[:, 1] = self.attributes["location_y"][start:stop]
+            vertices = vertices + np.repeat(offsets, counts[:, 0], axis=0)
+        return MeshBuffers(
+            vertices,
+            loops.astype(np.int32),
+            self.loop_totals[first[2]:last[2]],
+            {BUILDING_ID: building_ids},
+            None if self.material_indices is None else self.material_indices[first[2]:last[2]],
+            None if self.uvs is None else self.uvs[first[1]:last[1]])
+
+    def params(self, index):
+        """
+        :param index: building index
+        :return: BuildingParams stored for building, None if archive has no parameters
+        """
+        if any(name not in self.attributes for name in BuildingParams._fields):
+            return None
+        return params_from_record(dict((name, self.attributes[name][index]) for name in BuildingParams._fields))
+
+# end Archive
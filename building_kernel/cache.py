@@ -0,0 +1,100 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+LRU cache of generated building geometry, shared between buildings of the same archetype
+"""
+
+from collections import OrderedDict
+
+from .geometry import generate_from_params
+from .profiling import get_profiler
+
+# Parameters are compared with 0.1 mm precision
+KEY_DIGITS = 4
+
+
+def archetype_key(params):
+    """
+    Normalized parameters tuple identifying building geometry regardless of its location
+    :param params: BuildingParams
+    :return: hashable key
+    """
+    return tuple(round(float(value), KEY_DIGITS) for value in params[2:])
+
+
+class GeometryCache(object):
+    """
+    Bounded LRU cache of building geometry generated around the origin.
+    Cached MeshBuffers are shared, so they should never be modified in place
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        :param maxsize: max cached archetypes count
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, params):
+        """
+        Returns cached building geometry around the origin, generating it on miss
+        :param params: BuildingParams, location is ignored
+        :return: MeshBuffers
+        """
+        key = archetype_key(params)
+        buffers = self._items.get(key)
+        hit = buffers is not None
+        if hit:
+            self.hits += 1
+            self._items.move_to_end(key)
+        else:
+            self.misses += 1
+            buffers = generate_from_params(params, with_location=False)
+            self._items[key] = buffers
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.add("cache hit" if hit else "cache miss", 0.0)
+        return buffers
+
+    def generate(self, params):
+        """
+        Returns building geometry moved to building location
+        :param params: BuildingParams
+        :return: MeshBuffers
+        """
+        return self.get(params).translated(params.location_x, params.location_y)
+
+    def clear(self):
+        self._items.clear()
+        self.hits = 0
+        self.misses = 0
+
+# end GeometryCache
@@ -0,0 +1,491 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+
+"""
+Streaming export of generated buildings to glTF 2.0 (.glb, or .gltf with external .bin buffers)
+and Wavefront OBJ files, without Blender. Buildings are written one by one, only a chunk
+of buildings is held in memory:
+
+    python -m building_kernel city.csv city.glb
+
+Both formats are Y up: Blender (x, y, z) is written as (x, z, -y), as Blender exporters do
+by default. Faces are fan triangulated for glTF, all generated faces are convex
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from .cache import GeometryCache
+from .footprints import WKT_COLUMNS, FootprintReader
+from .geometry import MATERIAL_COLORS, MATERIAL_NAMES, generate_from_params
+from .merge import BUILDING_ID, merge_buffers
+from .profiling import stage
+from .table import BuildingParams, iter_table
+
+GLB_MAGIC = 0x46546C67
+GLB_JSON = 0x4E4F534A
+GLB_BIN = 0x004E4942
+# .glb length fields are uint32; .gltf starts a new external .bin buffer at BUFFER_MAX_SIZE
+GLB_MAX_SIZE = 2 ** 32 - 1
+BUFFER_MAX_SIZE = 2 ** 31
+
+# Max loops of buildings merged into a glTF mesh, bounds memory used by a chunk
+CHUNK_MAX_LOOPS = 2 ** 20
+# glTF vertex attributes can't be UNSIGNED_INT, building ids are stored as exact float32 integers
+MAX_BUILDING_ID = 2 ** 24
+
+# glTF constants
+FLOAT = 5126
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+# Footprint files, other inputs are read as parameters tables, see iter_table.
+# CSV files with WKT column are footprints too
+FOOTPRINT_EXTENSIONS = (".geojson", ".geojsonl", ".geojsons", ".jsonl")
+
+
+def _y_up(vertices):
+    """
+    :param vertices: Z up (N, 3) array
+    :return: Y up float32 (N, 3) array
+    """
+    vertices = np.asarray(vertices)
+    return np.column_stack((vertices[:, 0], vertices[:, 2], -vertices[:, 1])).astype(np.float32)
+
+
+def _material_name(index):
+    return "Building " + MATERIAL_NAMES[index]
+
+
+def _uv_keys(uvs):
+    """
+    UVs as float32 bits, sorting them as uint64 keys is much faster than sorting rows
+    :param uvs: loop UVs (L, 2) array
+    :return: uint64 (L,) array, equal for equal UVs
+    """
+    # Adding zero turns -0 to 0
+    return (np.asarray(uvs, dtype=np.float32) + np.float32(0)).view(np.uint64).ravel()
+
+
+def _unique_uvs(uvs):
+    """
+    :param uvs: loop UVs (L, 2) array
+    :return: tuple of first loop of every distinct UV and UV index of every loop
+    """
+    _, first, inverse = np.unique(_uv_keys(uvs), return_index=True, return_inverse=True)
+    return first, inverse.reshape(-1)
+
+
+def _corners(loops, uvs):
+    """
+    Distinct (vertex, UV) pairs of loops
+    :param loops: loops vertex indices array
+    :param uvs: loop UVs (L, 2) array
+    :return: tuple of first loop of every corner and corner index of every loop
+    """
+    keys = _uv_keys(uvs)
+    order = np.lexsort((keys, loops))
+    sorted_loops, sorted_keys = loops[order], keys[order]
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (sorted_loops[1:] != sorted_loops[:-1]) | (sorted_keys[1:] != sorted_keys[:-1])
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.cumsum(new) - 1
+    return order[new], inverse
+
+
+def _write_rows(f, fmt, rows):
+    """
+    Writes array rows formatted in a single string operation, much faster than np.savetxt
+    :param f: text file
+    :param fmt: row format with line end
+    :param rows: (N, K) array
+    """
+    if len(rows):
+        f.write((fmt * len(rows)) % tuple(rows.ravel().tolist()))
+
+
+def _triangles(loop_totals):
+    """
+    Fan triangulation of faces
+    :param loop_totals: face loop totals array
+    :return: tuple of triangles loop indices (T, 3) array and face index of every triangle
+    """
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    starts = np.zeros(len(loop_totals), dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=starts[1:])
+    counts = loop_totals - 2
+    faces = np.repeat(np.arange(len(loop_totals)), counts)
+    first = np.repeat(starts, counts)
+    corner = np.arange(len(faces)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    return np.column_stack((first, first + corner, first + corner + 1)), faces
+
+
+class GltfWriter(object):
+    """
+    Streams buildings to glTF file. Every chunk of buildings becomes a node with its own mesh,
+    a primitive per material; float vertex "_BUILDING_ID" attribute keeps building id.
+    Only chunk accessors are kept in memory until the JSON is written on close.
+    .glb binary data is spooled to a temporary file next to the output and is limited to 4 GiB;
+    .gltf gets "<name>_<n>.bin" buffers of up to 2 GiB each, so size isn't limited
+    """
+
+    def __init__(self, path, chunk_size=1000):
+        """
+        :param path: output .glb or .gltf file path
+        :param chunk_size: buildings count per mesh
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.binary = os.path.splitext(path)[1].lower() == ".glb"
+        self.count = 0
+        self._pending = []
+        self._ids = []
+        self._loops = 0
+        self._nodes = []
+        self._meshes = []
+        self._accessors = []
+        self._buffer_views = []
+        self._buffers = []
+        self._file = None
+        self._offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            self._file.close()
+
+    def write(self, buffers, building_id=None):
+        """
+        Adds building to the file
+        :param buffers: building MeshBuffers
+        :param building_id: id to store in "_BUILDING_ID" attribute, building number if None;
+        ids up to MAX_BUILDING_ID are exact
+        """
+        building_id = self.count if building_id is None else building_id
+        if not 0 <= building_id <= MAX_BUILDING_ID:
+            raise ValueError("Building id {} is out of glTF range 0 - {}".format(building_id, MAX_BUILDING_ID))
+        self._pending.append(buffers)
+        self._ids.append(building_id)
+        self.count += 1
+        self._loops += len(buffers.loops)
+        if len(self._pending) >= self.chunk_size or self._loops >= CHUNK_MAX_LOOPS:
+            self._flush()
+
+    def _open_buffer(self, size):
+        """
+        Makes sure current buffer file can take size more bytes
+        """
+        if self.binary:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(self.path)))
+                self._buffers.append({"byteLength": 0})
+            if self._offset + size > GLB_MAX_SIZE:
+                raise ValueError("Buildings don't fit 4 GiB .glb file, export to .gltf instead")
+            return
+        if self._file is not None and self._offset + size <= BUFFER_MAX_SIZE:
+            return
+        if self._file is not None:
+            self._file.close()
+        name = "{}_{}.bin".format(os.path.splitext(os.path.basename(self.path))[0], len(self._buffers))
+        self._file = open(os.path.join(os.path.dirname(os.path.abspath(self.path)), name), "wb")
+        self._buffers.append({"byteLength": 0, "uri": name})
+        self._offset = 0
+
+    def _add_view(self, array, target):
+        """
+        Appends array to current buffer
+        :return: buffer view index
+        """
+        data = np.ascontiguousarray(array).tobytes()
+        self._file.write(data)
+        self._buffer_views.append({"buffer": len(self._buffers) - 1, "byteOffset": self._offset,
+                                   "byteLength": len(data), "target": target})
+        self._offset += len(data)
+        self._buffers[-1]["byteLength"] = self._offset
+        return len(self._buffer_views) - 1
+
+    def _add_accessor(self, array, accessor_type, target, bounds=False):
+        """
+        :return: accessor index
+        """
+        accessor = {"bufferView": self._add_view(array, target), "count": len(array), "type": accessor_type,
+                    "componentType": FLOAT if array.dtype == np.float32 else UNSIGNED_INT}
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self._accessors.append(accessor)
+        return len(self._accessors) - 1
+
+    def _flush(self):
+        """
+        Writes pending buildings as a single mesh
+        """
+        buffers = merge_buffers(self._pending, self._ids)
+        first_id, last_id = self._ids[0], self._ids[-1]
+        self._pending = []
+        self._ids = []
+        self._loops = 0
+        if not len(buffers.loop_totals):
+            return
+        with stage("export") as timer:
+            # glTF vertices are corners - distinct (vertex, UV) pairs
+            loop_ids = np.repeat(buffers.face_attributes[BUILDING_ID], buffers.loop_totals)
+            if buffers.uvs is None:
+                corners, first_loops, loop_corners = np.unique(buffers.loops, return_index=True, return_inverse=True)
+                loop_corners = loop_corners.reshape(-1)
+            else:
+                first_loops, loop_corners = _corners(buffers.loops, buffers.uvs)
+                corners = buffers.loops[first_loops]
+            triangles, faces = _triangles(buffers.loop_totals)
+            indices = loop_corners[triangles].astype(np.uint32)
+
+            positions = _y_up(buffers.vertices[corners])
+            ids = loop_ids[first_loops].astype(np.float32)
+            size = positions.nbytes + ids.nbytes + indices.nbytes + len(corners) * 8
+            self._open_buffer(size)
+            attributes = {
+                "POSITION": self._add_accessor(positions, "VEC3", ARRAY_BUFFER, bounds=True),
+                "_BUILDING_ID": self._add_accessor(ids, "SCALAR", ARRAY_BUFFER),
+            }
+            if buffers.uvs is not None:
+                uvs = buffers.uvs[first_loops].astype(np.float32)
+                uvs[:, 1] = 1.0 - uvs[:, 1]  # glTF UV origin is top left
+                attributes["TEXCOORD_0"] = self._add_accessor(uvs, "VEC2", ARRAY_BUFFER)
+
+            primitives = []
+            if buffers.material_indices is None:
+                primitives.append({"attributes": attributes,
+                                   "indices": self._add_accessor(indices.ravel(), "SCALAR", ELEMENT_ARRAY_BUFFER)})
+            else:
+                materials = buffers.material_indices[faces]
+                order = np.argsort(materials, kind="stable")
+                bounds = np.searchsorted(materials[order], np.arange(len(MATERIAL_NAMES) + 1))
+                for material, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+                    if end > start:
+                        primitives.append({
+                            "attributes": attributes, "material": material,
+                            "indices": self._add_accessor(
+                                indices[order[start:end]].ravel(), "SCALAR", ELEMENT_ARRAY_BUFFER)})
+            name = "Buildings {}-{}".format(first_id, last_id)
+            self._nodes.append({"name": name, "mesh": len(self._meshes)})
+            self._meshes.append({"name": name, "primitives": primitives})
+            timer.items = len(buffers.loop_totals)
+
+    def close(self):
+        """
+        Writes remaining buildings and glTF JSON
+        """
+        if self._pending:
+            self._flush()
+        gltf = {
+            "asset": {"version": "2.0", "generator": "building_kernel"},
+            "scene": 0,
+            "scenes": [{"nodes": list(range(len(self._nodes)))} if self._nodes else {}],
+            "materials": [{
+                "name": _material_name(index),
+                "pbrMetallicRoughness": {"baseColorFactor": list(color), "metallicFactor": 0.0}}
+                for index, color in enumerate(MATERIAL_COLORS)],
+        }
+        for key, items in (("nodes", self._nodes), ("meshes", self._meshes), ("accessors", self._accessors),
+                           ("bufferViews", self._buffer_views), ("buffers", self._buffers)):
+            if items:
+                gltf[key] = items
+        text = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        if not self.binary:
+            if self._file is not None:
+                self._file.close()
+            with open(self.path, "wb") as f:
+                f.write(text)
+            return
+        text += b" " * (-len(text) % 4)
+        bin_size = self._offset + (-self._offset % 4)
+        with open(self.path, "wb") as f:
+            length = 12 + 8 + len(text) + (8 + bin_size if self._file is not None else 0)
+            if length > GLB_MAX_SIZE:
+                raise ValueError("Buildings don't fit 4 GiB .glb file, export to .gltf instead")
+            f.write(struct.pack("<III", GLB_MAGIC, 2, length))
+            f.write(struct.pack("<II", len(text), GLB_JSON))
+            f.write(text)
+            if self._file is not None:
+                f.write(struct.pack("<II", bin_size, GLB_BIN))
+                self._file.seek(0)
+                shutil.copyfileobj(self._file, f)
+                f.write(b"\0" * (bin_size - self._offset))
+                self._file.close()
+
+# end GltfWriter
+
+
+class ObjWriter(object):
+    """
+    Streams buildings to Wavefront OBJ file, an "o" object per building. Materials are written
+    to .mtl file next to it; vertices are written with 0.1 mm precision
+    """
+
+    def __init__(self, path):
+        """
+        :param path: output .obj file path
+        """
+        self.path = path
+        self.count = 0
+        self._vertices = 1
+        self._uvs = 1
+        mtl_path = os.path.splitext(path)[0] + ".mtl"
+        with open(mtl_path, "w") as f:
+            for index, color in enumerate(MATERIAL_COLORS):
+                f.write("newmtl {}\nKd {:.4f} {:.4f} {:.4f}\n\n".format(
+                    _material_name(index).replace(" ", "_"), *color[:3]))
+        self._file = open(path, "w")
+        self._file.write("# building_kernel\nmtllib {}\n".format(os.path.basename(mtl_path)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write(self, buffers, building_id=None):
+        """
+        Writes building to the file
+        :param buffers: building MeshBuffers
+        :param building_id: id in object name, building number if None
+        """
+        f = self._file
+        with stage("export") as timer:
+            f.write("o Building.{}\n".format(self.count if building_id is None else building_id))
+            _write_rows(f, "v %.4f %.4f %.4f\n", _y_up(buffers.vertices))
+            loop_uvs = None
+            if buffers.uvs is not None:
+                uvs = np.round(buffers.uvs, 4)
+                first, loop_uvs = _unique_uvs(uvs)
+                loop_uvs = loop_uvs + self._uvs
+                _write_rows(f, "vt %.4f %.4f\n", uvs[first])
+                self._uvs += len(first)
+            loops = buffers.loops + self._vertices
+            starts = buffers.loop_starts()
+            materials = buffers.material_indices
+            for material in (np.unique(materials) if materials is not None else [None]):
+                selected = np.ones(len(starts), dtype=bool) if material is None else materials == material
+                if material is not None:
+                    f.write("usemtl {}\n".format(_material_name(material).replace(" ", "_")))
+                for total in np.unique(buffers.loop_totals[selected]).tolist():
+                    face_loops = starts[selected & (buffers.loop_totals == total)][:, None] + np.arange(total)
+                    if loop_uvs is None:
+                        _write_rows(f, "f" + " %d" * total + "\n", loops[face_loops])
+                    else:
+                        corners = np.stack((loops[face_loops], loop_uvs[face_loops]), axis=-1)
+                        _write_rows(f, "f" + " %d/%d" * total + "\n", corners.reshape(len(corners), -1))
+            self._vertices += len(buffers.vertices)
+            self.count += 1
+            timer.items = len(buffers.loop_totals)
+
+    def close(self):
+        self._file.close()
+
+# end ObjWriter
+
+
+def open_writer(path, chunk_size=1000):
+    """
+    Creates writer for output file format chosen by extension - .glb, .gltf or .obj
+    :param path: output file path
+    :param chunk_size: buildings count per glTF mesh
+    :return: GltfWriter or ObjWriter
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".glb", ".gltf"):
+        return GltfWriter(path, chunk_size)
+    if ext == ".obj":
+        return ObjWriter(path)
+    raise ValueError("Unsupported export format: {}".format(path))
+
+
+def export_buildings(path, buildings, chunk_size=1000, cache=None):
+    """
+    Generates buildings and streams them to glTF or OBJ file, see open_writer.
+    Buildings are consumed one by one, so memory doesn't grow with their count
+    :param path: output file path
+    :param buildings: iterable of BuildingParams or (BuildingParams, footprint) pairs, e.g. FootprintReader
+    :param chunk_size: buildings count per glTF mesh
+    :param cache: GeometryCache for rectangular buildings, new one if None
+    :return: exported buildings count
+    """
+    cache = GeometryCache() if cache is None else cache
+    with open_writer(path, chunk_size) as writer:
+        for building in buildings:
+            params, footprint = (building, None) if isinstance(building, BuildingParams) else building
+            if footprint is None:
+                writer.write(cache.generate(params))
+            else:
+                writer.write(generate_from_params(params, footprint=footprint))
+        return writer.count
+
+
+def _is_footprints(path):
+    """
+    :param path: input file path
+    :return: True if file has footprint polygons, see FootprintReader; False for parameters table
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext != ".csv":
+        return ext in FOOTPRINT_EXTENSIONS
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    if any(column in header for column in WKT_COLUMNS):
+        return True
+    if not set(header) & set(BuildingParams._fields):
+        raise ValueError("No building parameter or WKT columns in {}".format(path))
+    return False
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m building_kernel", description="Generate buildings from table or footprints to glTF/OBJ file")
+    parser.add_argument("input", help="parameters table (.csv, .json, .npy, .npz) or footprints "
+                                      "(.geojson, .geojsonl, .csv with wkt column)")
+    parser.add_argument("output", help="output file, .glb, .gltf or .obj")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="buildings per glTF mesh")
+    parser.add_argument("--geographic", action="store_true",
+                        help="footprint coordinates are longitude/latitude degrees")
+    args = parser.parse_args(args)
+    if _is_footprints(args.input):
+        buildings = FootprintReader(args.input, geographic=args.geographic)
+    else:
+        buildings = iter_table(args.input)
+    count = export_buildings(args.output, buildings, args.chunk_size)
+    print("Exported {} buildings to {}".format(count, args.output))
+    if isinstance(buildings, FootprintReader) and buildings.skipped:
+        print("Skipped {} footprints that can't be read".format(buildings.skipped))
@@ -0,0 +1,362 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+
+"""
+Streaming reader of building footprints from GIS extracts - GeoJSON and CSV
+"""
+
+import csv
+import io
+import json
+import math
+import os
+import re
+from json.decoder import scanstring
+
+import numpy as np
+
+from .geometry import footprint_corners
+from .table import BuildingParams, params_from_record, validate_table
+
+# Building parameter -> feature properties it's read from, first present one is used.
+# "height" isn't a parameter, level count is derived from it when levels are missing
+FOOTPRINT_ATTRIBUTES = {
+    "level_count": ("building:levels", "levels", "level_count"),
+    "height": ("height", "building:height"),
+}
+
+# Mean Earth radius, m
+EARTH_RADIUS = 6371008.8
+
+# Bytes read from file per step
+READ_SIZE = 1 << 16
+
+# CSV columns with WKT footprint, in lookup order
+WKT_COLUMNS = ("wkt", "geometry")
+
+_NUMBER = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+
+# JSON characters changing nesting depth or starting a string
+_JSON_TOKENS = re.compile(r"[\"{}\[\]]")
+
+
+def _skip_to_features(f):
+    """
+    Reads JSON text up to "features" key of the top level object. Nested "features" keys,
+    e.g. in collection properties, and "features" strings are skipped
+    :param f: text file
+    :return: text following the key
+    """
+    text = ""
+    pos = 0
+    depth = 0
+    while True:
+        match = _JSON_TOKENS.search(text, pos)
+        if match is not None and match.group() != "\"":
+            depth += 1 if match.group() in "{[" else -1
+            pos = match.end()
+            continue
+        if match is None:
+            text, pos = "", 0
+        else:
+            try:
+                key, end = scanstring(text, match.end())
+            except ValueError:
+                end = None  # string continues in the next chunk
+            if end is not None:
+                rest = text[end:].lstrip()
+                if depth != 1 or key != "features":
+                    pos = end
+                    continue
+                # Colon tells key from "features" value, it may be in the next chunk
+                if rest:
+                    if rest[0] == ":":
+                        return rest
+                    pos = end
+                    continue
+            text, pos = text[match.start():], 0
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            raise ValueError("No \"features\" array found")
+        text += chunk
+
+
+def _number(value):
+    """
+    Parses number from attribute value, e.g. 12, "12" or "12 m"
+    :param value: attribute value
+    :return: float or None, if value has no number
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.match(str(value).strip())
+    return float(match.group(0)) if match else None
+
+
+def params_from_properties(properties, location, attributes=None):
+    """
+    Creates building parameters from footprint feature properties
+    :param properties: mapping property name -> value
+    :param location: building (x, y) location
+    :param attributes: parameter -> property names mapping, FOOTPRINT_ATTRIBUTES if None;
+    parameters are also read from properties named as BuildingParams fields
+    :return: BuildingParams
+    """
+    if attributes is None:
+        attributes = FOOTPRINT_ATTRIBUTES
+    record = dict(properties)
+    for field, names in attributes.items():
+        for name in names:
+            value = properties.get(name)
+            if value is not None and value != "":
+                record[field] = _number(value)
+                break
+    height = record.pop("height", None)
+    if record.get("level_count") is None and height:
+        level_height = _number(record.get("level_height") or BuildingParams().level_height)
+        record["level_count"] = max(1, int(round(height / level_height)))
+    record["location_x"], record["location_y"] = location
+    return params_from_record(record)
+
+
+def _parse_wkt(text):
+    """
+    Parses WKT polygon or multipolygon, only exterior rings are kept
+    :param text: WKT string, e.g. "POLYGON ((0 0, 10 0, 10 10, 0 0))"
+    :return: list of rings, each a list of (x, y) points
+    """
+    kind = text.lstrip().split("(", 1)[0].strip().upper()
+    if kind not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError("Unsupported WKT geometry: {}".format(kind))
+    # Exterior ring is the first ring of a polygon, the only one opened right after polygon parenthesis
+    return [[tuple(float(value) for value in point.split()[:2]) for point in ring.split(",")]
+            for ring in re.findall(r"\(\s*\(([^()]*)\)", text)]
+
+
+def _geojson_rings(geometry):
+    """
+    :param geometry: GeoJSON geometry object
+    :return: exterior rings of its polygons, other geometries have none
+    """
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        return geometry["coordinates"][:1]
+    if geometry.get("type") == "MultiPolygon":
+        return [polygon[0] for polygon in geometry["coordinates"] if polygon]
+    return []
+
+
+class _CountingReader(io.RawIOBase):
+    """
+    Binary file wrapper counting bytes read, text is decoded on top of it
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        count = self.f.readinto(b)
+        self.count += count or 0
+        return count
+
+# end _CountingReader
+
+
+class FootprintReader(object):
+    """
+    Reads building footprints record by record, without loading whole file:
+    .geojson/.json - FeatureCollection, features are decoded one by one;
+    .geojsonl/.geojsons/.jsonl - newline delimited GeoJSON features;
+    .csv - header row, footprint as WKT in "wkt"/"geometry" column or rectangle
+    building parameters columns, see read_table.
+    Yields (BuildingParams, footprint) pairs; footprint is (N, 2) points array relative to
+    building location (footprint center), or None for rectangular buildings.
+    Multipolygon features give a building per polygon. Records that can't be parsed are
+    counted in skipped
+    """
+
+    def __init__(self, path, attributes=None, geographic=False, origin=None):
+        """
+        :param path: footprints file path
+        :param attributes: parameter -> property names mapping, see params_from_properties
+        :param geographic: coordinates are longitude/latitude degrees, they are projected
+        to meters around origin
+        :param origin: projection origin (longitude, latitude), first footprint point if None
+        """
+        self.path = path
+        self.attributes = attributes
+        self.geographic = geographic
+        self.origin = origin
+        self.size = os.path.getsize(path)
+        self.skipped = 0
+        self._raw = None
+
+    @property
+    def progress(self):
+        """
+        :return: read part of the file, 0 - 1
+        """
+        if self._raw is None or not self.size:
+            return 0.0
+        return min(1.0, self._raw.count / self.size)
+
+    def _project(self, ring):
+        """
+        :param ring: footprint (x, y) points
+        :return: points (N, 2) array in meters
+        """
+        points = np.asarray(ring, dtype=np.float64)[:, :2]
+        if not self.geographic:
+            return points
+        if self.origin is None:
+            self.origin = tuple(points[0].tolist())
+        lon, lat = np.radians(self.origin)
+        return np.column_stack((
+            EARTH_RADIUS * math.cos(lat) * (np.radians(points[:, 0]) - lon),
+            EARTH_RADIUS * (np.radians(points[:, 1]) - lat)))
+
+    def _buildings(self, rings, properties):
+        """
+        :param rings: footprint rings
+        :param properties: feature properties
+        :return: list of (BuildingParams, footprint) pairs
+        """
+        if not rings:
+            raise ValueError("No footprint polygons")
+        buildings = []
+        for ring in rings:
+            points = footprint_corners(self._project(ring))
+            center = points.mean(axis=0)
+            params = params_from_properties(properties, center, self.attributes)
+            validate_table([params])
+            buildings.append((params, points - center))
+        return buildings
+
+    def _features(self, f):
+        """
+        Decodes GeoJSON features one by one from FeatureCollection "features" array,
+        or from newline delimited features
+        :param f: text file
+        :return: features iterator
+        """
+        if os.path.splitext(self.path)[1].lower() in (".geojsonl", ".geojsons", ".jsonl"):
+            for line in f:
+                line = line.strip().lstrip("\x1e")  # RFC 8142 record separator
+                if line:
+                    yield json.loads(line)
+            return
+        decoder = json.JSONDecoder()
+        text = _skip_to_features(f)
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            while pos < len(text) and text[pos] in " \t\r\n:,[":
+                if text[pos] == "[":
+                    started = True
+                pos += 1
+            if pos < len(text) and started:
+                if text[pos] == "]":
+                    return
+                try:
+                    feature, end = decoder.raw_decode(text, pos)
+                except ValueError:
+                    if eof:
+                        raise
+                else:
+                    yield feature
+                    text = text[end:]
+                    pos = 0
+                    continue
+            elif eof:
+                raise ValueError("Unexpected end of features array")
+            chunk = f.read(READ_SIZE)
+            eof = not chunk
+            text = text[pos:] + chunk
+            pos = 0
+
+    def _records(self, f):
+        """
+        :param f: text file
+        :return: (BuildingParams, footprint) pairs iterator
+        """
+        if os.path.splitext(self.path)[1].lower() == ".csv":
+            reader = csv.DictReader(f)
+            columns = [column for column in WKT_COLUMNS if column in (reader.fieldnames or ())]
+            for row in reader:
+                try:
+                    if columns:
+                        # Footprints file, rows without footprint can't be placed
+                        wkt = next((row[column] for column in columns if row[column]), None)
+                        if not wkt:
+                            raise ValueError("No footprint")
+                        for building in self._buildings(_parse_wkt(wkt), row):
+                            yield building
+                    else:
+                        if not any(row.get(field) for field in BuildingParams._fields):
+                            raise ValueError("Blank row")
+                        params = params_from_record(row)
+                        validate_table([params])
+                        yield params, None
+                except (ValueError, KeyError, IndexError):
+                    self.skipped += 1
+            return
+        for feature in self._features(f):
+            try:
+                buildings = self._buildings(
+                    _geojson_rings(feature.get("geometry")), feature.get("properties") or {})
+            except (ValueError, KeyError, IndexError, TypeError):
+                self.skipped += 1
+                continue
+            for building in buildings:
+                yield building
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            self._raw = _CountingReader(f)
+            text = io.TextIOWrapper(io.BufferedReader(self._raw), encoding="utf-8-sig", newline="")
+            for record in self._records(text):
+                yield record
+
+    def chunks(self, chunk_size=1000):
+        """
+        Reads footprints in chunks, only one chunk is held in memory
+        :param chunk_size: max records count in a chunk
+        :return: iterator of (BuildingParams, footprint) pairs lists
+        """
+        chunk = []
+        for record in self:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+# end FootprintReader
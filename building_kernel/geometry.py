@@ -0,0 +1,681 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Building mesh generation into plain vertex/face buffers
+"""
+
+import numpy as np
+
+from .layout import generate_height_segs, layout_walls
+from .profiling import stage
+from .roof import ROOF_FLAT, generate_roof, roof_kind
+from .table import BuildingParams
+from .variation import BAY_BALCONY, BAY_BLANK, bay_kinds
+
+
+# Material indices of generated faces
+MATERIAL_WALL = 0
+MATERIAL_FRAME = 1
+MATERIAL_GLASS = 2
+MATERIAL_ROOF = 3
+MATERIAL_NAMES = ("Wall", "Window Frame", "Glass", "Roof")
+# Base colors of materials, linear RGBA
+MATERIAL_COLORS = (
+    (0.8, 0.75, 0.65, 1.0),
+    (0.9, 0.9, 0.9, 1.0),
+    (0.3, 0.45, 0.6, 1.0),
+    (0.45, 0.2, 0.15, 1.0),
+)
+
+
+class MeshBuffers(object):
+    """
+    Plain mesh geometry - vertex coordinates and faces as flat loop arrays,
+    laid out the same way Blender Mesh stores them, plus optional integer face attributes,
+    face material indices and loop UVs
+    """
+    __slots__ = ("vertices", "loops", "loop_totals", "face_attributes", "material_indices", "uvs")
+
+    def __init__(self, vertices, loops, loop_totals, face_attributes=None, material_indices=None, uvs=None):
+        """
+        :param vertices: vertices (N, 3) float array
+        :param loops: face loops vertex indices int32 array
+        :param loop_totals: face loop totals int32 array
+        :param face_attributes: dict attribute name -> int32 array with value per face
+        :param material_indices: face material indices int32 array, see MATERIAL_NAMES; None for no materials
+        :param uvs: loop UVs (L, 2) float32 array, None for no UVs
+        """
+        self.vertices = vertices
+        self.loops = loops
+        self.loop_totals = loop_totals
+        self.face_attributes = face_attributes if face_attributes is not None else {}
+        self.material_indices = material_indices
+        self.uvs = uvs
+
+    def loop_starts(self):
+        """
+        :return: first loop index of every face, int32 array
+        """
+        starts = np.zeros(len(self.loop_totals), dtype=np.int32)
+        np.cumsum(self.loop_totals[:-1], out=starts[1:])
+        return starts
+
+    def translated(self, dx, dy, dz=0.0):
+        """
+        Creates translated copy, face arrays are shared with this buffers.
+        UVs are kept, so textures move with the building
+        :param dx: x offset
+        :param dy: y offset
+        :param dz: z offset
+        :return: MeshBuffers
+        """
+        return MeshBuffers(self.vertices + (dx, dy, dz), self.loops, self.loop_totals, dict(self.face_attributes),
+                           self.material_indices, self.uvs)
+
+    def counts(self):
+        """
+        :return: tuple of vertices, edges, faces and triangles counts
+        """
+        starts = self.loop_starts()
+        following = np.arange(1, len(self.loops) + 1)
+        following[starts + self.loop_totals - 1] = starts
+        edges = np.sort(np.stack((self.loops, self.loops[following]), axis=-1), axis=1)
+        return (len(self.vertices), len(np.unique(edges, axis=0)), len(self.loop_totals),
+                int(np.sum(self.loop_totals - 2)))
+
+    def faces(self):
+        """
+        :return: faces as list of vertex indices lists, e.g. for Mesh.from_pydata
+        """
+        return [loop.tolist() for loop in np.split(self.loops, self.loop_starts()[1:])]
+
+    def to_mesh(self, mesh):
+        """
+        Writes buffers to an empty Blender mesh using bulk foreach_set calls
+        :param mesh: target mesh datablock, should have no geometry
+        """
+        with stage("upload") as timer:
+            mesh.vertices.add(len(self.vertices))
+            mesh.vertices.foreach_set("co", np.ascontiguousarray(self.vertices, dtype=np.float32).ravel())
+            mesh.loops.add(len(self.loops))
+            mesh.loops.foreach_set("vertex_index", self.loops)
+            mesh.polygons.add(len(self.loop_totals))
+            mesh.polygons.foreach_set("loop_start", self.loop_starts())
+            mesh.polygons.foreach_set("loop_total", self.loop_totals)
+            for name, values in self.face_attributes.items():
+                _face_int_layer(mesh, name, create=True).data.foreach_set("value", values)
+            if self.material_indices is not None:
+                mesh.polygons.foreach_set("material_index", self.material_indices)
+            if self.uvs is not None:
+                if not len(mesh.uv_layers):
+                    if hasattr(mesh.uv_layers, "new"):
+                        mesh.uv_layers.new(name="UVMap")
+                    else:
+                        mesh.uv_textures.new(name="UVMap")  # Blender 2.79
+                mesh.uv_layers[0].data.foreach_set("uv", np.ascontiguousarray(self.uvs, dtype=np.float32).ravel())
+            timer.items = len(self.loop_totals)
+        with stage("mesh update"):
+            mesh.update(calc_edges=True)
+
+    @classmethod
+    def from_mesh(cls, mesh, face_attributes=()):
+        """
+        Reads Blender mesh geometry using bulk foreach_get calls.
+        Material indices are read if mesh has materials, UVs - from the first UV layer
+        :param mesh: source mesh datablock
+        :param face_attributes: names of integer face attributes to read, missing ones are skipped
+        :return: MeshBuffers
+        """
+        vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", vertices)
+        loops = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loops)
+        loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        attributes = {}
+        for name in face_attributes:
+            layer = _face_int_layer(mesh, name)
+            if layer is not None:
+                values = np.empty(len(mesh.polygons), dtype=np.int32)
+                layer.data.foreach_get("value", values)
+                attributes[name] = values
+        material_indices = None
+        if len(mesh.materials):
+            material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+            mesh.polygons.foreach_get("material_index", material_indices)
+        uvs = None
+        if len(mesh.uv_layers):
+            uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+            mesh.uv_layers[0].data.foreach_get("uv", uvs)
+            uvs = uvs.reshape(-1, 2)
+        return cls(vertices.reshape(-1, 3), loops, loop_totals, attributes, material_indices, uvs)
+
+# end MeshBuffers
+
+
+def _face_int_layer(mesh, name, create=False):
+    """
+    Finds integer face attribute layer of Blender mesh - generic attribute on 2.91+,
+    polygon int layer before
+    :param mesh: mesh datablock
+    :param name: attribute name
+    :param create: create layer if it's missing
+    :return: layer or None
+    """
+    if hasattr(mesh, "attributes"):
+        layer = mesh.attributes.get(name)
+        if layer is None and create:
+            layer = mesh.attributes.new(name, "INT", "FACE")
+    else:
+        layer = mesh.polygon_layers_int.get(name)
+        if layer is None and create:
+            layer = mesh.polygon_layers_int.new(name=name)
+    return layer
+
+
+def _cross(a, b):
+    """
+    Cross product of (..., 3) arrays, faster than np.cross for short rows
+    """
+    return np.stack((a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+                     a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+                     a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]), axis=-1)
+
+
+def face_normals(vertices, loops, loop_totals):
+    """
+    :param vertices: vertices (N, 3) array
+    :param loops: face loops vertex indices array
+    :param loop_totals: face loop totals array
+    :return: face normals (F, 3) array, not normalized
+    """
+    starts = np.zeros(len(loop_totals), dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=starts[1:])
+    points = np.take(vertices, loops, axis=0)
+    # Quads are planar, their normal is cross product of diagonals
+    normals = np.empty((len(loop_totals), 3))
+    is_quad = loop_totals == 4
+    quads = starts[is_quad]
+    normals[is_quad] = _cross(points[quads + 2] - points[quads], points[quads + 3] - points[quads + 1])
+    if not is_quad.all():
+        # Newell's method for the rest, robust for concave faces
+        others = np.flatnonzero(~is_quad)
+        totals = loop_totals[others]
+        firsts = np.cumsum(totals) - totals
+        face_loops = np.repeat(starts[others] - firsts, totals) + np.arange(totals.sum())
+        following = face_loops + 1
+        following[firsts + totals - 1] = face_loops[firsts]
+        normals[others] = np.add.reduceat(_cross(points[face_loops], points[following]), firsts)
+    return normals
+
+
+def _roof_materials(normals):
+    """
+    Roof faces are roof material, except vertical ones like gable ends - they continue walls
+    :param normals: roof face normals (F, 3) array, not normalized
+    :return: material indices int32 array
+    """
+    is_vertical = np.abs(normals[:, 2]) <= np.linalg.norm(normals, axis=1) * 1e-6
+    return np.where(is_vertical, MATERIAL_WALL, MATERIAL_ROOF).astype(np.int32)
+
+
+def face_uvs(vertices, loops, loop_totals, normals=None):
+    """
+    Tiling friendly UVs - every face is projected onto its own plane with U along its horizontal
+    direction and 1 UV unit per meter, so faces of the same wall plane get continuous UVs
+    and window reveals or sloped roofs aren't stretched
+    :param vertices: vertices (N, 3) array
+    :param loops: face loops vertex indices array
+    :param loop_totals: face loop totals array
+    :param normals: face normals (F, 3) array if known, see face_normals
+    :return: loop UVs (L, 2) float32 array
+    """
+    if not len(loop_totals):
+        return np.empty((0, 2), dtype=np.float32)
+    if normals is None:
+        normals = face_normals(vertices, loops, loop_totals)
+    lengths = np.sqrt(np.einsum("ij,ij->i", normals, normals))
+    lengths[lengths <= 0] = np.inf  # degenerate face gets zero normal, treated as horizontal
+    nx, ny, nz = (normals / lengths[:, None]).T
+    # U goes to the right of a viewer facing the face, V up the face: u = z x n, v = n x u;
+    # horizontal faces get x, y axes (mirrored for faces looking down)
+    widths = np.hypot(nx, ny)
+    is_flat = widths <= 1e-9
+    widths[is_flat] = 1.0
+    u_x = np.where(is_flat, 1.0, -ny / widths)
+    u_y = np.where(is_flat, 0.0, nx / widths)
+    v_x = np.where(is_flat, 0.0, -nz * nx / widths)
+    v_y = np.where(is_flat, nz, -nz * ny / widths)
+    v_z = np.where(is_flat, 0.0, widths)
+    x, y, z = (np.take(vertices[:, axis], loops) for axis in range(3))
+    uvs = np.empty((len(loops), 2), dtype=np.float32)
+    uvs[:, 0] = np.repeat(u_x, loop_totals) * x + np.repeat(u_y, loop_totals) * y
+    uvs[:, 1] = np.repeat(v_x, loop_totals) * x + np.repeat(v_y, loop_totals) * y + np.repeat(v_z, loop_totals) * z
+    return uvs
+
+
+def rectangle_corners(location_x, location_y, length_x, length_y):
+    """
+    Generates rectangular footprint corners centered at given location
+    :param location_x: center x position
+    :param location_y: center y position
+    :param length_x: X size, m
+    :param length_y: Y size, m
+    :return: corners list, in walls order
+    """
+    delta_x = location_x - length_x / 2
+    delta_y = location_y - length_y / 2
+    return [
+        (delta_x, delta_y),
+        (delta_x, delta_y + length_y),
+        (delta_x + length_x, delta_y + length_y),
+        (delta_x + length_x, delta_y)]
+
+
+def footprint_corners(points):
+    """
+    Normalizes building footprint polygon: repeated points, including closing point equal
+    to the first one, are dropped and corners are ordered clockwise, so walls face outwards
+    :param points: footprint polygon (x, y) points
+    :return: corners (N, 2) array, in walls order
+    """
+    corners = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    corners = corners[np.any(corners != np.concatenate((corners[-1:], corners[:-1])), axis=1)]
+    if len(corners) < 3:
+        raise ValueError("Footprint needs at least 3 distinct points, got {}".format(len(corners)))
+    x, y = corners.T
+    # Shoelace formula, positive area is counter-clockwise
+    if x[:-1].dot(y[1:]) - x[1:].dot(y[:-1]) + x[-1] * y[0] - x[0] * y[-1] > 0:
+        corners = corners[::-1]
+    return corners
+
+
+def generate_ring(corners, walls_segs):
+    """
+    Generates building perimeter columns - wall start corner plus every segment border,
+    walking footprint corners in order
+    :param corners: footprint corners list of (x, y) tuples
+    :param walls_segs: wall segments arrays list, one per wall (see generate_wall_segs)
+    :return: tuple of columns (x, y) array, window column flags array and outer column normals array
+    """
+    corners = np.asarray(corners, dtype=np.float64)
+    counts = np.array([len(wall_segs) for wall_segs in walls_segs])
+    segs = np.concatenate([np.asarray(wall_segs, dtype=np.float64) for wall_segs in walls_segs])
+    directions = np.roll(corners, -1, axis=0) - corners
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    # Column index -> its wall and offset from the wall start corner
+    walls = np.repeat(np.arange(len(counts)), counts)
+    firsts = np.repeat(np.cumsum(counts) - counts, counts)
+    offsets = np.cumsum(segs) - segs
+    offsets -= offsets[firsts]
+    directions = directions[walls]
+    columns = corners[walls] + offsets[:, None] * directions
+    window_flags = (np.arange(len(segs)) - firsts) % 2 == 1
+    normals = np.column_stack((-directions[:, 1], directions[:, 0], np.zeros(len(segs))))
+    return columns, window_flags, normals
+
+
+def _ring_quads(outer, inner):
+    """
+    Quads connecting two rings of window corners, with the same winding as the window face
+    :param outer: outer ring vertex indices (W, 4) array
+    :param inner: inner ring vertex indices (W, 4) array
+    :return: quads (W, 4, 4) array
+    """
+    return np.stack((outer, np.roll(outer, -1, axis=1), np.roll(inner, -1, axis=1), inner), axis=-1)
+
+
+# Segments and depths up to this length are treated as zero, their vertices are shared, m
+WELD_DISTANCE = 1e-6
+
+# Window corners (top right, bottom right, bottom left, top left) shift to window center,
+# along the wall direction and up
+_FRAME_ALONG = np.array((-1.0, -1.0, 1.0, 1.0))
+_FRAME_UP = np.array((-1.0, 1.0, 1.0, -1.0))
+
+# Balcony slab under window: depth out of the wall, thickness and margin beyond window sides, m
+BALCONY_DEPTH = 0.8
+BALCONY_THICKNESS = 0.15
+BALCONY_MARGIN = 0.2
+# Slab corners as (side, out, up) steps from window bottom left corner; faces but the one on the wall
+_SLAB_CORNERS = np.array([(side, out, up) for side in (0, 1) for out in (0, 1) for up in (0, 1)], dtype=np.float64)
+_SLAB_QUADS = np.array((
+    (1, 5, 7, 3),  # top
+    (2, 6, 4, 0),  # bottom
+    (7, 6, 2, 3),  # front
+    (4, 6, 7, 5),  # right
+    (1, 3, 2, 0),  # left
+))
+
+
+def _corner_cols(walls_segs):
+    """
+    :param walls_segs: wall segments arrays list
+    :return: ring column index of every wall start corner
+    """
+    counts = [len(wall_segs) for wall_segs in walls_segs]
+    return np.cumsum([0] + counts[:-1])
+
+
+def generate_walls(corners, walls_segs, height_segs, wnd_depth=0.2, wnd_frame=0.0, windows=True,
+                   roof_type=ROOF_FLAT, roof_pitch=30.0, bay_seed=0, blank_bays=0.0, balconies=0.0):
+    """
+    Generates whole building geometry - walls, windows and roof - as flat arrays.
+    Window is a frame ring in wall plane and a pane recessed into the wall, connected by side quads.
+    Roof is triangulated, see generate_roof
+    :param corners: footprint corners list of (x, y) tuples
+    :param walls_segs: wall segments arrays list, one per wall (see generate_wall_segs)
+    :param height_segs: height segments array generated by generate_height_segs
+    :param wnd_depth: window pane depth into the wall, m
+    :param wnd_frame: window frame width, m; no frame ring is generated for 0
+    :param windows: if False, windows are left as flat wall quads
+    :param roof_type: ROOF_FLAT, ROOF_GABLED, ROOF_HIPPED or ROOF_PYRAMID
+    :param roof_pitch: roof slope angle, degrees
+    :param bay_seed: seed of window bay kinds, see variation.bay_kinds
+    :param blank_bays: probability of a window bay to be left as plain wall
+    :param balconies: probability of a window bay to get a balcony slab under it
+    :return: MeshBuffers with generated geometry
+    """
+    with stage("ring") as timer:
+        ring, window_cols, col_normals = generate_ring(corners, walls_segs)
+        timer.items = len(ring)
+    cols = len(ring)
+    rows = len(height_segs)
+
+    with stage("vertices") as timer:
+        # Column or row after zero length segment coincides with the previous one and shares its
+        # vertices, so every vertex is created once; ids index unique columns and rows
+        col_sizes = np.concatenate([np.asarray(wall_segs, dtype=np.float64) for wall_segs in walls_segs])
+        row_sizes = np.asarray(height_segs, dtype=np.float64)
+        new_cols = np.roll(col_sizes, 1) > WELD_DISTANCE
+        new_rows = np.concatenate(([True], row_sizes > WELD_DISTANCE))
+        col_ids = (np.cumsum(new_cols) - 1) % max(np.count_nonzero(new_cols), 1)
+        row_ids = np.cumsum(new_rows) - 1
+        unique_cols = np.count_nonzero(new_cols)
+        heights = np.concatenate(([0.0], np.cumsum(height_segs)))
+        grid = np.empty((np.count_nonzero(new_rows), unique_cols, 3))
+        grid[:, :, :2] = ring[new_cols][None, :, :]
+        grid[:, :, 2] = heights[new_rows][:, None]
+        wall_verts = grid.reshape(-1, 3)
+        timer.items = len(wall_verts)
+
+    with stage("faces") as timer:
+        idx = row_ids[:, None] * unique_cols + col_ids[None, :]
+        nxt = np.roll(idx, -1, axis=1)
+        # (top right, bottom right, bottom left, top left) - outer normal is cross(up, wall direction)
+        quads = np.stack((nxt[1:], nxt[:-1], idx[:-1], idx[1:]), axis=-1)
+        window_rows = (np.arange(rows) % 2 == 1) & windows
+        is_window = window_rows[:, None] & window_cols[None, :]
+        cells = np.flatnonzero(is_window)
+        kinds = bay_kinds(int(bay_seed), blank_bays, balconies, cells)
+        is_window.flat[cells[kinds == BAY_BLANK]] = False
+        is_balcony = kinds[kinds != BAY_BLANK] == BAY_BALCONY
+        # Zero size cells would be degenerate faces
+        is_plain = ~is_window & (row_sizes[:, None] > WELD_DISTANCE) & (col_sizes[None, :] > WELD_DISTANCE)
+        plain_cols = np.nonzero(is_plain)[1]
+        plain_quads = quads[is_plain]
+        wnd_quads = quads[is_window]
+        timer.items = rows * cols
+
+    with stage("windows") as timer:
+        wnd_count = len(wnd_quads)
+        normals = col_normals[np.nonzero(is_window)[1]][:, None, :]
+        ring_verts = wall_verts[wnd_quads]
+        ring = wnd_quads
+        new_verts = []
+        ring_faces = []
+        if wnd_frame > 0:
+            along = np.stack((normals[:, :, 1], -normals[:, :, 0], np.zeros((wnd_count, 1))), axis=-1)
+            frame_verts = ring_verts + wnd_frame * (_FRAME_ALONG[None, :, None] * along +
+                                                    _FRAME_UP[None, :, None] * np.array((0.0, 0.0, 1.0)))
+            frame = len(wall_verts) + np.arange(wnd_count * 4).reshape(wnd_count, 4)
+            new_verts.append(frame_verts)
+            ring_faces.append(_ring_quads(ring, frame))
+            ring_verts = frame_verts
+            ring = frame
+        if wnd_depth > WELD_DISTANCE:
+            # Pane is pushed into the wall, opposite to outer normal
+            pane_verts = ring_verts - wnd_depth * normals
+            pane = len(wall_verts) + len(new_verts) * wnd_count * 4 + np.arange(wnd_count * 4).reshape(wnd_count, 4)
+            new_verts.append(pane_verts)
+            ring_faces.append(_ring_quads(ring, pane))
+        else:
+            pane = ring
+        # Slab top is window bottom edge, wall plane window corners are BR and BL
+        bottom_left = wall_verts[wnd_quads[is_balcony, 2]]
+        along = wall_verts[wnd_quads[is_balcony, 1]] - bottom_left
+        width = np.linalg.norm(along, axis=1)[:, None]
+        along /= width
+        steps = _SLAB_CORNERS[None, :, :]
+        slab_verts = (bottom_left[:, None, :] + (steps[..., 0:1] * (width[:, None] + 2 * BALCONY_MARGIN) -
+                                                 BALCONY_MARGIN) * along[:, None, :] +
+                      steps[..., 1:2] * BALCONY_DEPTH * normals[is_balcony] +
+                      (steps[..., 2:3] - 1) * BALCONY_THICKNESS * np.array((0.0, 0.0, 1.0))).reshape(-1, 3)
+        slab_quads = (8 * np.arange(np.count_nonzero(is_balcony)))[:, None, None] + _SLAB_QUADS[None, :, :]
+        timer.items = wnd_count
+
+    with stage("roof") as timer:
+        if unique_cols > 2:
+            roof_verts, roof_loops, roof_totals = generate_roof(
+                grid[-1, :, :2], np.unique(col_ids[_corner_cols(walls_segs)]), heights[-1], roof_type, roof_pitch)
+        else:
+            roof_verts, roof_loops, roof_totals = generate_roof(np.empty((0, 2)), [], 0.0)
+        timer.items = len(roof_totals)
+
+    with stage("assemble") as timer:
+        wall_count = len(wall_verts) + sum(len(verts) * 4 for verts in new_verts)
+        roof_index = np.concatenate((idx[-1][new_cols], wall_count + np.arange(len(roof_verts))))
+        vertices = np.concatenate(
+            [wall_verts] + [verts.reshape(-1, 3) for verts in new_verts] + [roof_verts, slab_verts])
+        loops = np.concatenate(
+            [plain_quads.ravel(), pane.ravel()] + [faces.ravel() for faces in ring_faces] +
+            [roof_index[roof_loops], wall_count + len(roof_verts) + slab_quads.ravel()])
+        roof_normals = face_normals(vertices, roof_index[roof_loops], roof_totals)
+        quad_count = len(plain_quads) + wnd_count * (1 + 4 * len(ring_faces))
+        loop_totals = np.concatenate((np.full(quad_count, 4, dtype=np.int32), roof_totals,
+                                      np.full(slab_quads.size // 4, 4, dtype=np.int32)))
+        # Frame ring goes first, window reveals are wall; balcony slabs are wall too
+        ring_materials = [MATERIAL_FRAME, MATERIAL_WALL] if wnd_frame > 0 else [MATERIAL_WALL]
+        material_indices = np.repeat(
+            np.array([MATERIAL_WALL, MATERIAL_GLASS] + ring_materials[:len(ring_faces)] + [
+                MATERIAL_ROOF, MATERIAL_WALL], dtype=np.int32),
+            [len(plain_quads), wnd_count] + [wnd_count * 4] * len(ring_faces) + [
+                len(roof_totals), slab_quads.size // 4])
+        material_indices[quad_count:quad_count + len(roof_totals)] = _roof_materials(roof_normals)
+        timer.items = len(loop_totals)
+
+    with stage("uvs") as timer:
+        # Normals of wall, window and balcony faces are known, only roof ones are computed
+        wnd_normals = normals[:, 0, :]
+        along = np.column_stack((wnd_normals[:, 1], -wnd_normals[:, 0], np.zeros(wnd_count)))
+        up = np.zeros((wnd_count, 3))
+        up[:, 2] = 1.0
+        # Ring quads go along window edges: right, bottom, left, top
+        ring_normals = [np.stack((-along, up, along, -up), axis=1)]
+        if wnd_frame > 0:
+            ring_normals.insert(0, np.repeat(normals, 4, axis=1))
+        slab_normals = np.stack((up, -up, wnd_normals, along, -along), axis=1)[is_balcony]
+        uvs = face_uvs(vertices, loops, loop_totals, np.concatenate(
+            [col_normals[plain_cols], wnd_normals] + [face.reshape(-1, 3) for face in ring_normals[:len(ring_faces)]] +
+            [roof_normals, slab_normals.reshape(-1, 3)]))
+        timer.items = len(uvs)
+    return MeshBuffers(vertices, loops.astype(np.int32), loop_totals, material_indices=material_indices, uvs=uvs)
+
+
+def generate_building(
+        location_x,
+        location_y,
+        length_x,
+        length_y,
+        level_height,
+        levels,
+        bottom_gap,
+        gap,
+        top_gap,
+        interval_width,
+        wnd_height,
+        wnd_width,
+        wnd_depth=0.2,
+        wnd_frame=0.0,
+        lod=0,
+        roof_type=ROOF_FLAT,
+        roof_pitch=30.0,
+        bay_seed=0,
+        blank_bays=0.0,
+        balconies=0.0):
+    """
+    Generates rectangular building geometry
+    :param location_x: building center x position
+    :param location_y: building center y position
+    :param length_x: Building X size, m
+    :param length_y: Building Y size, m
+    :param level_height: Building level height, m
+    :param levels: Building level count
+    :param bottom_gap: Bottom gap, m
+    :param gap: left/right min gap, m
+    :param top_gap: top gap, m
+    :param interval_width: interval width, m
+    :param wnd_height: window height, m
+    :param wnd_width: window width, m
+    :param wnd_depth: window pane depth into the wall, m
+    :param wnd_frame: window frame width, m
+    :param lod: level of detail - LOD_FULL, LOD_FLAT_WINDOWS or LOD_BOX
+    :param roof_type: ROOF_FLAT, ROOF_GABLED, ROOF_HIPPED or ROOF_PYRAMID
+    :param roof_pitch: roof slope angle, degrees
+    :param bay_seed: seed of window bay kinds, see variation.bay_kinds
+    :param blank_bays: probability of a window bay to be left as plain wall
+    :param balconies: probability of a window bay to get a balcony
+    :return: MeshBuffers with generated geometry
+    """
+    return generate_from_params(BuildingParams(
+        location_x,
+        location_y,
+        length_x,
+        length_y,
+        levels,
+        level_height,
+        wnd_width,
+        wnd_height,
+        interval_width,
+        gap,
+        top_gap,
+        bottom_gap,
+        wnd_depth,
+        wnd_frame,
+        lod,
+        roof_type,
+        roof_pitch,
+        bay_seed,
+        blank_bays,
+        balconies))
+
+
+# Levels of detail: full windows, flat window quads, plain box
+LOD_FULL = 0
+LOD_FLAT_WINDOWS = 1
+LOD_BOX = 2
+
+
+def building_layout(params, with_location=True, footprint=None):
+    """
+    Computes building footprint and facade segmentation - rectangular one of params size,
+    or one of given footprint polygon. For LOD_BOX every wall is a single segment spanning
+    whole building height
+    :param params: BuildingParams
+    :param with_location: if False, footprint is centered at the origin
+    :param footprint: footprint polygon (x, y) points relative to building location, see footprint_corners
+    :return: tuple of footprint corners list, wall segments arrays list and height segments array
+    """
+    height_segs, total_ht = generate_height_segs(
+        params.level_count, params.level_height, params.bottom_gap, params.wnd_height, params.top_gap)
+    if footprint is not None:
+        corners = footprint_corners(footprint)
+        if with_location:
+            corners = corners + (params.location_x, params.location_y)
+        lengths = np.linalg.norm(np.roll(corners, -1, axis=0) - corners, axis=1)
+        if params.lod >= LOD_BOX:
+            return corners, [[length] for length in lengths], [total_ht]
+        return corners, layout_walls(lengths, params.wnd_width, params.interval_width, params.gap), height_segs
+    cols_y, cols_x = layout_walls((params.size_y, params.size_x), params.wnd_width, params.interval_width, params.gap)
+    corners = rectangle_corners(
+        params.location_x if with_location else 0.0,
+        params.location_y if with_location else 0.0,
+        params.size_x,
+        params.size_y)
+    if params.lod >= LOD_BOX:
+        cols_x = [params.size_x]
+        cols_y = [params.size_y]
+        height_segs = [total_ht]
+    return corners, [cols_y, cols_x, cols_y, cols_x], height_segs
+
+
+def generate_from_params(params, with_location=True, footprint=None):
+    """
+    Generates building geometry from parameters table row
+    :param params: BuildingParams
+    :param with_location: if False, building is generated around the origin
+    :param footprint: footprint polygon (x, y) points relative to building location;
+    rectangle of params size_x, size_y if None
+    :return: MeshBuffers with generated geometry
+    """
+    with stage("segments"):
+        corners, walls_segs, height_segs = building_layout(params, with_location, footprint)
+    return generate_walls(corners, walls_segs, height_segs, params.wnd_depth, params.wnd_frame,
+                          params.lod == LOD_FULL, params.roof_type, params.roof_pitch,
+                          params.bay_seed, params.blank_bays, params.balconies)
+
+
+def topology_key(params, footprint=None):
+    """
+    Key equal for buildings with the same vertices and faces order, which differ only by vertex positions
+    :param params: BuildingParams
+    :param footprint: footprint polygon points, see building_layout
+    :return: tuple of wall segments counts, height segments count, window frame and depth flags,
+    level of detail, generated roof type, indices of welded zero length segments and window bay kinds
+    """
+    corners, walls_segs, height_segs = building_layout(params, False, footprint)
+    ring, window_cols, _ = generate_ring(corners, walls_segs)
+    sizes = np.concatenate([np.asarray(segs, dtype=np.float64) for segs in list(walls_segs) + [height_segs]])
+    key = tuple(len(wall_segs) for wall_segs in walls_segs) + (
+        len(height_segs), int(params.wnd_frame > 0), int(params.wnd_depth > WELD_DISTANCE), params.lod,
+        roof_kind(ring, _corner_cols(walls_segs), params.roof_type, params.roof_pitch)) + tuple(
+        np.flatnonzero(sizes <= WELD_DISTANCE).tolist())
+    if params.lod != LOD_FULL or (params.blank_bays <= 0 and params.balconies <= 0):
+        return key
+    window_rows = np.arange(len(height_segs)) % 2 == 1
+    cells = np.flatnonzero(window_rows[:, None] & window_cols[None, :])
+    return key + (-1,) + tuple(bay_kinds(int(params.bay_seed), params.blank_bays, params.balconies, cells).tolist())
+
+
+def is_basic_building(params, footprint=None):
+    """
+    Checks that building is made of walls with recessed windows and a flat roof only, so
+    simpler backends (e.g. geometry nodes) can generate it: full level of detail, rectangular
+    footprint, flat roof, no window frames, blank bays or balconies
+    :param params: BuildingParams
+    :param footprint: footprint polygon points, see building_layout
+    :return: True for basic building
+    """
+    return (footprint is None and params.lod == LOD_FULL and (params.roof_type == ROOF_FLAT or params.roof_pitch <= 0)
+            and params.wnd_frame <= 0 and params.blank_bays <= 0 and params.balconies <= 0)
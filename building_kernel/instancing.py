@@ -0,0 +1,190 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Instanced facades - every facade cell is a transformed copy of a shared unit module
+instead of unique geometry
+"""
+
+import numpy as np
+
+from .geometry import (
+    LOD_FULL,
+    MATERIAL_GLASS,
+    MATERIAL_WALL,
+    MeshBuffers,
+    _corner_cols,
+    _ring_quads,
+    _roof_materials,
+    building_layout,
+    face_normals,
+    face_uvs,
+    generate_ring,
+)
+from .roof import ROOF_FLAT, generate_roof
+from .variation import BAY_BLANK, bay_kinds
+
+WALL_MODULE = 0
+WINDOW_MODULE = 1
+
+
+class InstanceLayout(object):
+    """
+    Facade cells as module instances. Module is placed by its bottom left corner,
+    rotated around Z and scaled by cell width (X) and height (Z)
+    """
+    __slots__ = ("locations", "rotations", "scales", "modules")
+
+    def __init__(self, locations, rotations, scales, modules):
+        """
+        :param locations: cells bottom left corners (K, 3) array
+        :param rotations: rotation angles around Z (K,) array, radians
+        :param scales: module scales (K, 3) array
+        :param modules: module index (K,) int32 array, WALL_MODULE or window module index
+        """
+        self.locations = locations
+        self.rotations = rotations
+        self.scales = scales
+        self.modules = modules
+
+    def __len__(self):
+        return len(self.modules)
+
+    def matrices(self):
+        """
+        :return: instance transformation (K, 4, 4) matrices, translation * rotation * scale
+        """
+        cos = np.cos(self.rotations)
+        sin = np.sin(self.rotations)
+        matrices = np.zeros((len(self), 4, 4))
+        matrices[:, 0, 0] = cos * self.scales[:, 0]
+        matrices[:, 0, 1] = -sin * self.scales[:, 1]
+        matrices[:, 1, 0] = sin * self.scales[:, 0]
+        matrices[:, 1, 1] = cos * self.scales[:, 1]
+        matrices[:, 2, 2] = self.scales[:, 2]
+        matrices[:, :3, 3] = self.locations
+        matrices[:, 3, 3] = 1.0
+        return matrices
+
+# end InstanceLayout
+
+
+def generate_wall_module():
+    """
+    Generates plain wall module - unit quad in XZ plane facing +Y
+    :return: MeshBuffers
+    """
+    vertices = np.array(((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 0.0, 1.0), (0.0, 0.0, 1.0)))
+    loops = np.array((2, 1, 0, 3), dtype=np.int32)
+    loop_totals = np.array((4,), dtype=np.int32)
+    return MeshBuffers(vertices, loops, loop_totals, material_indices=np.array((MATERIAL_WALL,), dtype=np.int32),
+                       uvs=face_uvs(vertices, loops, loop_totals))
+
+
+def generate_window_module(wnd_depth=0.2):
+    """
+    Generates window bay module - unit window in XZ plane facing +Y, recessed along -Y.
+    Module is scaled along X and Z only, so window depth is kept for every window size.
+    Frame width would be scaled too, so module has no frame ring
+    :param wnd_depth: window pane depth into the wall, m
+    :return: MeshBuffers
+    """
+    outer = generate_wall_module()
+    inner = outer.vertices - (0.0, wnd_depth, 0.0)
+    quad = outer.loops
+    inner_quad = quad + 4
+    sides = _ring_quads(quad[None, :], inner_quad[None, :])[0]
+    vertices = np.concatenate((outer.vertices, inner))
+    loops = np.concatenate((inner_quad, sides.ravel())).astype(np.int32)
+    loop_totals = np.full(5, 4, dtype=np.int32)
+    return MeshBuffers(vertices, loops, loop_totals,
+                       material_indices=np.array((MATERIAL_GLASS,) + (MATERIAL_WALL,) * 4, dtype=np.int32),
+                       uvs=face_uvs(vertices, loops, loop_totals))
+
+
+def generate_instances(corners, walls_segs, height_segs, roof_type=ROOF_FLAT, roof_pitch=30.0, bay_seed=0,
+                       blank_bays=0.0, window_module=WINDOW_MODULE):
+    """
+    Generates facade cells instances and roof geometry
+    :param corners: footprint corners list of (x, y) tuples
+    :param walls_segs: wall segments arrays list, one per wall (see generate_wall_segs)
+    :param height_segs: height segments array generated by generate_height_segs
+    :param roof_type: roof type, see generate_roof
+    :param roof_pitch: roof slope angle, degrees
+    :param bay_seed: seed of window bay kinds, see variation.bay_kinds; balconies aren't instanced
+    :param blank_bays: probability of a window bay to be a plain wall module
+    :param window_module: module index of window cells, e.g. of a module with building window depth
+    :return: tuple of InstanceLayout and roof MeshBuffers
+    """
+    ring, window_cols, normals = generate_ring(corners, walls_segs)
+    widths = np.concatenate([np.asarray(wall_segs, dtype=np.float64) for wall_segs in walls_segs])
+    angles = np.arctan2(-normals[:, 0], normals[:, 1])
+    heights = np.asarray(height_segs, dtype=np.float64)
+    bottoms = np.concatenate(([0.0], np.cumsum(heights)))
+    cols = len(ring)
+    rows = len(heights)
+
+    locations = np.empty((rows, cols, 3))
+    locations[:, :, :2] = ring[None, :, :]
+    locations[:, :, 2] = bottoms[:-1, None]
+    scales = np.ones((rows, cols, 3))
+    scales[:, :, 0] = widths[None, :]
+    scales[:, :, 2] = heights[:, None]
+    window_rows = np.arange(rows) % 2 == 1
+    is_window = window_rows[:, None] & window_cols[None, :]
+    cells = np.flatnonzero(is_window)
+    is_window.flat[cells[bay_kinds(int(bay_seed), blank_bays, 0.0, cells) == BAY_BLANK]] = False
+    modules = np.where(is_window, window_module, WALL_MODULE)
+    layout = InstanceLayout(
+        locations.reshape(-1, 3),
+        np.tile(angles, rows),
+        scales.reshape(-1, 3),
+        modules.ravel().astype(np.int32))
+
+    roof_verts = np.empty((cols, 3))
+    roof_verts[:, :2] = ring
+    roof_verts[:, 2] = bottoms[-1]
+    if cols > 2:
+        new_verts, loops, loop_totals = generate_roof(ring, _corner_cols(walls_segs), bottoms[-1], roof_type, roof_pitch)
+        vertices = np.concatenate((roof_verts, new_verts))
+        normals = face_normals(vertices, loops, loop_totals)
+        roof = MeshBuffers(vertices, loops, loop_totals, material_indices=_roof_materials(normals),
+                           uvs=face_uvs(vertices, loops, loop_totals, normals))
+    else:
+        roof = MeshBuffers(roof_verts, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+    return layout, roof
+
+
+def generate_instanced_building(params, with_location=True, window_module=WINDOW_MODULE):
+    """
+    Generates instanced building from parameters table row. Window cells use window_module,
+    which should be made with generate_window_module(params.wnd_depth). Window frames, balconies
+    and levels of detail aren't instanced, buildings always get full facade cells
+    :param params: BuildingParams
+    :param with_location: if False, building is generated around the origin
+    :param window_module: module index of window cells
+    :return: tuple of InstanceLayout and roof MeshBuffers
+    """
+    corners, walls_segs, height_segs = building_layout(params._replace(lod=LOD_FULL), with_location)
+    return generate_instances(corners, walls_segs, height_segs, params.roof_type, params.roof_pitch,
+                              params.bay_seed, params.blank_bays, window_module)
@@ -0,0 +1,112 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Wall and height segmentation of building facades
+"""
+
+import numpy as np
+
+
+def window_counts(lengths, wnd_width, interval_width, min_gap):
+    """
+    Closed form window count of walls - as many windows as fit between minimal gaps,
+    no windows if even a single one doesn't fit. Exact fits within 1e-9 m count,
+    the same as in the geometry nodes group
+    :param lengths: walls lengths array, m
+    :param wnd_width: window width, m
+    :param interval_width: interval width, m
+    :param min_gap: minimal left/right gap, m
+    :return: window counts int array
+    """
+    free = np.asarray(lengths, dtype=np.float64) - min_gap * 2
+    spare = free - wnd_width + 1e-9
+    fits = spare >= 0
+    counts = np.floor(np.where(fits, spare, 0) / (wnd_width + interval_width)) + 1
+    return np.where(fits, counts, 0).astype(np.int64)
+
+
+def layout_walls(lengths, wnd_width, interval_width, min_gap):
+    """
+    Generates segments of many walls at once. Wall with windows is
+    (gap, window, interval, window, ..., window, gap) with windows centered,
+    so single window is in the wall middle; wall without windows is a single segment
+    :param lengths: walls lengths array, m
+    :param wnd_width: window width, m
+    :param interval_width: interval width, m
+    :param min_gap: minimal left/right gap, m
+    :return: segment lengths arrays list, one per wall
+    """
+    lengths = np.asarray(lengths, dtype=np.float64)
+    counts = window_counts(lengths, wnd_width, interval_width, min_gap)
+    gaps = np.where(counts > 0, (lengths - (wnd_width + interval_width) * (counts - 1) - wnd_width) / 2, lengths)
+    sizes = np.where(counts > 0, counts * 2 + 1, 1)
+    firsts = np.cumsum(sizes) - sizes
+    positions = np.arange(sizes.sum()) - np.repeat(firsts, sizes)
+    segs = np.where(positions % 2 == 1, float(wnd_width), float(interval_width))
+    segs[firsts] = gaps
+    segs[firsts + sizes - 1] = gaps
+    return np.split(segs, firsts[1:])
+
+
+def generate_wall_segs(length, wnd_width, interval_width, min_gap):
+    """
+    Generates wall segments (windows, intervals) lengths array, see layout_walls
+    :param length: wall length, m
+    :param wnd_width: window width, m
+    :param interval_width: interval width, m
+    :param min_gap: minimal left/right gap, m
+    :return: segment lengths array
+    """
+    return layout_walls([length], wnd_width, interval_width, min_gap)[0].tolist()
+
+
+def generate_height_segs(
+        levels,
+        level_height,
+        bottom_gap,
+        wnd_height,
+        top_gap):
+    """
+    Generate height segments array
+    :param levels: Building levels count
+    :param level_height: level height, m
+    :param bottom_gap: bottom gap, m
+    :param wnd_height: wnd height,m
+    :param top_gap: top gap, m
+    :return: heights list
+    """
+    height_segs = []
+    total_ht = 0
+    for i in range(levels):
+        if i == 0:
+            height_segs.append(bottom_gap)
+        else:
+            height_segs.append(level_height - wnd_height)
+        total_ht += height_segs[-1]
+        height_segs.append(wnd_height)
+        total_ht += height_segs[-1]
+        if i == levels - 1:
+            height_segs.append(top_gap)
+            total_ht += height_segs[-1]
+    return height_segs, total_ht
@@ -0,0 +1,98 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Merging many buildings into shared mesh buffers, each face keeps id of its building
+"""
+
+import numpy as np
+
+from .geometry import MeshBuffers
+
+BUILDING_ID = "building_id"
+
+
+def merge_buffers(buffers_list, building_ids=None):
+    """
+    Appends buildings geometry into single buffers
+    :param buffers_list: MeshBuffers list
+    :param building_ids: ids to store in BUILDING_ID face attribute, one per buffers;
+        if None, face attributes present in all buffers are merged as is
+    :return: merged MeshBuffers; material indices and UVs are kept if all buffers have them
+    """
+    if not buffers_list:
+        return MeshBuffers(np.empty((0, 3)), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+    vert_counts = [len(buffers.vertices) for buffers in buffers_list]
+    offsets = np.concatenate(([0], np.cumsum(vert_counts)[:-1]))
+    vertices = np.concatenate([buffers.vertices for buffers in buffers_list])
+    loops = np.concatenate([buffers.loops + offset for buffers, offset in zip(buffers_list, offsets)])
+    loop_totals = np.concatenate([buffers.loop_totals for buffers in buffers_list])
+
+    names = set(buffers_list[0].face_attributes)
+    for buffers in buffers_list[1:]:
+        names &= set(buffers.face_attributes)
+    attributes = dict((name, np.concatenate([buffers.face_attributes[name] for buffers in buffers_list]))
+                      for name in names)
+    if building_ids is not None:
+        face_counts = [len(buffers.loop_totals) for buffers in buffers_list]
+        attributes[BUILDING_ID] = np.repeat(np.asarray(list(building_ids), dtype=np.int32), face_counts)
+    material_indices = None
+    if all(buffers.material_indices is not None for buffers in buffers_list):
+        material_indices = np.concatenate([buffers.material_indices for buffers in buffers_list])
+    uvs = None
+    if all(buffers.uvs is not None for buffers in buffers_list):
+        uvs = np.concatenate([buffers.uvs for buffers in buffers_list])
+    return MeshBuffers(vertices, loops.astype(np.int32), loop_totals, attributes, material_indices, uvs)
+
+
+def remove_buildings(buffers, building_ids):
+    """
+    Removes buildings faces from merged buffers, vertices left unused are removed too
+    :param buffers: merged MeshBuffers with BUILDING_ID face attribute
+    :param building_ids: ids of buildings to remove
+    :return: new MeshBuffers
+    """
+    keep_faces = ~np.isin(buffers.face_attributes[BUILDING_ID], list(building_ids))
+    keep_loops = np.repeat(keep_faces, buffers.loop_totals)
+    loops = buffers.loops[keep_loops]
+    used = np.zeros(len(buffers.vertices), dtype=bool)
+    used[loops] = True
+    remap = np.cumsum(used, dtype=np.int32) - 1
+    attributes = dict((name, values[keep_faces]) for name, values in buffers.face_attributes.items())
+    return MeshBuffers(
+        buffers.vertices[used], remap[loops], buffers.loop_totals[keep_faces], attributes,
+        None if buffers.material_indices is None else buffers.material_indices[keep_faces],
+        None if buffers.uvs is None else buffers.uvs[keep_loops])
+
+
+def replace_building(buffers, building_id, building):
+    """
+    Replaces single building geometry in merged buffers
+    :param buffers: merged MeshBuffers with BUILDING_ID face attribute
+    :param building_id: id of building to replace
+    :param building: new building MeshBuffers
+    :return: new MeshBuffers
+    """
+    return merge_buffers([
+        remove_buildings(buffers, [building_id]),
+        merge_buffers([building], [building_id])])
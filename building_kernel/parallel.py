@@ -0,0 +1,133 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Building generation in a pool of worker processes. Workers return merged chunk geometry
+through shared memory, so the caller only copies ready arrays
+"""
+
+import multiprocessing
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8, buffers are sent pickled
+    shared_memory = None
+
+from .cache import GeometryCache
+from .geometry import MeshBuffers
+from .merge import BUILDING_ID, merge_buffers
+from .table import BuildingParams
+
+# Worker process geometry cache
+_worker_cache = None
+
+
+def _generate_chunk(task):
+    """
+    Worker entry point - generates chunk of buildings merged into single buffers
+    :param task: tuple of first building id and building parameter tuples list
+    :return: buffers descriptor, see _to_shared
+    """
+    global _worker_cache
+    if _worker_cache is None:
+        _worker_cache = GeometryCache()
+    start, rows = task
+    buffers = merge_buffers(
+        [_worker_cache.generate(BuildingParams(*row)) for row in rows],
+        range(start, start + len(rows)))
+    arrays = (
+        ("vertices", buffers.vertices.astype(np.float32)),
+        ("loops", buffers.loops),
+        ("loop_totals", buffers.loop_totals),
+        (BUILDING_ID, buffers.face_attributes[BUILDING_ID]),
+        ("material_indices", buffers.material_indices),
+        ("uvs", buffers.uvs),
+    )
+    return _to_shared(tuple((name, array) for name, array in arrays if array is not None))
+
+
+def _to_shared(arrays):
+    """
+    Copies arrays into a new shared memory block
+    :param arrays: tuple of (name, array) pairs
+    :return: tuple of shared memory name (None if arrays are passed as is) and
+        list of (name, dtype, shape, offset or array) tuples
+    """
+    if shared_memory is None:
+        return None, [(name, array.dtype.str, array.shape, array) for name, array in arrays]
+    size = sum(array.nbytes for _, array in arrays)
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    layout = []
+    offset = 0
+    for name, array in arrays:
+        np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset)[...] = array
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    block.close()
+    return block.name, layout
+
+
+def _from_shared(descriptor):
+    """
+    Reads buffers written by worker and frees shared memory block
+    :param descriptor: _to_shared result
+    :return: MeshBuffers
+    """
+    block_name, layout = descriptor
+    if block_name is None:
+        arrays = dict((name, data) for name, _, _, data in layout)
+    else:
+        block = shared_memory.SharedMemory(name=block_name)
+        try:
+            arrays = dict((name, np.ndarray(shape, dtype, buffer=block.buf, offset=offset).copy())
+                          for name, dtype, shape, offset in layout)
+        finally:
+            block.close()
+            block.unlink()
+    return MeshBuffers(arrays["vertices"], arrays["loops"], arrays["loop_totals"],
+                       {BUILDING_ID: arrays[BUILDING_ID]}, arrays.get("material_indices"), arrays.get("uvs"))
+
+
+def generate_parallel(params_list, processes=None, chunk_size=1000, executable=None):
+    """
+    Generates buildings in worker processes, chunk by chunk. Chunks are yielded in order
+    as merged buffers with building_id face attribute set to parameters list index
+    :param params_list: BuildingParams list
+    :param processes: worker processes count, CPU count if None
+    :param chunk_size: max buildings count per chunk
+    :param executable: Python interpreter to start workers with, e.g. when running embedded
+    :return: MeshBuffers generator
+    """
+    context = multiprocessing.get_context("spawn")
+    if executable is not None:
+        context.set_executable(executable)
+    tasks = [(start, [tuple(params) for params in params_list[start:start + chunk_size]])
+             for start in range(0, len(params_list), chunk_size)]
+    pool = context.Pool(processes)
+    try:
+        for descriptor in pool.imap(_generate_chunk, tasks):
+            yield _from_shared(descriptor)
+    finally:
+        pool.terminate()
@@ -0,0 +1,169 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Opt-in per stage timing of building generation, accumulated across any number of buildings
+"""
+
+import time
+from collections import OrderedDict
+
+
+class StageStats(object):
+    """
+    Accumulated stage statistics
+    """
+    __slots__ = ("calls", "seconds", "items")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.items = 0
+
+# end StageStats
+
+
+class Profiler(object):
+    """
+    Collects time, calls and processed items (vertices, faces...) count per stage name
+    """
+
+    def __init__(self):
+        self.stages = OrderedDict()
+
+    def add(self, name, seconds, items=0):
+        """
+        Records single stage run
+        :param name: stage name
+        :param seconds: stage duration
+        :param items: items processed by stage
+        """
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.items += items
+
+    def reset(self):
+        self.stages.clear()
+
+    def report(self):
+        """
+        :return: list of (stage name, calls, seconds, items) tuples, in first run order
+        """
+        return [(name, stats.calls, stats.seconds, stats.items) for name, stats in self.stages.items()]
+
+    def format(self):
+        """
+        :return: report as text lines
+        """
+        return ["{}: {} calls, {:.2f} ms, {} items".format(name, calls, seconds * 1000, items)
+                for name, calls, seconds, items in self.report()]
+
+# end Profiler
+
+
+class _Stage(object):
+    """
+    Context manager timing single stage run, set items attribute to record processed items count
+    """
+    __slots__ = ("profiler", "name", "items", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.items = 0
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.profiler.add(self.name, time.perf_counter() - self.start, self.items)
+
+
+class _NullStage(object):
+    """
+    Stage used while profiling is disabled, does nothing
+    """
+    items = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+_profiler = None
+
+
+def enable_profiling(profiler=None):
+    """
+    Enables stage timing of all following generation calls
+    :param profiler: Profiler to collect stats into, new one if None
+    :return: active Profiler
+    """
+    global _profiler
+    _profiler = profiler if profiler is not None else Profiler()
+    return _profiler
+
+
+def disable_profiling():
+    """
+    Disables stage timing
+    :return: Profiler which was active, or None
+    """
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    return profiler
+
+
+def get_profiler():
+    """
+    :return: active Profiler, None if profiling is disabled
+    """
+    return _profiler
+
+
+def stage(name):
+    """
+    Times a generation stage, if profiling is enabled:
+
+        with stage("faces") as s:
+            ...
+            s.items = faces_count
+
+    :param name: stage name
+    :return: context manager
+    """
+    if _profiler is None:
+        return _NULL_STAGE
+    return _Stage(_profiler, name)
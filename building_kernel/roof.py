@@ -0,0 +1,271 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+
+"""
+Roof generation - flat, gabled, hipped and pyramid roofs over building top ring,
+emitted as triangles, so Blender doesn't tessellate roof n-gon on every evaluation
+"""
+
+import numpy as np
+
+# Roof types
+ROOF_FLAT = 0
+ROOF_GABLED = 1
+ROOF_HIPPED = 2
+ROOF_PYRAMID = 3
+
+# Relative tolerance of collinear corners and right angles
+_EPSILON = 1e-9
+
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def strict_corners(ring, corner_cols):
+    """
+    Footprint corners which aren't collinear with their neighbours
+    :param ring: top ring (N, 2) array, clockwise perimeter columns
+    :param corner_cols: ring index of every footprint corner, ascending
+    :return: ring indices array of strict corners
+    """
+    corner_cols = np.asarray(corner_cols, dtype=np.int64)
+    points = ring[corner_cols]
+    before = points - np.concatenate((points[-1:], points[:-1]))
+    after = np.concatenate((points[1:], points[:1])) - points
+    scale = np.linalg.norm(before, axis=1) * np.linalg.norm(after, axis=1)
+    return corner_cols[np.abs(_cross(before, after)) > _EPSILON * scale]
+
+
+def _is_convex(points):
+    """
+    :param points: clockwise polygon (N, 2) array without collinear corners
+    :return: True if polygon is convex
+    """
+    edges = np.concatenate((points[1:], points[:1])) - points
+    return bool(np.all(_cross(edges, np.concatenate((edges[1:], edges[:1]))) < 0))
+
+
+def _is_rectangle(points):
+    """
+    :param points: clockwise polygon (N, 2) array without collinear corners
+    :return: True if polygon is a rectangle
+    """
+    if len(points) != 4:
+        return False
+    edges = np.concatenate((points[1:], points[:1])) - points
+    lengths = np.linalg.norm(edges, axis=1)
+    dots = np.abs(np.einsum("ij,ij->i", edges, np.concatenate((edges[1:], edges[:1]))))
+    return bool(np.all(dots <= 1e-6 * lengths * np.concatenate((lengths[1:], lengths[:1]))))
+
+
+def _roof_kind(points, roof_type, pitch):
+    """
+    :param points: strict corners (N, 2) array
+    :return: roof type, see roof_kind
+    """
+    if roof_type == ROOF_FLAT or pitch <= 0 or len(points) < 3:
+        return ROOF_FLAT
+    if roof_type in (ROOF_GABLED, ROOF_HIPPED) and _is_rectangle(points):
+        lengths = np.linalg.norm(points[1:3] - points[:2], axis=1)
+        if roof_type == ROOF_GABLED or abs(lengths[0] - lengths[1]) > _EPSILON * lengths.max():
+            return roof_type
+    return ROOF_PYRAMID if _is_convex(points) else ROOF_FLAT
+
+
+def roof_kind(ring, corner_cols, roof_type, pitch):
+    """
+    Roof type actually generated for a footprint. Gabled and hipped roofs need rectangular
+    footprint, other convex footprints get pyramid roof; pyramid needs convex footprint,
+    concave footprints get flat roof. Square hipped roof is a pyramid
+    :param ring: top ring (N, 2) array, see generate_roof
+    :param corner_cols: ring index of every footprint corner, ascending
+    :param roof_type: requested roof type
+    :param pitch: roof slope angle, degrees
+    :return: roof type
+    """
+    ring = np.asarray(ring, dtype=np.float64)
+    return _roof_kind(ring[strict_corners(ring, corner_cols)], roof_type, pitch)
+
+
+def _zip_strip(eave, eave_pos, ridge, ridge_pos):
+    """
+    Triangulates sloped strip between eave and parallel ridge polylines, points of both
+    are visited in order of their positions along the strip.
+    :param eave: eave vertex indices, clockwise as the building ring
+    :param eave_pos: eave points positions along the strip
+    :param ridge: ridge vertex indices, same direction as eave
+    :param ridge_pos: ridge points positions along the strip
+    :return: triangles (T, 3) array, facing up and outwards
+    """
+    eave = np.asarray(eave)
+    ridge = np.asarray(ridge)
+    is_eave = np.concatenate((np.ones(len(eave) - 1, dtype=bool), np.zeros(len(ridge) - 1, dtype=bool)))
+    is_eave = is_eave[np.argsort(np.concatenate((eave_pos[1:], ridge_pos[1:])), kind="stable")]
+    i = np.cumsum(is_eave) - is_eave
+    j = np.cumsum(~is_eave) - ~is_eave
+    next_i = np.minimum(i + 1, len(eave) - 1)
+    next_j = np.minimum(j + 1, len(ridge) - 1)
+    return np.where(
+        is_eave[:, None],
+        np.stack((eave[next_i], eave[i], ridge[j]), axis=-1),
+        np.stack((eave[i], ridge[j], ridge[next_j]), axis=-1))
+
+
+def _fan(perimeter, apex):
+    """
+    :param perimeter: clockwise closed perimeter vertex indices, first one repeated at the end
+    :param apex: apex vertex index
+    :return: triangles (T, 3) array
+    """
+    perimeter = np.asarray(perimeter)
+    return np.stack((perimeter[1:], perimeter[:-1], np.full(len(perimeter) - 1, apex)), axis=-1)
+
+
+def _ear_clip(points):
+    """
+    Triangulates simple clockwise polygon without collinear corners by ear clipping
+    :param points: polygon (N, 2) array
+    :return: clockwise triangles list of polygon indices triples, None for self-intersecting polygon
+    """
+    indices = list(range(len(points)))
+    triangles = []
+    while len(indices) > 3:
+        for m in range(len(indices)):
+            a, b, c = indices[m - 1], indices[m], indices[(m + 1) % len(indices)]
+            pa, pb, pc = points[a], points[b], points[c]
+            if _cross(pb - pa, pc - pb) >= 0:
+                continue  # reflex corner
+            others = points[[index for index in indices if index not in (a, b, c)]]
+            inside = ((_cross(pb - pa, others - pa) <= 0) & (_cross(pc - pb, others - pb) <= 0) &
+                      (_cross(pa - pc, others - pc) <= 0))
+            if not inside.any():
+                triangles.append((a, b, c))
+                del indices[m]
+                break
+        else:
+            return None
+    triangles.append(tuple(indices))
+    return triangles
+
+
+def _flat_roof(ring, corners, height):
+    """
+    :return: tuple of new vertices (K, 3) array and triangles (T, 3) array, see generate_roof;
+    triangles are None if footprint is self-intersecting
+    """
+    count = len(ring)
+    if _is_convex(ring[corners]):
+        center = ring[corners].mean(axis=0)
+        return np.array(((center[0], center[1], height),)), _fan(np.arange(count + 1) % count, count)
+    triangles = _ear_clip(ring[corners])
+    if triangles is None:
+        return np.empty((0, 3)), None
+    vertices = []
+    faces = []
+    next_corner = dict(zip(corners.tolist(), np.roll(corners, -1).tolist()))
+    for triangle in triangles:
+        cols = [int(corners[index]) for index in triangle]
+        edges = list(zip(cols, cols[1:] + cols[:1]))
+        if not any(next_corner[start] == end and (end - start) % count > 1 for start, end in edges):
+            faces.append(np.array(cols[::-1])[None, :])
+            continue
+        # Triangle has perimeter points on its footprint edges, they are fanned from its center
+        triangle_perimeter = []
+        for start, end in edges:
+            if next_corner[start] == end:
+                triangle_perimeter.extend(((np.arange((end - start) % count) + start) % count).tolist())
+            else:
+                triangle_perimeter.append(start)
+        center = ring[cols].mean(axis=0)
+        faces.append(_fan(triangle_perimeter + triangle_perimeter[:1], count + len(vertices)))
+        vertices.append((center[0], center[1], height))
+    return np.array(vertices).reshape(-1, 3), np.concatenate(faces)
+
+
+def _triangle_faces(vertices, triangles):
+    """
+    :return: generate_roof result tuple for triangles (T, 3) array
+    """
+    return vertices, triangles.ravel().astype(np.int32), np.full(len(triangles), 3, dtype=np.int32)
+
+
+def generate_roof(ring, corner_cols, height, roof_type=ROOF_FLAT, pitch=30.0):
+    """
+    Generates roof over building top ring. Ring points are roof eaves, so roof shares
+    its vertices with walls
+    :param ring: top ring (N, 2) array, clockwise perimeter columns, see generate_ring
+    :param corner_cols: ring index of every footprint corner (first column of every wall), ascending
+    :param height: eaves height, m
+    :param roof_type: ROOF_FLAT, ROOF_GABLED, ROOF_HIPPED or ROOF_PYRAMID, see roof_kind
+    :param pitch: roof slope angle, degrees
+    :return: tuple of new vertices (K, 3) array, roof faces loops and loop totals arrays;
+    loop indices below N are ring points, N and above are new vertices. Faces are triangles,
+    self-intersecting footprint gets single n-gon
+    """
+    ring = np.asarray(ring, dtype=np.float64)
+    count = len(ring)
+    corners = strict_corners(ring, corner_cols)
+    if len(corners) < 3:
+        return np.empty((0, 3)), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    kind = _roof_kind(ring[corners], roof_type, pitch)
+    slope = np.tan(np.radians(pitch))
+    if kind == ROOF_FLAT:
+        vertices, triangles = _flat_roof(ring, corners, height)
+        if triangles is None:
+            return vertices, np.arange(count, dtype=np.int32)[::-1].copy(), np.array((count,), dtype=np.int32)
+        return _triangle_faces(vertices, triangles)
+    if kind == ROOF_PYRAMID:
+        points = ring[corners]
+        center = points.mean(axis=0)
+        edges = np.concatenate((points[1:], points[:1])) - points
+        distances = np.abs(_cross(edges, center - points)) / np.linalg.norm(edges, axis=1)
+        apex = (center[0], center[1], height + slope * distances.min())
+        return _triangle_faces(np.array((apex,)), _fan(np.arange(count + 1) % count, count))
+
+    # Rectangle, eaves are walls from corners[k] to corners[k + 1]; ridge is parallel to long walls
+    lengths = np.linalg.norm(ring[np.roll(corners, -1)] - ring[corners], axis=1)
+    first = 0 if lengths[0] >= lengths[1] else 1
+    length = lengths[first]
+    half_width = lengths[first + 1] / 2
+    start = ring[corners[first]]
+    direction = (ring[corners[first + 1]] - start) / length
+    inward = np.array((direction[1], -direction[0]))
+    inset = half_width if kind == ROOF_HIPPED else 0.0
+    ridge_height = height + slope * half_width
+    ridge = np.array([tuple(start + half_width * inward + offset * direction) + (ridge_height,)
+                      for offset in (inset, length - inset)])
+    ridge_pos = np.array((inset, length - inset))
+
+    faces = []
+    for wall, ridge_points in ((first, (count, count + 1)), (first + 2, (count + 1, count))):
+        wall_start, wall_end = corners[wall], corners[(wall + 1) % 4]
+        eave = np.arange(wall_start, wall_start + (wall_end - wall_start) % count + 1) % count
+        eave_pos = np.linalg.norm(ring[eave] - ring[wall_start], axis=1)
+        faces.append(_zip_strip(eave, eave_pos, ridge_points, ridge_pos))
+        # Gable or hip at the end of the long wall
+        end_start, end_end = wall_end, corners[(wall + 2) % 4]
+        end_eave = np.arange(end_start, end_start + (end_end - end_start) % count + 1) % count
+        faces.append(_fan(end_eave, ridge_points[1]))
+    return _triangle_faces(ridge, np.concatenate(faces))
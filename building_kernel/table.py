@@ -0,0 +1,237 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Building parameter tables - many buildings described as CSV, JSON or NumPy rows
+"""
+
+import csv
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+BuildingParams = namedtuple("BuildingParams", (
+    "location_x",
+    "location_y",
+    "size_x",
+    "size_y",
+    "level_count",
+    "level_height",
+    "wnd_width",
+    "wnd_height",
+    "interval_width",
+    "gap",
+    "top_gap",
+    "bottom_gap",
+    "wnd_depth",
+    "wnd_frame",
+    "lod",
+    "roof_type",
+    "roof_pitch",
+    "bay_seed",
+    "blank_bays",
+    "balconies",
+))
+# Same defaults as add-on building properties
+BuildingParams.__new__.__defaults__ = (0.0, 0.0, 30, 10, 3, 3.0, 1.46, 1.46, 1.5, 3.0, 1.0, 2.5, 0.2, 0.0, 0, 0, 30.0, 0, 0.0, 0.0)
+
+INT_FIELDS = ("size_x", "size_y", "level_count", "lod", "roof_type", "bay_seed")
+
+
+def params_from_record(record):
+    """
+    Creates building parameters from a mapping, e.g. CSV row or JSON object.
+    Missing fields get default values, unknown fields are ignored
+    :param record: mapping field name -> value (numbers or strings)
+    :return: BuildingParams
+    """
+    values = {}
+    for field in BuildingParams._fields:
+        value = record.get(field)
+        if value is None or value == "":
+            continue
+        if field in INT_FIELDS:
+            values[field] = int(round(float(value)))
+        else:
+            values[field] = float(value)
+    return BuildingParams(**values)
+
+
+def params_from_array(array):
+    """
+    Creates building parameters from NumPy array rows.
+    Structured arrays are matched by field names, plain 2D arrays should have
+    columns in BuildingParams fields order (trailing columns may be omitted)
+    :param array: structured or 2D NumPy array
+    :return: BuildingParams list
+    """
+    array = np.asarray(array)
+    if array.dtype.names:
+        names = array.dtype.names
+        return [params_from_record(dict(zip(names, row.tolist()))) for row in array]
+    if array.ndim != 2 or array.shape[1] > len(BuildingParams._fields):
+        raise ValueError("Expected 2D array with at most {} columns, got shape {}".format(
+            len(BuildingParams._fields), array.shape))
+    return [params_from_record(dict(zip(BuildingParams._fields, row))) for row in array.tolist()]
+
+
+def find_invalid(params_list):
+    """
+    Finds parameter rows that can't produce valid building geometry, checked for all rows at once
+    :param params_list: BuildingParams list
+    :return: list of (row index, problem description) pairs
+    """
+    values = np.array(params_list, dtype=np.float64).reshape(-1, len(BuildingParams._fields))
+    row = BuildingParams(*values.T)
+    with np.errstate(invalid="ignore"):
+        checks = (
+            (~np.isfinite(values).all(axis=1), "non-finite value"),
+            ((row.size_x < 1) | (row.size_y < 1), "size below 1 m"),
+            (row.level_count < 1, "no levels"),
+            ((row.level_height <= 0) | (row.wnd_width <= 0) | (row.wnd_height <= 0),
+             "level height or window size isn't positive"),
+            ((row.interval_width < 0) | (row.gap < 0) | (row.top_gap < 0) | (row.bottom_gap < 0) |
+             (row.wnd_depth < 0) | (row.wnd_frame < 0), "negative gap, interval, depth or frame"),
+            ((row.level_count > 1) & (row.level_height <= row.wnd_height), "window isn't lower than level"),
+            ((row.interval_width <= 0) & (row.wnd_frame <= 0), "adjacent windows have neither interval nor frame"),
+            (row.wnd_frame * 2 >= np.minimum(row.wnd_width, row.wnd_height), "frame is wider than half window"),
+            ((row.lod < 0) | (row.lod > 2), "unknown level of detail"),
+            ((row.roof_type < 0) | (row.roof_type > 3), "unknown roof type"),
+            ((row.roof_pitch < 0) | (row.roof_pitch >= 90), "roof pitch out of 0 - 90 degrees"),
+            (row.bay_seed < 0, "negative bay seed"),
+            ((row.blank_bays < 0) | (row.balconies < 0) | (row.blank_bays + row.balconies > 1),
+             "blank bays and balconies aren't probabilities"),
+        )
+    problems = []
+    for failed, message in checks:
+        problems.extend((index, message) for index in np.flatnonzero(failed).tolist())
+    return sorted(problems)
+
+
+def validate_table(params_list, max_reported=10, first_row=0):
+    """
+    Rejects parameters table with rows that can't produce valid building geometry
+    :param params_list: BuildingParams list
+    :param max_reported: max problems count listed in error message
+    :param first_row: table row index of the first params, for chunks of a table
+    :raise ValueError: if any row is invalid
+    """
+    problems = find_invalid(params_list)
+    if problems:
+        raise ValueError("{} invalid parameter rows: {}".format(
+            len(set(index for index, _ in problems)),
+            "; ".join("row {}: {}".format(first_row + index, message)
+                      for index, message in problems[:max_reported])))
+
+
+def read_table(path, validate=True):
+    """
+    Reads building parameters table, format is chosen by file extension:
+    .csv - header row with field names;
+    .json - list of objects, or object with "buildings" list;
+    .npy - structured or 2D array, see params_from_array;
+    .npz - one 1D array per field name
+    :param path: table file path
+    :param validate: reject table with invalid rows, see validate_table
+    :return: BuildingParams list
+    """
+    params_list = _read_rows(path)
+    if validate:
+        validate_table(params_list)
+    return params_list
+
+
+def iter_table(path, validate=True, chunk_size=1000):
+    """
+    Reads building parameters table lazily, see read_table. CSV rows are parsed as they are
+    read and .npy arrays are memory mapped, so only a chunk of rows is held in memory;
+    JSON and .npz tables are loaded at once. Rows are validated chunk by chunk, so an invalid
+    row raises ValueError after rows of previous chunks were yielded
+    :param path: table file path
+    :param validate: reject invalid rows, see validate_table
+    :param chunk_size: rows count parsed and validated at once
+    :return: BuildingParams iterator
+    """
+    first_row = 0
+    for chunk in _row_chunks(path, chunk_size):
+        if validate:
+            validate_table(chunk, first_row=first_row)
+        first_row += len(chunk)
+        for params in chunk:
+            yield params
+
+
+def _row_chunks(path, chunk_size):
+    """
+    :param path: table file path
+    :param chunk_size: max rows count in a chunk
+    :return: iterator of BuildingParams lists, see iter_table
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="") as f:
+            chunk = []
+            for row in csv.DictReader(f):
+                chunk.append(params_from_record(row))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        return
+    if ext == ".npy":
+        array = np.load(path, mmap_mode="r")
+        for start in range(0, len(array), chunk_size):
+            yield params_from_array(array[start:start + chunk_size])
+        return
+    params_list = _read_rows(path)
+    for start in range(0, len(params_list), chunk_size):
+        yield params_list[start:start + chunk_size]
+
+
+def _read_rows(path):
+    """
+    :param path: table file path
+    :return: BuildingParams list, see read_table
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        # Whole table as a single chunk of the streaming reader
+        return next(_row_chunks(path, float("inf")), [])
+    if ext == ".json":
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data["buildings"]
+        return [params_from_record(row) for row in data]
+    if ext == ".npy":
+        return params_from_array(np.load(path))
+    if ext == ".npz":
+        with np.load(path) as data:
+            columns = dict((name, data[name]) for name in data.files)
+        count = len(next(iter(columns.values()))) if columns else 0
+        return [params_from_record(dict((name, col[i]) for name, col in columns.items()))
+                for i in range(count)]
+    raise ValueError("Unsupported table format: {}".format(path))
@@ -0,0 +1,66 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+
+"""
+Spatial tiling of buildings - square grid cells by building location
+"""
+
+import numpy as np
+
+
+def tile_index(location_x, location_y, tile_size):
+    """
+    :param location_x: x position
+    :param location_y: y position
+    :param tile_size: grid cell size, m
+    :return: (column, row) tile index of the position
+    """
+    return int(np.floor(location_x / tile_size)), int(np.floor(location_y / tile_size))
+
+
+def tile_bounds(tile, tile_size):
+    """
+    :param tile: (column, row) tile index
+    :param tile_size: grid cell size, m
+    :return: tile (min x, min y, max x, max y)
+    """
+    return tile[0] * tile_size, tile[1] * tile_size, (tile[0] + 1) * tile_size, (tile[1] + 1) * tile_size
+
+
+def group_by_tile(params_list, tile_size):
+    """
+    Groups buildings into grid cells by their location
+    :param params_list: BuildingParams list
+    :param tile_size: grid cell size, m
+    :return: list of ((column, row) tile index, building indices array) pairs, ordered by tile
+    """
+    if not len(params_list):
+        return []
+    locations = np.array([(params.location_x, params.location_y) for params in params_list], dtype=np.float64)
+    tiles = np.floor(locations / tile_size).astype(np.int64)
+    order = np.lexsort((tiles[:, 1], tiles[:, 0]))
+    tiles = tiles[order]
+    starts = np.flatnonzero(np.concatenate(([True], np.any(tiles[1:] != tiles[:-1], axis=1))))
+    return [(tuple(tiles[start].tolist()), indices)
+            for start, indices in zip(starts, np.split(order, starts[1:]))]
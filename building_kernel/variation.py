@@ -0,0 +1,143 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Dmitry Karpenko (32kda), OnPositive
+# ----------------------------------------------------------
+
+
+"""
+Seeded variation of building parameters and facade bays. Every random value is a hash of
+(seed, building id) and its purpose, not a draw from a shared generator, so variation is
+the same regardless of generation order, chunking or worker processes
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .table import BuildingParams, params_from_array
+
+# Facade bay kinds
+BAY_WINDOW = 0
+BAY_BLANK = 1
+BAY_BALCONY = 2
+
+# Ranges are (min, max) tuples, None keeps table value; blank_bays and balconies are
+# probabilities of a window bay to be left blank or get a balcony
+Variation = namedtuple("Variation", (
+    "seed",
+    "level_count",
+    "wnd_width",
+    "gap",
+    "interval_width",
+    "blank_bays",
+    "balconies",
+))
+Variation.__new__.__defaults__ = (0, None, None, None, None, 0.0, 0.0)
+
+# Independent hash streams of varied values
+_VARIED_FIELDS = ("level_count", "wnd_width", "gap", "interval_width")
+_BAY_SEED_STREAM = len(_VARIED_FIELDS)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x):
+    """
+    SplitMix64 finalizer
+    :param x: uint64 array
+    :return: hashed uint64 array
+    """
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def hash_keys(seed, keys, stream=0):
+    """
+    :param seed: integer seed
+    :param keys: integer keys, e.g. building ids
+    :param stream: integer purpose of hashed values, different streams are independent
+    :return: uint64 hashes array, one per key
+    """
+    keys = np.atleast_1d(np.asarray(keys, dtype=np.int64)).astype(np.uint64)
+    # Arrays wrap around on overflow silently, scalars would warn
+    x = _mix(np.full(keys.shape, int(seed) & 0xFFFFFFFFFFFFFFFF, dtype=np.uint64) + _GOLDEN)
+    x = _mix(x ^ (np.full(keys.shape, int(stream) & 0xFFFFFFFF, dtype=np.uint64) * _GOLDEN))
+    return _mix(x ^ (keys * _GOLDEN))
+
+
+def random_uniform(seed, keys, stream=0):
+    """
+    Deterministic uniform random values, see hash_keys
+    :return: float array in [0, 1), one per key
+    """
+    return (hash_keys(seed, keys, stream) >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def vary_params(params_list, variation, building_ids=None):
+    """
+    Applies seeded variation to building parameters, vectorized over the whole table.
+    Varied rows aren't validated, see validate_table
+    :param params_list: BuildingParams list
+    :param variation: Variation
+    :param building_ids: building id per row, row index if None
+    :return: varied BuildingParams list; bay_seed, blank_bays and balconies fields
+    make facade bay patterns, see bay_kinds
+    """
+    values = np.array(params_list, dtype=np.float64).reshape(-1, len(BuildingParams._fields))
+    ids = np.arange(len(values)) if building_ids is None else np.asarray(building_ids)
+    for stream, field in enumerate(_VARIED_FIELDS):
+        limits = getattr(variation, field)
+        if limits is None:
+            continue
+        low, high = limits
+        u = random_uniform(variation.seed, ids, stream)
+        column = BuildingParams._fields.index(field)
+        if field == "level_count":
+            values[:, column] = np.minimum(np.floor(low + u * (high - low + 1)), high)
+        else:
+            values[:, column] = low + u * (high - low)
+    if variation.blank_bays > 0 or variation.balconies > 0:
+        # Building seed fits Blender integer property
+        values[:, BuildingParams._fields.index("bay_seed")] = (
+            hash_keys(variation.seed, ids, _BAY_SEED_STREAM) >> np.uint64(33)).astype(np.float64)
+        values[:, BuildingParams._fields.index("blank_bays")] = variation.blank_bays
+        values[:, BuildingParams._fields.index("balconies")] = variation.balconies
+    return params_from_array(values)
+
+
+def bay_kinds(bay_seed, blank_bays, balconies, cells):
+    """
+    Kinds of window bays of a building
+    :param bay_seed: building bay seed, see vary_params
+    :param blank_bays: probability of a bay to be left blank
+    :param balconies: probability of a bay to get a balcony
+    :param cells: facade cell index of every window bay
+    :return: BAY_WINDOW, BAY_BLANK or BAY_BALCONY int8 array, one per cell
+    """
+    kinds = np.zeros(len(cells), dtype=np.int8)
+    if blank_bays <= 0 and balconies <= 0:
+        return kinds
+    u = random_uniform(bay_seed, cells)
+    kinds[u < blank_bays + balconies] = BAY_BALCONY
+    kinds[u < blank_bays] = BAY_BLANK
+    return kinds
@@ -0,0 +1,62 @@
+import numpy as np
+
+import building_kernel
+from building_kernel import Archive, generate_from_params, params_from_record, write_archive
+
+
+def _write(tmp_path, rows):
+    path = str(tmp_path / "city.bgeo")
+    write_archive(path, [generate_from_params(params, False) for params in rows], rows)
+    return path
+
+
+def test_merged_buildings_are_placed_at_their_locations(tmp_path):
+    rows = [params_from_record({"location_x": x, "size_x": 30}) for x in (0, 40, 80)]
+    archive = Archive(_write(tmp_path, rows))
+    merged = archive.merged()
+    ids = np.repeat(merged.face_attributes[building_kernel.BUILDING_ID], merged.loop_totals)
+    for index, x in enumerate((0, 40, 80)):
+        xs = merged.vertices[merged.loops[ids == index], 0]
+        assert np.isclose(xs.min(), x - 15, atol=1e-4) and np.isclose(xs.max(), x + 15, atol=1e-4)
+
+
+def test_building_is_stored_around_origin(tmp_path):
+    rows = [params_from_record({"location_x": 100, "location_y": -50})]
+    archive = Archive(_write(tmp_path, rows))
+    buffers = archive.building(0)
+    expected = generate_from_params(rows[0], False)
+    assert np.allclose(buffers.vertices, expected.vertices, atol=1e-4)
+    assert np.array_equal(buffers.loops, expected.loops)
+    assert np.array_equal(buffers.loop_totals, expected.loop_totals)
+    assert archive.params(0) == rows[0]
+
+
+def test_merged_range_matches_buildings(tmp_path):
+    rows = [params_from_record({"location_x": 40 * i, "level_count": 1 + i}) for i in range(5)]
+    archive = Archive(_write(tmp_path, rows))
+    merged = archive.merged(1, 4)
+    assert len(merged.loop_totals) == sum(len(archive.building(i).loop_totals) for i in range(1, 4))
+    assert set(merged.face_attributes[building_kernel.BUILDING_ID].tolist()) == {1, 2, 3}
+
+
+def test_materials_and_uvs_round_trip(tmp_path):
+    rows = [params_from_record({"location_x": 40 * i, "roof_type": i}) for i in range(3)]
+    buffers_list = [generate_from_params(params, False) for params in rows]
+    archive = Archive(_write(tmp_path, rows))
+    for index, expected in enumerate(buffers_list):
+        buffers = archive.building(index)
+        assert np.array_equal(buffers.material_indices, expected.material_indices)
+        assert np.allclose(buffers.uvs, expected.uvs)
+    merged = archive.merged()
+    assert np.array_equal(merged.material_indices, np.concatenate([b.material_indices for b in buffers_list]))
+    assert np.allclose(merged.uvs, np.concatenate([b.uvs for b in buffers_list]))
+
+
+def test_geometry_without_materials(tmp_path):
+    buffers = generate_from_params(params_from_record({}), False)
+    buffers.material_indices = buffers.uvs = None
+    path = str(tmp_path / "plain.bgeo")
+    write_archive(path, [buffers])
+    archive = Archive(path)
+    assert archive.building(0).material_indices is None and archive.building(0).uvs is None
+    assert archive.params(0) is None
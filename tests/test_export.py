@@ -0,0 +1,89 @@
+import json
+import struct
+
+import numpy as np
+
+import building_kernel
+from building_kernel import export_buildings, generate_from_params, params_from_record
+
+
+def _rows():
+    return [params_from_record({"location_x": 40 * i, "level_count": 2 + i, "roof_type": i % 4,
+                                "wnd_frame": 0.1 * (i % 2)}) for i in range(5)]
+
+
+def _area(points):
+    # points (T, 3, 3) triangle corners
+    return np.linalg.norm(np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]), axis=1).sum() / 2
+
+
+def _faces_area(buffers):
+    triangles, _ = building_kernel.export._triangles(buffers.loop_totals)
+    return _area(buffers.vertices[buffers.loops[triangles]])
+
+
+def _read_glb(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack("<4sII", data[:12])
+    assert magic == b"glTF" and version == 2 and length == len(data)
+    json_length, _ = struct.unpack("<II", data[12:20])
+    gltf = json.loads(data[20:20 + json_length].decode("utf-8"))
+    bin_length, _ = struct.unpack("<II", data[20 + json_length:28 + json_length])
+    return gltf, data[28 + json_length:28 + json_length + bin_length]
+
+
+def _accessor(gltf, binary, index):
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = np.float32 if accessor["componentType"] == building_kernel.export.FLOAT else np.uint32
+    size = {"SCALAR": 1, "VEC2": 2, "VEC3": 3}[accessor["type"]]
+    return np.frombuffer(binary, dtype, accessor["count"] * size, view["byteOffset"]).reshape(-1, size)
+
+
+def test_glb_round_trip(tmp_path):
+    rows = _rows()
+    path = str(tmp_path / "city.glb")
+    assert export_buildings(path, rows, chunk_size=2) == len(rows)
+    gltf, binary = _read_glb(path)
+    area = 0.0
+    building_ids = set()
+    for mesh in gltf["meshes"]:
+        for primitive in mesh["primitives"]:
+            positions = _accessor(gltf, binary, primitive["attributes"]["POSITION"])
+            indices = _accessor(gltf, binary, primitive["indices"]).reshape(-1, 3)
+            # Back to Z up
+            z_up = np.column_stack((positions[:, 0], -positions[:, 2], positions[:, 1])).astype(np.float64)
+            area += _area(z_up[indices])
+            building_ids |= set(_accessor(gltf, binary, primitive["attributes"]["_BUILDING_ID"]).ravel().tolist())
+    assert len(gltf["meshes"]) == 3
+    assert building_ids == set(range(len(rows)))
+    assert np.isclose(area, sum(_faces_area(generate_from_params(params)) for params in rows), rtol=1e-5)
+
+
+def test_obj_round_trip(tmp_path):
+    rows = _rows()
+    path = str(tmp_path / "city.obj")
+    assert export_buildings(path, rows) == len(rows)
+    assert (tmp_path / "city.mtl").exists()
+    vertices, faces, objects = [], [], 0
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if fields and fields[0] == "o":
+                objects += 1
+            elif fields and fields[0] == "v":
+                vertices.append([float(value) for value in fields[1:]])
+            elif fields and fields[0] == "f":
+                faces.append(tuple(int(corner.split("/")[0]) - 1 for corner in fields[1:]))
+    assert objects == len(rows)
+    vertices = np.array(vertices)
+    expected_faces = []
+    first = 0
+    buffers_list = [generate_from_params(params) for params in rows]
+    for buffers in buffers_list:
+        expected_faces += [tuple(index + first for index in face) for face in buffers.faces()]
+        first += len(buffers.vertices)
+    assert sorted(faces) == sorted(expected_faces)
+    expected = np.concatenate([buffers.vertices for buffers in buffers_list])
+    assert np.allclose(np.column_stack((vertices[:, 0], -vertices[:, 2], vertices[:, 1])), expected, atol=1e-4)
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from building_kernel import FootprintReader, footprints
+
+_SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+
+
+def _feature(coordinates, geometry_type="Polygon", **properties):
+    return {"type": "Feature", "properties": properties,
+            "geometry": {"type": geometry_type, "coordinates": coordinates}}
+
+
+def _shifted(ring, dx):
+    return [[x + dx, y] for x, y in ring]
+
+
+def test_geojson_features(tmp_path):
+    path = tmp_path / "city.geojson"
+    path.write_text(json.dumps({
+        "type": "FeatureCollection",
+        # Nested "features" key has to be skipped
+        "properties": {"features": [_feature([_SQUARE])]},
+        "features": [
+            _feature([_shifted(_SQUARE, 100)], **{"building:levels": "5"}),
+            {"type": "Feature", "properties": {}, "geometry": None},
+            _feature([[_shifted(_SQUARE, 200)], [_shifted(_SQUARE, 300)]], "MultiPolygon", height="12 m"),
+        ]}))
+    reader = FootprintReader(str(path))
+    buildings = list(reader)
+    assert reader.skipped == 1
+    assert [(params.location_x, params.location_y) for params, _ in buildings] == [(105, 5), (205, 5), (305, 5)]
+    assert [params.level_count for params, _ in buildings] == [5, 4, 4]
+    for _, footprint in buildings:
+        assert np.allclose(np.sort(np.abs(footprint), axis=0), 5.0)
+
+
+def test_small_reads_give_same_features(tmp_path, monkeypatch):
+    path = tmp_path / "city.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "name": "features \"features\": [",
+                                "features": [_feature([_shifted(_SQUARE, 20 * i)]) for i in range(10)]}))
+    expected = [params for params, _ in FootprintReader(str(path))]
+    monkeypatch.setattr(footprints, "READ_SIZE", 7)
+    assert [params for params, _ in FootprintReader(str(path))] == expected
+    assert len(expected) == 10
+
+
+def test_geojsonl_chunks(tmp_path):
+    path = tmp_path / "city.geojsonl"
+    path.write_text("\n".join(json.dumps(_feature([_shifted(_SQUARE, 20 * i)])) for i in range(7)) + "\n\n")
+    chunks = list(FootprintReader(str(path)).chunks(3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert [params.location_x for chunk in chunks for params, _ in chunk] == [5.0 + 20 * i for i in range(7)]
+
+
+def test_csv_wkt_and_parameters(tmp_path):
+    path = tmp_path / "city.csv"
+    path.write_text("wkt,levels\n"
+                    "\"POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))\",6\n"
+                    ",3\n"
+                    "\n"
+                    "\"MULTIPOLYGON (((0 0, 4 0, 4 4, 0 0)), ((10 0, 14 0, 14 4, 10 4, 10 0)))\",2\n")
+    reader = FootprintReader(str(path))
+    buildings = list(reader)
+    assert reader.skipped == 1
+    assert [params.level_count for params, _ in buildings] == [6, 2, 2]
+    assert [len(footprint) for _, footprint in buildings] == [4, 3, 4]
+
+    table = tmp_path / "table.csv"
+    table.write_text("location_x,size_x\n10,20\n,\n30,40\n")
+    reader = FootprintReader(str(table))
+    rows = list(reader)
+    assert reader.skipped == 1
+    assert [(params.location_x, params.size_x, footprint) for params, footprint in rows] == [
+        (10, 20, None), (30, 40, None)]
@@ -0,0 +1,135 @@
+import numpy as np
+
+import building_kernel
+from building_kernel import is_basic_building, params_from_record
+from building_kernel.geometry import face_normals
+
+
+# Concave footprint around the origin
+_L_FOOTPRINT = np.array([(0, 0), (20, 0), (20, 8), (8, 8), (8, 25), (0, 25)], dtype=np.float64) - 10
+
+
+def _params(**fields):
+    return params_from_record(fields)
+
+
+def test_default_building_is_basic():
+    assert is_basic_building(_params())
+
+
+def test_flat_roof_pitch_is_basic():
+    assert is_basic_building(_params(roof_type=building_kernel.ROOF_GABLED, roof_pitch=0))
+
+
+def test_unsupported_features_are_not_basic():
+    for fields in (
+            {"roof_type": building_kernel.ROOF_GABLED},
+            {"roof_type": building_kernel.ROOF_PYRAMID},
+            {"wnd_frame": 0.1},
+            {"lod": building_kernel.LOD_FLAT_WINDOWS},
+            {"lod": building_kernel.LOD_BOX},
+            {"blank_bays": 0.2},
+            {"balconies": 0.2}):
+        assert not is_basic_building(_params(**fields)), fields
+
+
+def test_footprint_building_is_not_basic():
+    assert not is_basic_building(_params(), footprint=[(0, 0), (10, 0), (10, 10), (0, 10)])
+
+
+def test_window_depth_is_basic():
+    assert is_basic_building(_params(wnd_depth=0.5))
+
+
+
+def _check_roof_materials(buffers, eave):
+    starts = buffers.loop_starts()
+    normals = face_normals(buffers.vertices, buffers.loops, buffers.loop_totals)
+    is_roof = np.array([buffers.vertices[buffers.loops[start:start + total], 2].min() >= eave - 1e-6
+                        for start, total in zip(starts, buffers.loop_totals)])
+    is_vertical = np.isclose(normals[:, 2], 0.0, atol=1e-6)
+    materials = buffers.material_indices[is_roof]
+    assert (materials[is_vertical[is_roof]] == building_kernel.MATERIAL_WALL).any()
+    assert (materials[is_vertical[is_roof]] == building_kernel.MATERIAL_WALL).all()
+    assert (materials[~is_vertical[is_roof]] == building_kernel.MATERIAL_ROOF).all()
+
+
+def test_gable_ends_are_walls():
+    params = _params(roof_type=building_kernel.ROOF_GABLED)
+    buffers = building_kernel.generate_from_params(params, False)
+    _, height_segs = building_kernel.building_layout(params, False)[1:]
+    _check_roof_materials(buffers, sum(height_segs))
+
+
+def test_instanced_gable_ends_are_walls():
+    params = _params(roof_type=building_kernel.ROOF_GABLED)
+    _, roof = building_kernel.generate_instanced_building(params, False)
+    _check_roof_materials(roof, roof.vertices[:, 2].min())
+
+
+def _edge_uses(buffers):
+    starts = buffers.loop_starts()
+    following = np.arange(1, len(buffers.loops) + 1)
+    following[starts + buffers.loop_totals - 1] = starts
+    edges = np.stack((buffers.loops, buffers.loops[following]), axis=1)
+    directed, counts = np.unique(edges, axis=0, return_counts=True)
+    return edges, directed, counts
+
+
+def _check_closed(buffers):
+    # Shared vertices are welded, every edge but the open bottom ones joins two faces
+    # of consistent winding
+    assert len(np.unique(np.round(buffers.vertices, 6), axis=0)) == len(buffers.vertices)
+    edges, _, counts = _edge_uses(buffers)
+    assert (counts == 1).all()
+    reverse = set(map(tuple, edges[:, ::-1].tolist()))
+    is_bottom = (buffers.vertices[edges, 2] <= 1e-9).all(axis=1)
+    for edge, bottom in zip(edges.tolist(), is_bottom.tolist()):
+        assert bottom or tuple(edge) in reverse, edge
+
+
+def test_buildings_are_welded_and_closed():
+    for fields in (
+            {},
+            {"roof_type": building_kernel.ROOF_GABLED},
+            {"roof_type": building_kernel.ROOF_HIPPED, "size_x": 12, "size_y": 12},
+            {"roof_type": building_kernel.ROOF_PYRAMID, "wnd_frame": 0.1},
+            {"top_gap": 0, "bottom_gap": 0},
+            {"wnd_depth": 0},
+            {"lod": building_kernel.LOD_FLAT_WINDOWS},
+            {"lod": building_kernel.LOD_BOX, "roof_type": building_kernel.ROOF_GABLED}):
+        _check_closed(building_kernel.generate_from_params(_params(**fields), False))
+
+
+def test_footprint_buildings_are_welded_and_closed():
+    for roof_type in (building_kernel.ROOF_FLAT, building_kernel.ROOF_PYRAMID):
+        _check_closed(building_kernel.generate_from_params(_params(roof_type=roof_type), False, _L_FOOTPRINT))
+
+
+def test_roofs_face_up_and_cover_footprint():
+    params = _params(size_x=30, size_y=10)
+    for roof_type in (building_kernel.ROOF_FLAT, building_kernel.ROOF_GABLED,
+                      building_kernel.ROOF_HIPPED, building_kernel.ROOF_PYRAMID):
+        buffers = building_kernel.generate_from_params(params._replace(roof_type=roof_type), False)
+        normals = face_normals(buffers.vertices, buffers.loops, buffers.loop_totals)
+        roof = normals[buffers.material_indices == building_kernel.MATERIAL_ROOF]
+        assert (roof[:, 2] > 0).all()
+        # Projected area of non-vertical roof faces is the footprint area
+        assert np.isclose(roof[:, 2].sum() / 2, 300.0), roof_type
+
+
+def test_roof_pitch_sets_ridge_height():
+    params = _params(size_x=30, size_y=10, roof_type=building_kernel.ROOF_GABLED, roof_pitch=45)
+    flat = building_kernel.generate_from_params(params._replace(roof_type=building_kernel.ROOF_FLAT), False)
+    gabled = building_kernel.generate_from_params(params, False)
+    assert np.isclose(gabled.vertices[:, 2].max() - flat.vertices[:, 2].max(), 5.0)
+
+
+def test_concave_footprint_gets_flat_roof():
+    buffers = building_kernel.generate_from_params(
+        _params(roof_type=building_kernel.ROOF_GABLED), False, _L_FOOTPRINT)
+    roof = buffers.material_indices == building_kernel.MATERIAL_ROOF
+    starts = buffers.loop_starts()
+    heights = [buffers.vertices[buffers.loops[start:start + total], 2]
+               for start, total in zip(starts[roof], buffers.loop_totals[roof])]
+    assert np.allclose(np.concatenate(heights), buffers.vertices[:, 2].max())
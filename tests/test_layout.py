@@ -0,0 +1,27 @@
+import numpy as np
+
+from building_kernel import generate_wall_segs, layout_walls, window_counts
+
+
+def test_exact_fit_gets_window():
+    # 5.1 - 2 * 1.0 is slightly below 3.1 in floating point
+    assert window_counts([5.1], 3.1, 1.0, 1.0).tolist() == [1]
+    assert window_counts([7.46], 1.46, 1.0, 3.0).tolist() == [1]
+
+
+def test_exact_fit_of_several_windows():
+    assert window_counts([2 * 0.7 + 3 * 1.3 + 2 * 0.9], 1.3, 0.9, 0.7).tolist() == [3]
+
+
+def test_short_wall_has_no_windows():
+    assert window_counts([7.45, 0.0], 1.46, 1.0, 3.0).tolist() == [0, 0]
+    assert generate_wall_segs(7.45, 1.46, 1.0, 3.0) == [7.45]
+
+
+def test_segments_sum_to_wall_length():
+    lengths = np.array([3.0, 7.46, 12.0, 25.3])
+    counts = window_counts(lengths, 1.46, 1.0, 1.5)
+    for length, count, segs in zip(lengths, counts, layout_walls(lengths, 1.46, 1.0, 1.5)):
+        assert np.isclose(np.sum(segs), length)
+        assert len(segs) == (count * 2 + 1 if count else 1)
+        assert segs[0] == segs[-1]
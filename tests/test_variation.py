@@ -0,0 +1,61 @@
+import numpy as np
+
+import building_kernel
+from building_kernel import Variation, bay_kinds, generate_from_params, params_from_record, vary_params
+
+_VARIATION = Variation(seed=3, level_count=(2, 9), wnd_width=(1.2, 1.8), gap=(1.0, 2.0),
+                       blank_bays=0.2, balconies=0.1)
+
+
+def _rows(count):
+    return [params_from_record({"location_x": 40 * i, "size_x": 20 + i % 7}) for i in range(count)]
+
+
+def test_same_seed_gives_same_rows_across_chunkings():
+    rows = _rows(23)
+    whole = vary_params(rows, _VARIATION)
+    for chunk_size in (1, 5, 10):
+        chunked = []
+        for start in range(0, len(rows), chunk_size):
+            chunked += vary_params(rows[start:start + chunk_size], _VARIATION,
+                                   building_ids=range(start, min(start + chunk_size, len(rows))))
+        assert chunked == whole, chunk_size
+
+
+def test_same_seed_gives_same_geometry():
+    first, second = vary_params(_rows(4), _VARIATION), vary_params(_rows(4), _VARIATION)
+    for a, b in zip(first, second):
+        buffers_a, buffers_b = generate_from_params(a), generate_from_params(b)
+        assert np.array_equal(buffers_a.vertices, buffers_b.vertices)
+        assert np.array_equal(buffers_a.loops, buffers_b.loops)
+        assert np.array_equal(buffers_a.material_indices, buffers_b.material_indices)
+
+
+def test_other_seed_changes_rows():
+    rows = _rows(20)
+    assert vary_params(rows, _VARIATION) != vary_params(rows, _VARIATION._replace(seed=4))
+
+
+def test_varied_values_are_in_limits():
+    varied = vary_params(_rows(200), _VARIATION)
+    building_kernel.validate_table(varied)
+    level_counts = [params.level_count for params in varied]
+    assert min(level_counts) == 2 and max(level_counts) == 9
+    assert all(1.2 <= params.wnd_width <= 1.8 and 1.0 <= params.gap <= 2.0 for params in varied)
+
+
+def test_bay_kinds_do_not_depend_on_cells_order():
+    cells = np.arange(1000)
+    kinds = bay_kinds(7, 0.2, 0.3, cells)
+    assert np.array_equal(bay_kinds(7, 0.2, 0.3, cells[::-1]), kinds[::-1])
+    shares = np.bincount(kinds, minlength=3) / len(cells)
+    assert abs(shares[building_kernel.BAY_BLANK] - 0.2) < 0.05
+
+
+def test_iter_table_chunks_match_read_table(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("location_x,size_x,level_count\n" + "".join(
+        "{},{},{}\n".format(40 * i, 20 + i % 7, 1 + i % 5) for i in range(23)))
+    rows = building_kernel.read_table(str(path))
+    for chunk_size in (1, 4, 100):
+        assert list(building_kernel.iter_table(str(path), chunk_size=chunk_size)) == rows